@@ -0,0 +1,216 @@
+"""
+Admission control for SMART Connect AI providers
+Per-provider concurrency limits, token-bucket rate limiting and a priority queue
+"""
+import asyncio
+import heapq
+import itertools
+import time
+import logging
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Dict, Any, Optional, List, Callable
+
+from .base import AIRequest, AITask, time_remaining
+from .token_budget import approximate_tokens
+from backend.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+# Lower value is admitted first. Interactive tasks jump ahead of batch work.
+TASK_PRIORITY: Dict[AITask, int] = {
+    AITask.PROJECT_MATCHING: 0,
+    AITask.SKILL_EXTRACTION: 1,
+    AITask.TEXT_ANALYSIS: 1,
+    AITask.CODE_GENERATION: 1,
+    AITask.STUDENT_RANKING: 2,
+    AITask.SURVEY_ANALYSIS: 3,
+    AITask.CASE_STUDY_GENERATION: 3,
+    AITask.REPORT_GENERATION: 4,
+}
+DEFAULT_PRIORITY = 2
+
+
+class AdmissionTimeout(Exception):
+    """Raised when a request waits too long in a provider's queue"""
+
+
+def request_priority(request: AIRequest) -> int:
+    """Priority for a request; metadata["priority"] overrides the task default"""
+    if request.metadata and "priority" in request.metadata:
+        return int(request.metadata["priority"])
+    return TASK_PRIORITY.get(request.task, DEFAULT_PRIORITY)
+
+
+def estimate_request_tokens(
+    request: AIRequest,
+    default_max_tokens: int,
+    count: Callable[[str], int] = approximate_tokens
+) -> int:
+    """Token estimate for rate limiting: prompt tokens plus the completion budget"""
+    return count(request.prompt) + (request.max_tokens or default_max_tokens)
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at a per-minute rate"""
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, amount: float) -> float:
+        """Seconds until `amount` tokens are available (0 if available now)"""
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def consume(self, amount: float):
+        self._refill()
+        self.tokens -= min(amount, self.capacity)
+
+    def adjust(self, delta: float):
+        """Charge (positive) or refund (negative) tokens after the fact"""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens - delta)
+
+
+class AdmissionController:
+    """Gatekeeper for a single provider: bounded in-flight requests, rate limits and priority ordering"""
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int = 8,
+        requests_per_minute: int = 0,
+        tokens_per_minute: int = 0,
+        queue_timeout: Optional[float] = None
+    ):
+        self.name = name
+        self.max_concurrency = max(1, max_concurrency)
+        self.request_bucket = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.token_bucket = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.queue_timeout = queue_timeout if queue_timeout is not None else settings.ai_queue_timeout
+
+        self._waiters: List[list] = []  # heap of [priority, seq, enqueued_at, tokens, future]
+        self._seq = itertools.count()
+        self._in_flight = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+        self.admitted = 0
+        self.timed_out = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.recent_waits: deque = deque(maxlen=256)
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(1 for entry in self._waiters if not entry[4].done())
+
+    @asynccontextmanager
+    async def slot(self, request: AIRequest, estimated_tokens: int):
+        """Hold an admission slot for the duration of a provider call.
+
+        The caller may set ``ticket["tokens_used"]`` so the token bucket is
+        reconciled with the real usage instead of the estimate.
+        """
+        await self.acquire(request_priority(request), estimated_tokens, time_remaining(request))
+        ticket = {"tokens_used": estimated_tokens}
+        try:
+            yield ticket
+        finally:
+            self.release(estimated_tokens, ticket["tokens_used"])
+
+    async def acquire(self, priority: int, tokens: int, max_wait: Optional[float] = None):
+        """Wait for a slot, at most ``queue_timeout`` (or ``max_wait`` if shorter)"""
+        timeout = self.queue_timeout if max_wait is None else min(self.queue_timeout, max_wait)
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        heapq.heappush(self._waiters, [priority, next(self._seq), time.monotonic(), tokens, future])
+        self._dispatch()
+
+        try:
+            await asyncio.wait_for(future, timeout=timeout)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            self._dispatch()
+            raise AdmissionTimeout(
+                f"Request waited more than {timeout:.1f}s for provider {self.name}"
+            )
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Granted just as the caller went away: hand the slot back
+                self.release(tokens, 0)
+            else:
+                self._dispatch()
+            raise
+
+    def release(self, estimated_tokens: int, tokens_used: int):
+        self._in_flight -= 1
+        if self.token_bucket is not None and tokens_used != estimated_tokens:
+            self.token_bucket.adjust(tokens_used - estimated_tokens)
+        self._dispatch()
+
+    def _dispatch(self):
+        """Grant queued requests in priority order while capacity and rate limits allow"""
+        while self._waiters:
+            priority, seq, enqueued_at, tokens, future = self._waiters[0]
+            if future.done():
+                heapq.heappop(self._waiters)
+                continue
+            if self._in_flight >= self.max_concurrency:
+                return
+
+            delay = 0.0
+            if self.request_bucket is not None:
+                delay = max(delay, self.request_bucket.delay(1))
+            if self.token_bucket is not None:
+                delay = max(delay, self.token_bucket.delay(tokens))
+            if delay > 0:
+                self._schedule(delay)
+                return
+
+            heapq.heappop(self._waiters)
+            if self.request_bucket is not None:
+                self.request_bucket.consume(1)
+            if self.token_bucket is not None:
+                self.token_bucket.consume(tokens)
+            self._in_flight += 1
+            self._record_wait(time.monotonic() - enqueued_at)
+            future.set_result(None)
+
+    def _schedule(self, delay: float):
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = asyncio.get_running_loop().call_later(delay, self._dispatch)
+
+    def _record_wait(self, wait: float):
+        self.admitted += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        self.recent_waits.append(wait)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        waits = sorted(self.recent_waits)
+        p95 = waits[int(0.95 * (len(waits) - 1))] if waits else 0.0
+        return {
+            "queue_depth": self.queue_depth,
+            "in_flight": self._in_flight,
+            "max_concurrency": self.max_concurrency,
+            "admitted": self.admitted,
+            "timed_out": self.timed_out,
+            "avg_wait": self.total_wait / self.admitted if self.admitted else 0.0,
+            "p95_wait": p95,
+            "max_wait": self.max_wait,
+            "requests_per_minute": self.request_bucket.rate * 60 if self.request_bucket else None,
+            "tokens_per_minute": self.token_bucket.rate * 60 if self.token_bucket else None
+        }
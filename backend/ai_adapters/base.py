@@ -3,10 +3,16 @@ Base AI Adapter for SMART Connect
 Abstract base class for all AI providers
 """
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, AsyncIterator
 from enum import Enum
 from dataclasses import dataclass
 import logging
+import time
+
+import httpx
+
+from backend.core.config import settings
+from backend.ai_adapters.token_budget import PromptSection, approximate_tokens
 
 logger = logging.getLogger(__name__)
 
@@ -32,6 +38,32 @@ class AIRequest:
     max_tokens: Optional[int] = None
     temperature: Optional[float] = None
     metadata: Optional[Dict[str, Any]] = None
+    # Prioritized prompt parts; when set, the manager re-renders ``prompt`` to
+    # fit each provider's context window before calling it
+    sections: Optional[List[PromptSection]] = None
+    # JSON schema the response must follow; adapters switch on their
+    # provider's JSON mode where available (the prompt still describes it)
+    json_schema: Optional[Dict[str, Any]] = None
+    # Wall-clock time (time.time()) by which the caller needs the answer;
+    # provider calls are abandoned past it. None keeps adapter defaults
+    deadline: Optional[float] = None
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a request's deadline passes before a provider answers"""
+
+
+class ProviderUnreachable(Exception):
+    """Raised by an adapter that cannot connect to its provider at all; the
+    manager reports it to the health prober, which skips the provider until
+    the next probe finds it up again"""
+
+
+def time_remaining(request: AIRequest) -> Optional[float]:
+    """Seconds left before the request's deadline (at least 0), or None without one"""
+    if request.deadline is None:
+        return None
+    return max(0.0, request.deadline - time.time())
 
 
 @dataclass
@@ -47,6 +79,18 @@ class AIResponse:
     error: Optional[str] = None
 
 
+@dataclass
+class AIStreamEvent:
+    """Incremental piece of a streamed AI response.
+
+    ``final`` is set only on the last event and carries the complete
+    response with cost and timing.
+    """
+    delta: str
+    provider: str
+    final: Optional[AIResponse] = None
+
+
 class BaseAIAdapter(ABC):
     """Base class for all AI adapters"""
     
@@ -56,18 +100,72 @@ class BaseAIAdapter(ABC):
         self.config = config
         self.cost_per_1k_tokens = config.get("cost_per_1k_tokens", 0.002)
         self.max_tokens = config.get("max_tokens", 4000)
+        self.context_window = config.get("context_window", 4096)
         self.supported_features = config.get("supported_features", [])
     
     @abstractmethod
     async def generate_response(self, request: AIRequest) -> AIResponse:
-        """Generate response using AI provider"""
+        """Generate response using AI provider.
+        
+        Failures are returned in ``AIResponse.error``; only a provider that
+        cannot be reached at all raises ProviderUnreachable.
+        """
         pass
     
+    async def stream_response(self, request: AIRequest) -> AsyncIterator[str]:
+        """Stream generated text as it is produced.
+        
+        Unlike generate_response, failures are raised rather than returned.
+        Adapters without native streaming yield the complete response once.
+        """
+        response = await self.generate_response(request)
+        if response.error:
+            raise RuntimeError(response.error)
+        yield response.content
+    
     @abstractmethod
     def is_available(self) -> bool:
         """Check if the AI provider is available"""
         pass
     
+    def is_ready(self) -> bool:
+        """Check if the provider can serve requests without further warm-up"""
+        return self.is_available()
+    
+    async def warm_up(self):
+        """Prepare the provider (load models, open connections) ahead of first use"""
+        pass
+    
+    async def check_availability(self) -> bool:
+        """Probe the provider without blocking the event loop.
+        
+        Called by the background health prober; adapters with a remote
+        health endpoint override this and cache the result for is_available().
+        """
+        return self.is_available()
+    
+    async def aclose(self):
+        """Release pooled connections held by the adapter"""
+        pass
+    
+    def _create_http_client(self, **kwargs) -> httpx.AsyncClient:
+        """Create a long-lived async HTTP client with keep-alive connection pooling"""
+        limits = httpx.Limits(
+            max_connections=self.config.get("max_connections", settings.ai_http_max_connections),
+            max_keepalive_connections=self.config.get("max_keepalive_connections", settings.ai_http_max_keepalive),
+            keepalive_expiry=self.config.get("keepalive_expiry", settings.ai_http_keepalive_expiry)
+        )
+        return httpx.AsyncClient(limits=limits, **kwargs)
+    
+    def request_timeout(self, request: AIRequest, default: float) -> float:
+        """Timeout for one provider call: the adapter default, shortened by the request deadline"""
+        remaining = time_remaining(request)
+        return default if remaining is None else min(default, remaining)
+    
+    def count_tokens(self, text: str) -> int:
+        """Count tokens as this provider would; adapters with a real tokenizer override this"""
+        return approximate_tokens(text)
+    
     def calculate_cost(self, tokens_used: int) -> float:
         """Calculate cost based on tokens used"""
         return (tokens_used / 1000) * self.cost_per_1k_tokens
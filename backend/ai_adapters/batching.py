@@ -0,0 +1,122 @@
+"""
+Micro-batching for SMART Connect local AI models
+Collects concurrent requests for a few milliseconds and runs them as one batched call
+"""
+import asyncio
+import logging
+from typing import Any, Callable, Dict, Hashable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """
+    Queue items per batch key and hand them to ``process_batch`` in groups.
+
+    A batch is flushed once it holds ``max_batch_size`` items or its oldest
+    item has waited ``max_wait`` seconds. Only one batch runs at a time (the
+    model is a shared resource); items arriving meanwhile keep accumulating
+    and go out together as soon as the running batch finishes.
+    ``process_batch(key, items)`` runs in a worker thread and must return one
+    result per item, in order.
+    """
+
+    def __init__(
+        self,
+        process_batch: Callable[[Hashable, List[Any]], List[Any]],
+        max_batch_size: int = 8,
+        max_wait: float = 0.01
+    ):
+        self.process_batch = process_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait
+
+        self._pending: Dict[Hashable, List[Tuple[Any, asyncio.Future]]] = {}
+        self._timers: Dict[Hashable, asyncio.TimerHandle] = {}
+        self._ready: List[Hashable] = []
+        self._running: Optional[asyncio.Task] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+        self.batches_run = 0
+        self.items_processed = 0
+
+    async def submit(self, item: Any, key: Hashable = None) -> Any:
+        """Queue an item and wait for its result"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        batch = self._pending.setdefault(key, [])
+        batch.append((item, future))
+
+        if len(batch) >= self.max_batch_size:
+            self._mark_ready(key)
+        elif key not in self._timers:
+            self._timers[key] = loop.call_later(self.max_wait, self._mark_ready, key)
+
+        return await future
+
+    def _mark_ready(self, key: Hashable):
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        if key in self._pending and key not in self._ready:
+            self._ready.append(key)
+        self._maybe_run()
+
+    def _maybe_run(self):
+        if self._running is not None and not self._running.done():
+            return
+
+        while self._ready:
+            key = self._ready.pop(0)
+            pending = [(item, future) for item, future in self._pending.pop(key, []) if not future.done()]
+            if not pending:
+                continue
+
+            batch, rest = pending[:self.max_batch_size], pending[self.max_batch_size:]
+            if rest:
+                self._pending[key] = rest
+                self._ready.append(key)
+
+            self._running = asyncio.create_task(self._run(key, batch))
+            self._tasks.add(self._running)
+            self._running.add_done_callback(self._on_batch_done)
+            return
+
+    def _on_batch_done(self, task: asyncio.Task):
+        self._tasks.discard(task)
+        self._running = None
+        # Anything that queued up while the model was busy goes out now
+        for key in list(self._pending):
+            if key not in self._ready:
+                timer = self._timers.pop(key, None)
+                if timer is not None:
+                    timer.cancel()
+                self._ready.append(key)
+        self._maybe_run()
+
+    async def _run(self, key: Hashable, batch: List[Tuple[Any, asyncio.Future]]):
+        items = [item for item, _ in batch]
+        try:
+            results = await asyncio.to_thread(self.process_batch, key, items)
+        except Exception as e:
+            logger.error(f"Batched call of {len(items)} items failed: {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self.batches_run += 1
+        self.items_processed += len(items)
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            "batches_run": self.batches_run,
+            "items_processed": self.items_processed,
+            "avg_batch_size": self.items_processed / self.batches_run if self.batches_run else 0.0,
+            "queued": sum(len(batch) for batch in self._pending.values()),
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000
+        }
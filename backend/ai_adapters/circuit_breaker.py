@@ -0,0 +1,103 @@
+"""
+Circuit breaker for SMART Connect AI providers
+Stops sending traffic to a failing provider and probes it again after a cool-down
+"""
+import time
+import logging
+from collections import deque
+from enum import Enum
+from typing import Dict, Any, Optional
+
+from backend.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitState(str, Enum):
+    CLOSED = "closed"        # Normal operation
+    OPEN = "open"            # Failing; requests are rejected without calling the provider
+    HALF_OPEN = "half_open"  # Cool-down elapsed; a few trial requests are let through
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the provider's circuit is open"""
+
+
+class CircuitBreaker:
+    """Failure-rate circuit breaker over a rolling window of recent calls"""
+
+    def __init__(
+        self,
+        name: str,
+        failure_rate_threshold: Optional[float] = None,
+        window_size: Optional[int] = None,
+        min_calls: Optional[int] = None,
+        open_duration: Optional[float] = None,
+        half_open_max_calls: int = 1
+    ):
+        self.name = name
+        self.failure_rate_threshold = failure_rate_threshold or settings.ai_circuit_failure_rate
+        self.min_calls = min_calls or settings.ai_circuit_min_calls
+        self.open_duration = open_duration or settings.ai_circuit_open_seconds
+        self.half_open_max_calls = half_open_max_calls
+
+        self.state = CircuitState.CLOSED
+        self.outcomes: deque = deque(maxlen=window_size or settings.ai_circuit_window_size)
+        self.opened_at = 0.0
+        self._half_open_calls = 0
+
+    def allow_request(self) -> bool:
+        """Whether a call may be sent to the provider right now"""
+        if self.state == CircuitState.OPEN:
+            if time.monotonic() - self.opened_at < self.open_duration:
+                return False
+            self._transition(CircuitState.HALF_OPEN)
+
+        if self.state == CircuitState.HALF_OPEN:
+            if self._half_open_calls >= self.half_open_max_calls:
+                return False
+            self._half_open_calls += 1
+
+        return True
+
+    def record_success(self):
+        if self.state == CircuitState.HALF_OPEN:
+            self._transition(CircuitState.CLOSED)
+        self.outcomes.append(True)
+
+    def record_failure(self):
+        if self.state == CircuitState.HALF_OPEN:
+            self._transition(CircuitState.OPEN)
+            return
+        self.outcomes.append(False)
+        if len(self.outcomes) >= self.min_calls and self.failure_rate >= self.failure_rate_threshold:
+            self._transition(CircuitState.OPEN)
+
+    def record_ignored(self):
+        """Call ended without a verdict (queue timeout, cancellation); free the trial slot"""
+        if self.state == CircuitState.HALF_OPEN and self._half_open_calls > 0:
+            self._half_open_calls -= 1
+
+    @property
+    def failure_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return self.outcomes.count(False) / len(self.outcomes)
+
+    def _transition(self, state: CircuitState):
+        if state == self.state:
+            return
+        logger.info(f"Circuit for {self.name}: {self.state.value} -> {state.value}")
+        self.state = state
+        self._half_open_calls = 0
+        if state == CircuitState.OPEN:
+            self.opened_at = time.monotonic()
+        elif state == CircuitState.CLOSED:
+            self.outcomes.clear()
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "state": self.state.value,
+            "failure_rate": self.failure_rate,
+            "recent_calls": len(self.outcomes)
+        }
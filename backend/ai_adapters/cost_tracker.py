@@ -0,0 +1,209 @@
+"""
+AI cost tracking for SMART Connect
+Bounded in-memory usage history with running aggregates, flushed in batches to ai_cost_tracking
+"""
+import asyncio
+import logging
+from collections import deque
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Dict, Any, List, Optional, Tuple
+
+from sqlalchemy import func
+
+from .base import AITask
+from backend.core.config import settings
+from backend.core.database import SessionLocal
+from backend.models.ai_cost import AICostRecord
+
+logger = logging.getLogger(__name__)
+
+AggregateKey = Tuple[str, str, str, str]  # (date, provider, model, operation_type)
+
+
+@dataclass
+class CostAggregate:
+    """Running totals for one ai_cost_tracking row"""
+    tokens_used: int = 0
+    cost: float = 0.0
+    request_count: int = 0
+    total_time: float = 0.0
+    successes: int = 0
+
+    def add(self, tokens_used: int, cost: float, processing_time: float, success: bool):
+        self.tokens_used += tokens_used
+        self.cost += cost
+        self.request_count += 1
+        self.total_time += processing_time
+        self.successes += 1 if success else 0
+
+    def merge(self, other: "CostAggregate"):
+        self.tokens_used += other.tokens_used
+        self.cost += other.cost
+        self.request_count += other.request_count
+        self.total_time += other.total_time
+        self.successes += other.successes
+
+
+class CostTracker:
+    """Tracks AI usage costs.
+
+    Only the last ``history_size`` requests are kept in memory. Per-day totals
+    are running sums, and aggregated rows are written to ai_cost_tracking in
+    the background. The daily spend used for the cost limit is the database
+    total for today (shared by every worker) plus this worker's unflushed usage.
+    """
+
+    def __init__(self, history_size: Optional[int] = None, flush_interval: Optional[float] = None):
+        self.request_costs: deque = deque(maxlen=history_size or settings.ai_cost_history_size)
+        self.daily_costs: Dict[str, float] = {}
+        self.flush_interval = flush_interval or settings.ai_cost_flush_interval
+
+        self._pending: Dict[AggregateKey, CostAggregate] = {}
+        self._shared_daily_total: Optional[Tuple[str, float]] = None  # (date, flushed total of all workers)
+        self._task: Optional[asyncio.Task] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+
+    def add_cost(
+        self,
+        provider: str,
+        cost: float,
+        task: AITask,
+        tokens_used: int = 0,
+        processing_time: float = 0.0,
+        success: bool = True,
+        model: Optional[str] = None
+    ):
+        now = datetime.now()
+        today = now.date().isoformat()
+        self.daily_costs[today] = self.daily_costs.get(today, 0.0) + cost
+        self.request_costs.append({
+            "provider": provider,
+            "cost": cost,
+            "task": task.value,
+            "timestamp": now.isoformat()
+        })
+
+        key = (today, provider, model or provider, task.value)
+        aggregate = self._pending.get(key)
+        if aggregate is None:
+            aggregate = self._pending[key] = CostAggregate()
+        aggregate.add(tokens_used, cost, processing_time, success)
+
+        self._prune_daily_costs(now.date())
+
+    def _prune_daily_costs(self, today: date):
+        cutoff = (today - timedelta(days=settings.ai_cost_retention_days)).isoformat()
+        for day in [day for day in self.daily_costs if day < cutoff]:
+            del self.daily_costs[day]
+
+    def get_daily_cost(self, date: Optional[str] = None) -> float:
+        if date is None:
+            date = datetime.now().date().isoformat()
+        if self._shared_daily_total is not None and self._shared_daily_total[0] == date:
+            unflushed = sum(
+                aggregate.cost for key, aggregate in self._pending.items() if key[0] == date
+            )
+            return self._shared_daily_total[1] + unflushed
+        # Database not reached yet: this worker's own spend is the best we know
+        return self.daily_costs.get(date, 0.0)
+
+    def is_under_daily_limit(self) -> bool:
+        return self.get_daily_cost() < settings.daily_cost_limit
+
+    async def start(self):
+        """Load today's shared total and start the periodic flush"""
+        await self.flush()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the flush loop and write out what is still pending"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def flush(self):
+        """Write pending aggregates as one batch and refresh the shared daily total"""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        async with self._flush_lock:
+            batch, self._pending = self._pending, {}
+            written = False
+            if batch:
+                try:
+                    await asyncio.to_thread(self._write_batch, batch)
+                    written = True
+                except Exception as e:
+                    logger.warning(f"Failed to flush {len(batch)} AI cost rows: {e}")
+                    # Nothing was committed; keep the usage for the next attempt
+                    for key, aggregate in batch.items():
+                        if key in self._pending:
+                            self._pending[key].merge(aggregate)
+                        else:
+                            self._pending[key] = aggregate
+            # Read separately so a failed read never re-queues a committed batch
+            try:
+                self._shared_daily_total = await asyncio.to_thread(self._read_daily_total)
+            except Exception as e:
+                logger.warning(f"Failed to read the shared daily AI cost total: {e}")
+                if written and self._shared_daily_total is not None:
+                    # The batch left the pending totals, so count it on the last known total
+                    day, total = self._shared_daily_total
+                    self._shared_daily_total = (day, total + sum(
+                        aggregate.cost for key, aggregate in batch.items() if key[0] == day
+                    ))
+
+    def _write_batch(self, batch: Dict[AggregateKey, CostAggregate]):
+        """Insert aggregated rows in one transaction (runs in a worker thread)"""
+        db = SessionLocal()
+        try:
+            db.add_all([
+                AICostRecord(
+                    date=date.fromisoformat(day),
+                    provider=provider,
+                    model=model[:100],
+                    operation_type=operation_type,
+                    tokens_used=aggregate.tokens_used,
+                    cost_usd=aggregate.cost,
+                    request_count=aggregate.request_count,
+                    average_response_time_ms=int(aggregate.total_time * 1000 / aggregate.request_count),
+                    success_rate=round(100.0 * aggregate.successes / aggregate.request_count, 2)
+                )
+                for (day, provider, model, operation_type), aggregate in batch.items()
+            ])
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _read_daily_total(self) -> Tuple[str, float]:
+        """Today's cost across all workers (runs in a worker thread)"""
+        today = datetime.now().date()
+        db = SessionLocal()
+        try:
+            total = db.query(func.coalesce(func.sum(AICostRecord.cost_usd), 0)).filter(
+                AICostRecord.date == today
+            ).scalar()
+            return today.isoformat(), float(total)
+        finally:
+            db.close()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            "history_size": len(self.request_costs),
+            "pending_rows": len(self._pending),
+            "shared_total_loaded": self._shared_daily_total is not None
+        }
@@ -7,7 +7,7 @@ import time
 from typing import Dict, Any, Optional
 import google.generativeai as genai
 
-from backend.ai_adapters.base import BaseAIAdapter, AIRequest, AIResponse, AITask
+from backend.ai_adapters.base import BaseAIAdapter, AIRequest, AIResponse, AITask, time_remaining
 
 from backend.core.config import settings
 
@@ -41,19 +41,23 @@ class GoogleAIAdapter(BaseAIAdapter):
                 "top_k": 40
             }
             
-            # Make API call
-            response = await asyncio.to_thread(
-                self.model.generate_content,
-                full_prompt,
-                generation_config=generation_config
+            # Make API call; the SDK call is blocking, so past the deadline we
+            # stop waiting for the thread rather than interrupt it
+            response = await asyncio.wait_for(
+                asyncio.to_thread(
+                    self.model.generate_content,
+                    full_prompt,
+                    generation_config=generation_config
+                ),
+                timeout=time_remaining(request)
             )
             
             # Extract response data
             content = response.text
-            # Note: Google AI doesn't provide exact token counts in the same way
-            # We'll estimate based on content length
-            estimated_tokens = len(content.split()) * 1.3  # Rough estimation
-            cost = self.calculate_cost(int(estimated_tokens))
+            # Google AI doesn't return token counts here; bill prompt and completion
+            # with the shared token counter
+            estimated_tokens = self.count_tokens(full_prompt) + self.count_tokens(content)
+            cost = self.calculate_cost(estimated_tokens)
             processing_time = time.time() - start_time
             
             return AIResponse(
@@ -70,6 +74,16 @@ class GoogleAIAdapter(BaseAIAdapter):
                 }
             )
             
+        except asyncio.TimeoutError:
+            return AIResponse(
+                content="",
+                provider=self.provider_name,
+                task=request.task,
+                cost=0.0,
+                tokens_used=0,
+                processing_time=time.time() - start_time,
+                error="Deadline exceeded waiting for Google AI"
+            )
         except Exception as e:
             logger.error(f"Google AI API error: {str(e)}")
             return AIResponse(
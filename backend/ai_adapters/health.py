@@ -0,0 +1,99 @@
+"""
+Provider health probing for SMART Connect
+Background task that checks AI provider availability and caches the results
+"""
+import asyncio
+import time
+import logging
+from typing import Dict, Any, Optional
+
+from backend.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ProviderHealthProber:
+    """Periodically probes AI adapters so request paths only read cached status"""
+
+    def __init__(self, adapters: Dict[str, Any], interval: Optional[float] = None):
+        self.adapters = adapters
+        self.interval = interval or settings.ai_health_probe_interval
+        self.status: Dict[str, Dict[str, Any]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    async def probe(self, name: str, adapter: Any) -> bool:
+        """Probe a single adapter and record the outcome"""
+        start_time = time.time()
+        try:
+            check = getattr(adapter, "check_availability", None)
+            if check is not None:
+                available = await check()
+            else:
+                available = adapter.is_available()
+        except Exception as e:
+            logger.debug(f"Health probe for {name} failed: {e}")
+            available = False
+
+        previous = self.status.get(name, {}).get("available")
+        if previous is not None and previous != available:
+            logger.info(f"AI provider {name} is now {'available' if available else 'unavailable'}")
+
+        self.status[name] = {
+            "available": available,
+            "last_checked": time.time(),
+            "probe_time": time.time() - start_time
+        }
+        return available
+
+    async def probe_all(self) -> Dict[str, Dict[str, Any]]:
+        """Probe every registered adapter concurrently"""
+        await asyncio.gather(*(
+            self.probe(name, adapter) for name, adapter in list(self.adapters.items())
+        ))
+        return self.status
+
+    def mark_unavailable(self, name: str, reason: str):
+        """Record a failure seen on the request path, e.g. a refused connection;
+        the provider is skipped until a probe finds it available again"""
+        if self.status.get(name, {}).get("available", True):
+            logger.info(f"AI provider {name} is now unavailable: {reason}")
+        self.status[name] = {
+            "available": False,
+            "last_checked": time.time(),
+            "probe_time": 0.0,
+            "error": reason
+        }
+
+    def is_available(self, name: str) -> bool:
+        """Return cached availability, falling back to the adapter's cheap check"""
+        cached = self.status.get(name)
+        if cached is not None:
+            return cached["available"]
+        adapter = self.adapters.get(name)
+        try:
+            return bool(adapter and adapter.is_available())
+        except Exception:
+            return False
+
+    def start(self):
+        """Start the background probe loop on the running event loop"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the background probe loop"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.probe_all()
+            except Exception as e:
+                logger.warning(f"Provider health probe failed: {e}")
+            await asyncio.sleep(self.interval)
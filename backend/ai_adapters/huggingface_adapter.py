@@ -3,11 +3,16 @@ Hugging Face Transformers Adapter for SMART Connect
 Free AI models using Hugging Face transformers library
 """
 import asyncio
+import threading
 import time
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, AsyncIterator, Hashable, List, Tuple
 import json
+from dataclasses import asdict
+import httpx
 
-from backend.ai_adapters.base import BaseAIAdapter, AIRequest, AIResponse, AITask
+from backend.ai_adapters.base import BaseAIAdapter, AIRequest, AIResponse, AITask, ProviderUnreachable, time_remaining
+from backend.ai_adapters.batching import MicroBatcher
+from backend.ai_adapters.token_budget import truncate_to_tokens
 from backend.core.config import settings
 
 import logging
@@ -15,13 +20,34 @@ logger = logging.getLogger(__name__)
 
 # Check if transformers is available
 try:
-    from transformers import pipeline, AutoTokenizer, AutoModelForCausalLM
+    from transformers import pipeline, TextIteratorStreamer, StoppingCriteriaList
     import torch
     TRANSFORMERS_AVAILABLE = True
 except ImportError:
     TRANSFORMERS_AVAILABLE = False
     logger.warning("Transformers library not available. Install with: pip install transformers torch")
 
+# Optional ONNX Runtime backend for CPU-only nodes
+try:
+    from transformers import AutoTokenizer
+    from optimum.onnxruntime import ORTModelForCausalLM
+    import onnxruntime
+    ONNX_AVAILABLE = True
+except ImportError:
+    ONNX_AVAILABLE = False
+
+INFERENCE_BACKENDS = ("pytorch", "int8", "onnx")
+
+
+class _StopWhenAbandoned:
+    """Stopping criterion that ends generation once every caller waiting on it has gone away"""
+    
+    def __init__(self, events: List[threading.Event]):
+        self.events = events
+    
+    def __call__(self, input_ids, scores, **kwargs) -> bool:
+        return all(event.is_set() for event in self.events)
+
 
 class HuggingFaceAdapter(BaseAIAdapter):
     """Hugging Face transformers adapter - free local models"""
@@ -31,16 +57,65 @@ class HuggingFaceAdapter(BaseAIAdapter):
         self.model_name = config.get("model", "microsoft/DialoGPT-medium")
         self.device = config.get("device", "auto")
         self.max_length = config.get("max_length", 512)
+        self.context_window = config.get("context_window", self.max_length)
         self.default_temperature = config.get("temperature", 0.7)
+        self.stream_timeout = config.get("stream_timeout", 120)
+        
+        # Inference backend: "pytorch" (float32/float16), "int8" (dynamic quantization)
+        # or "onnx" (exported model on ONNX Runtime); num_threads 0 keeps library defaults
+        self.backend = config.get("backend", settings.hf_inference_backend)
+        self.num_threads = config.get("num_threads", settings.hf_num_threads)
+        self.onnx_model_path = config.get("onnx_model_path", settings.hf_onnx_model_path)
+        if self.backend not in INFERENCE_BACKENDS:
+            logger.warning(f"Unknown Hugging Face backend '{self.backend}', using pytorch")
+            self.backend = "pytorch"
         
+        # The model is loaded on first use or by warm_up(), never at construction
         self.pipeline = None
         self.tokenizer = None
+        self._load_lock: Optional[asyncio.Lock] = None
+        self._load_failed = False
+        
+        # Concurrent requests with identical generation settings share one forward pass
+        self.batcher = MicroBatcher(
+            self._run_pipeline_batch,
+            max_batch_size=config.get("batch_size", settings.hf_batch_size),
+            max_wait=config.get("batch_wait_ms", settings.hf_batch_wait_ms) / 1000
+        )
+    
+    async def ensure_loaded(self) -> bool:
+        """Load the model once, in a worker thread, and report whether it is ready"""
+        if self.pipeline is not None:
+            return True
+        if not TRANSFORMERS_AVAILABLE or self._load_failed:
+            return False
         
-        if TRANSFORMERS_AVAILABLE:
-            self._load_model()
+        if self._load_lock is None:
+            self._load_lock = asyncio.Lock()
+        async with self._load_lock:
+            if self.pipeline is None and not self._load_failed:
+                await asyncio.to_thread(self._load_model)
+        return self.pipeline is not None
+    
+    async def warm_up(self):
+        """Load the model and run a one-token generation so the first request is fast"""
+        if not await self.ensure_loaded():
+            return
+        start_time = time.time()
+        try:
+            await asyncio.to_thread(
+                self.pipeline,
+                "Hello",
+                max_new_tokens=1,
+                do_sample=False,
+                pad_token_id=self.tokenizer.eos_token_id
+            )
+            logger.info(f"Warmed up Hugging Face model {self.model_name} in {time.time() - start_time:.2f}s")
+        except Exception as e:
+            logger.warning(f"Hugging Face warm-up generation failed: {e}")
     
     def _load_model(self):
-        """Load the Hugging Face model"""
+        """Load the Hugging Face model with the configured inference backend"""
         try:
             # Determine device
             if self.device == "auto":
@@ -48,26 +123,70 @@ class HuggingFaceAdapter(BaseAIAdapter):
             else:
                 device = self.device
             
-            # Load pipeline for text generation
-            self.pipeline = pipeline(
-                "text-generation",
-                model=self.model_name,
-                device=device,
-                torch_dtype=torch.float16 if torch.cuda.is_available() else torch.float32
-            )
+            if self.num_threads:
+                torch.set_num_threads(self.num_threads)
+            
+            if self.backend == "onnx":
+                self.pipeline = self._load_onnx_pipeline()
+            else:
+                # Load pipeline for text generation
+                self.pipeline = pipeline(
+                    "text-generation",
+                    model=self.model_name,
+                    device=device,
+                    torch_dtype=torch.float16 if torch.cuda.is_available() else torch.float32
+                )
+                if self.backend == "int8":
+                    self._quantize_int8(device)
+            
+            # Reuse the tokenizer the pipeline already loaded
+            self.tokenizer = self.pipeline.tokenizer
             
-            self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
-            logger.info(f"Loaded Hugging Face model: {self.model_name}")
+            # Batched generation pads prompts; decoder-only models need left padding
+            if self.tokenizer.pad_token_id is None:
+                self.tokenizer.pad_token = self.tokenizer.eos_token
+            self.tokenizer.padding_side = "left"
+            
+            logger.info(f"Loaded Hugging Face model: {self.model_name} ({self.backend})")
             
         except Exception as e:
             logger.error(f"Error loading Hugging Face model: {e}")
             self.pipeline = None
+            self._load_failed = True
+    
+    def _load_onnx_pipeline(self):
+        """Export (or load a pre-exported) model and run it on ONNX Runtime"""
+        if not ONNX_AVAILABLE:
+            raise RuntimeError("ONNX backend requires: pip install optimum[onnxruntime]")
+        
+        session_options = onnxruntime.SessionOptions()
+        if self.num_threads:
+            session_options.intra_op_num_threads = self.num_threads
+        
+        model = ORTModelForCausalLM.from_pretrained(
+            self.onnx_model_path or self.model_name,
+            export=self.onnx_model_path is None,
+            session_options=session_options
+        )
+        tokenizer = AutoTokenizer.from_pretrained(self.onnx_model_path or self.model_name)
+        return pipeline("text-generation", model=model, tokenizer=tokenizer)
+    
+    def _quantize_int8(self, device):
+        """Apply dynamic int8 quantization to the model's linear layers (CPU only)"""
+        if device != -1:
+            logger.warning("int8 dynamic quantization is CPU-only; keeping the unquantized model")
+            return
+        self.pipeline.model = torch.quantization.quantize_dynamic(
+            self.pipeline.model,
+            {torch.nn.Linear},
+            dtype=torch.qint8
+        )
     
     async def generate_response(self, request: AIRequest) -> AIResponse:
         """Generate response using Hugging Face model"""
         start_time = time.time()
         
-        if not TRANSFORMERS_AVAILABLE or not self.pipeline:
+        if not await self.ensure_loaded():
             return AIResponse(
                 content="",
                 provider=self.provider_name,
@@ -80,23 +199,20 @@ class HuggingFaceAdapter(BaseAIAdapter):
         
         try:
             # Prepare the prompt
-            prompt = self._build_prompt(request)
+            prompt = self._prepare_prompt(request)
             
-            # Truncate prompt if too long
-            max_input_length = self.max_length // 2  # Reserve space for output
-            if len(prompt) > max_input_length:
-                prompt = prompt[:max_input_length] + "..."
-            
-            # Generate response
-            result = await asyncio.to_thread(
-                self.pipeline,
-                prompt,
-                max_length=request.max_tokens or self.max_length,
-                temperature=request.temperature or self.default_temperature,
-                do_sample=True,
-                pad_token_id=self.tokenizer.eos_token_id,
-                num_return_sequences=1
-            )
+            # Generate response as part of a micro-batch
+            generation_kwargs = self._generation_kwargs(request)
+            abandoned = threading.Event()
+            try:
+                result = await asyncio.wait_for(
+                    self.batcher.submit((prompt, abandoned), key=tuple(sorted(generation_kwargs.items()))),
+                    timeout=time_remaining(request)
+                )
+            finally:
+                # Cancelled or past the deadline: the batch stops early once
+                # none of its callers are waiting any more
+                abandoned.set()
             
             # Extract generated text
             generated_text = result[0]["generated_text"]
@@ -107,8 +223,8 @@ class HuggingFaceAdapter(BaseAIAdapter):
             else:
                 content = generated_text.strip()
             
-            # Estimate tokens
-            estimated_tokens = len(content.split()) * 1.3
+            # Count tokens with the model's tokenizer
+            estimated_tokens = self.count_tokens(content)
             cost = 0.0  # Free!
             processing_time = time.time() - start_time
             
@@ -123,10 +239,21 @@ class HuggingFaceAdapter(BaseAIAdapter):
                     "model": self.model_name,
                     "local": True,
                     "device": self.device,
+                    "backend": self.backend,
                     "max_length": self.max_length
                 }
             )
             
+        except asyncio.TimeoutError:
+            return AIResponse(
+                content="",
+                provider=self.provider_name,
+                task=request.task,
+                cost=0.0,
+                tokens_used=0,
+                processing_time=time.time() - start_time,
+                error="Deadline exceeded waiting for the local model"
+            )
         except Exception as e:
             logger.error(f"Hugging Face generation error: {str(e)}")
             return AIResponse(
@@ -139,9 +266,92 @@ class HuggingFaceAdapter(BaseAIAdapter):
                 error=str(e)
             )
     
+    async def stream_response(self, request: AIRequest) -> AsyncIterator[str]:
+        """Stream tokens from the local pipeline through a TextIteratorStreamer"""
+        if not await self.ensure_loaded():
+            raise RuntimeError("Hugging Face transformers not available or model not loaded")
+        
+        prompt = self._prepare_prompt(request)
+        streamer = TextIteratorStreamer(
+            self.tokenizer,
+            skip_prompt=True,
+            skip_special_tokens=True,
+            timeout=self.stream_timeout
+        )
+        
+        # Generation runs in a worker thread and pushes decoded text into the streamer;
+        # it stops at the next token once the consumer goes away
+        abandoned = threading.Event()
+        generation = asyncio.create_task(asyncio.to_thread(
+            self.pipeline,
+            prompt,
+            streamer=streamer,
+            stopping_criteria=StoppingCriteriaList([_StopWhenAbandoned([abandoned])]),
+            **self._generation_kwargs(request)
+        ))
+        
+        tokens = iter(streamer)
+        try:
+            while True:
+                text = await asyncio.to_thread(next, tokens, None)
+                if text is None:
+                    break
+                if text:
+                    yield text
+            await generation
+        finally:
+            abandoned.set()
+            if not generation.done():
+                # Let the thread wind down in the background
+                generation.add_done_callback(lambda task: task.exception())
+    
+    def _run_pipeline_batch(self, key: Hashable, items: List[Tuple[str, threading.Event]]) -> List[Any]:
+        """Run one padded, batched pipeline call (executed in a worker thread)"""
+        prompts = [prompt for prompt, _ in items]
+        stopping_criteria = StoppingCriteriaList([_StopWhenAbandoned([abandoned for _, abandoned in items])])
+        outputs = self.pipeline(prompts, batch_size=len(prompts), stopping_criteria=stopping_criteria, **dict(key))
+        if len(prompts) == 1 and outputs and isinstance(outputs[0], dict):
+            outputs = [outputs]
+        return outputs
+    
+    def _prepare_prompt(self, request: AIRequest) -> str:
+        """Build the prompt and truncate it to leave room for output"""
+        prompt = self._build_prompt(request)
+        
+        max_input_tokens = self.max_length // 2  # Reserve space for output
+        return truncate_to_tokens(prompt, max_input_tokens, self.count_tokens)
+    
+    def count_tokens(self, text: str) -> int:
+        """Count tokens with the model's own tokenizer once it is loaded"""
+        if self.tokenizer is None:
+            return super().count_tokens(text)
+        return len(self.tokenizer.encode(text))
+    
+    def _generation_kwargs(self, request: AIRequest) -> Dict[str, Any]:
+        """Pipeline generation arguments for the request"""
+        return {
+            "max_length": request.max_tokens or self.max_length,
+            "temperature": request.temperature or self.default_temperature,
+            "do_sample": True,
+            "pad_token_id": self.tokenizer.eos_token_id,
+            "num_return_sequences": 1
+        }
+    
     def is_available(self) -> bool:
-        """Check if Hugging Face adapter is available"""
-        return TRANSFORMERS_AVAILABLE and self.pipeline is not None
+        """Check if Hugging Face adapter can serve requests (loading the model on demand)"""
+        return TRANSFORMERS_AVAILABLE and not self._load_failed
+    
+    def is_ready(self) -> bool:
+        """Check if the model is loaded"""
+        return self.pipeline is not None
+    
+    def get_provider_info(self) -> Dict[str, Any]:
+        """Get provider information including micro-batching metrics"""
+        info = super().get_provider_info()
+        info["backend"] = self.backend
+        info["num_threads"] = self.num_threads
+        info["batching"] = self.batcher.get_metrics()
+        return info
     
     def _build_prompt(self, request: AIRequest) -> str:
         """Build prompt for Hugging Face model"""
@@ -178,6 +388,132 @@ class HuggingFaceAdapter(BaseAIAdapter):
         return prompts.get(task, "Provide helpful assistance for educational platform")
 
 
+class HuggingFaceServerAdapter(BaseAIAdapter):
+    """Thin client for the shared local model server (see model_server.py).
+    
+    Every API worker talks to one model process over a Unix socket instead of
+    loading its own copy of the model.
+    """
+    
+    def __init__(self, config: Dict[str, Any]):
+        super().__init__("Hugging Face", "", config)
+        self.socket_path = config.get("socket_path", settings.hf_model_server_socket)
+        self.timeout = config.get("timeout", settings.hf_server_timeout)
+        self.health_timeout = config.get("health_timeout", settings.ai_health_probe_timeout)
+        
+        # Cached by check_availability()
+        self._available = False
+        self._ready = False
+        self._server_status: Dict[str, Any] = {}
+    
+    async def _open(self, op: str, request: Optional[AIRequest] = None):
+        """Connect to the model server and send one operation"""
+        reader, writer = await asyncio.open_unix_connection(self.socket_path, limit=16 * 1024 * 1024)
+        message = {"op": op}
+        if request is not None:
+            message["request"] = asdict(request)
+        writer.write(json.dumps(message).encode() + b"\n")
+        await writer.drain()
+        return reader, writer
+    
+    async def _read_message(self, reader: asyncio.StreamReader, timeout: float) -> Dict[str, Any]:
+        line = await asyncio.wait_for(reader.readline(), timeout=timeout)
+        if not line:
+            raise ConnectionError("Model server closed the connection")
+        return json.loads(line)
+    
+    async def generate_response(self, request: AIRequest) -> AIResponse:
+        """Generate a response on the shared model server"""
+        start_time = time.time()
+        writer = None
+        try:
+            reader, writer = await self._open("generate", request)
+            message = await self._read_message(reader, self.request_timeout(request, self.timeout))
+            if "error" in message:
+                raise RuntimeError(message["error"])
+            
+            data = message["response"]
+            data["task"] = AITask(data["task"])
+            return AIResponse(**data)
+            
+        except (ConnectionError, FileNotFoundError) as e:
+            error_msg = f"Cannot connect to model server at {self.socket_path}: {e}"
+            logger.error(error_msg)
+            raise ProviderUnreachable(error_msg) from e
+        except Exception as e:
+            logger.error(f"Model server generation error: {str(e)}")
+            return AIResponse(
+                content="",
+                provider=self.provider_name,
+                task=request.task,
+                cost=0.0,
+                tokens_used=0,
+                processing_time=time.time() - start_time,
+                error=str(e) or "Model server request timed out"
+            )
+        finally:
+            if writer is not None:
+                writer.close()
+    
+    async def stream_response(self, request: AIRequest) -> AsyncIterator[str]:
+        """Relay text deltas streamed by the model server"""
+        reader, writer = await self._open("stream", request)
+        try:
+            while True:
+                message = await self._read_message(reader, self.request_timeout(request, self.timeout))
+                if "error" in message:
+                    raise RuntimeError(message["error"])
+                if message.get("done"):
+                    break
+                yield message["delta"]
+        finally:
+            # Closing the socket early tells the server to stop generating
+            writer.close()
+    
+    async def check_availability(self) -> bool:
+        """Ask the model server for its status and cache the result"""
+        writer = None
+        try:
+            reader, writer = await self._open("status")
+            self._server_status = await self._read_message(reader, self.health_timeout)
+            self._available = bool(self._server_status.get("available"))
+            self._ready = bool(self._server_status.get("ready"))
+        except Exception:
+            self._available = False
+            self._ready = False
+        finally:
+            if writer is not None:
+                writer.close()
+        return self._available
+    
+    async def warm_up(self):
+        """The server warms its own model; refresh the cached readiness"""
+        await self.check_availability()
+    
+    def is_available(self) -> bool:
+        """Return the cached result of the last status probe"""
+        return self._available
+    
+    def is_ready(self) -> bool:
+        """Whether the server reported its model as loaded"""
+        return self._ready
+    
+    def get_provider_info(self) -> Dict[str, Any]:
+        """Get provider information including the server's batching and queue metrics"""
+        info = super().get_provider_info()
+        info["model_server"] = {
+            "socket": self.socket_path,
+            "pending": self._server_status.get("pending"),
+            "max_pending": self._server_status.get("max_pending"),
+            "rejected": self._server_status.get("rejected"),
+            **{
+                key: value for key, value in self._server_status.get("info", {}).items()
+                if key in ("backend", "num_threads", "batching")
+            }
+        }
+        return info
+
+
 class HuggingFaceAPIAdapter(BaseAIAdapter):
     """Hugging Face Inference API adapter - free tier available"""
     
@@ -186,21 +522,29 @@ class HuggingFaceAPIAdapter(BaseAIAdapter):
         self.model = config.get("model", "microsoft/DialoGPT-medium")
         self.api_url = f"https://api-inference.huggingface.co/models/{self.model}"
         self.default_temperature = config.get("temperature", 0.7)
+        self.timeout = config.get("timeout", 60)
+        
+        self._client: Optional[httpx.AsyncClient] = None
+    
+    def _get_client(self) -> httpx.AsyncClient:
+        """Return the shared keep-alive client, creating it on first use"""
+        if self._client is None or self._client.is_closed:
+            self._client = self._create_http_client(
+                timeout=self.timeout,
+                headers={
+                    "Authorization": f"Bearer {self.api_key}",
+                    "Content-Type": "application/json"
+                }
+            )
+        return self._client
     
     async def generate_response(self, request: AIRequest) -> AIResponse:
         """Generate response using Hugging Face Inference API"""
         start_time = time.time()
         
         try:
-            import httpx
-            
             prompt = self._build_prompt(request)
             
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json"
-            }
-            
             payload = {
                 "inputs": prompt,
                 "parameters": {
@@ -210,14 +554,9 @@ class HuggingFaceAPIAdapter(BaseAIAdapter):
                 }
             }
             
-            async with httpx.AsyncClient(timeout=60) as client:
-                response = await client.post(
-                    self.api_url,
-                    headers=headers,
-                    json=payload
-                )
-                response.raise_for_status()
-                result = response.json()
+            response = await self._get_client().post(self.api_url, json=payload)
+            response.raise_for_status()
+            result = response.json()
             
             # Extract response
             if isinstance(result, list) and len(result) > 0:
@@ -258,6 +597,12 @@ class HuggingFaceAPIAdapter(BaseAIAdapter):
         """Check if API key is available"""
         return self.api_key is not None and len(self.api_key) > 0
     
+    async def aclose(self):
+        """Close the pooled HTTP client"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+    
     def _build_prompt(self, request: AIRequest) -> str:
         """Build simple prompt for API"""
         system_prompt = self._get_system_prompt(request.task)
@@ -3,48 +3,31 @@ AI Manager for SMART Connect
 Manages multiple AI providers with cost optimization, failover, and cost tracking
 """
 import asyncio
+import dataclasses
+import random
+import time
 import logging
-from typing import Dict, Any, List, Optional
-from datetime import datetime
+from typing import Dict, Any, List, Optional, AsyncIterator
+from collections import deque
 
-from .base import BaseAIAdapter, AIRequest, AIResponse, AITask
+from .base import (
+    BaseAIAdapter, AIRequest, AIResponse, AIStreamEvent, AITask, DeadlineExceeded, ProviderUnreachable, time_remaining
+)
 from .openai_adapter import OpenAIAdapter
 from .google_adapter import GoogleAIAdapter
 from .ollama_adapter import OllamaAdapter
-from .huggingface_adapter import HuggingFaceAdapter
-from backend.core.config import settings, AIProvider
+from .huggingface_adapter import HuggingFaceAdapter, HuggingFaceServerAdapter
+from .health import ProviderHealthProber
+from .admission import AdmissionController, AdmissionTimeout, estimate_request_tokens
+from .circuit_breaker import CircuitBreaker, CircuitOpenError
+from .cost_tracker import CostTracker
+from .routing import RoutingEngine
+from .token_budget import approximate_tokens, fit_sections, prompt_budget
+from backend.core.config import settings, AIProvider, FEATURE_PROVIDER_MAP, TASK_HEDGING_POLICY
 
 logger = logging.getLogger(__name__)
 
 
-class CostTracker:
-    """Tracks AI usage costs"""
-
-    def __init__(self):
-        self.daily_costs: Dict[str, float] = {}
-        self.request_costs: List[Dict[str, Any]] = []
-
-    def add_cost(self, provider: str, cost: float, task: AITask):
-        today = datetime.now().date().isoformat()
-        if today not in self.daily_costs:
-            self.daily_costs[today] = 0.0
-        self.daily_costs[today] += cost
-        self.request_costs.append({
-            "provider": provider,
-            "cost": cost,
-            "task": task.value,
-            "timestamp": datetime.now().isoformat()
-        })
-
-    def get_daily_cost(self, date: Optional[str] = None) -> float:
-        if date is None:
-            date = datetime.now().date().isoformat()
-        return self.daily_costs.get(date, 0.0)
-
-    def is_under_daily_limit(self) -> bool:
-        return self.get_daily_cost() < settings.daily_cost_limit
-
-
 class AIManager:
     """Manages multiple AI providers with cost optimization and failover"""
 
@@ -52,32 +35,22 @@ class AIManager:
         self.adapters: Dict[str, BaseAIAdapter] = {}
         self.cost_tracker = CostTracker()
         self._initialize_adapters()
+        self.health_prober = ProviderHealthProber(self.adapters)
+        self.admission: Dict[str, AdmissionController] = {
+            name: self._create_admission_controller(name, adapter)
+            for name, adapter in self.adapters.items()
+        }
+        self.circuit_breakers: Dict[str, CircuitBreaker] = {
+            name: CircuitBreaker(name) for name in self.adapters
+        }
+        # Recent successful call latencies per provider, used for hedging delays
+        self.latencies: Dict[str, deque] = {name: deque(maxlen=100) for name in self.adapters}
+        self.routing = RoutingEngine()
+        self._warmup_task: Optional[asyncio.Task] = None
+        self._warming: Dict[str, float] = {}   # Adapter -> monotonic start of its running warm-up
 
     def _initialize_adapters(self):
         """Initialize all AI adapters"""
-        # ---------------- Dummy Adapter ----------------
-        class DummyAdapter:
-            cost_per_1k_tokens = 0.0
-            max_tokens = 1000
-            supported_features = []
-
-            def is_available(self):
-                return True
-
-            async def generate_response(self, request: AIRequest) -> AIResponse:
-                return AIResponse(
-                    content="Dummy response",
-                    provider="xai",
-                    task=request.task,
-                    cost=0.0,
-                    tokens_used=0,
-                    processing_time=0.0,
-                    error=None
-                )
-
-        self.adapters["xai"] = DummyAdapter()
-        logger.info("Dummy xAI adapter initialized (for testing only)")
-
         # ---------------- Ollama Adapter ----------------
         try:
             ollama_adapter = OllamaAdapter({
@@ -85,89 +58,646 @@ class AIManager:
                 "base_url": getattr(settings, "ollama_url", "http://localhost:11434"),
                 "cost_per_1k_tokens": 0.0,
                 "max_tokens": 4000,
+                "context_window": settings.ollama_context_window,
                 "temperature": 0.7,
+                "max_concurrency": settings.ollama_max_concurrency,
                 "supported_features": ["text_generation", "analysis", "student_ranking", "skill_extraction", "report_generation"]
             })
-            if ollama_adapter.is_available():
-                self.adapters["ollama"] = ollama_adapter
-                logger.info("Ollama adapter initialized")
+            # Availability is probed in the background once the event loop is running
+            self.adapters["ollama"] = ollama_adapter
+            logger.info("Ollama adapter initialized")
         except Exception as e:
             logger.warning(f"Ollama adapter failed: {e}")
 
         # ---------------- HuggingFace Adapter ----------------
-        try:
-            hf_adapter = HuggingFaceAdapter({
-                "model": getattr(settings, "huggingface_model", "microsoft/DialoGPT-medium"),
-                "device": getattr(settings, "hf_device", "auto"),
+        # With a model server configured every worker shares its single model copy
+        if settings.hf_model_server_socket:
+            self.adapters["huggingface_local"] = HuggingFaceServerAdapter({
+                "socket_path": settings.hf_model_server_socket,
                 "cost_per_1k_tokens": 0.0,
                 "max_tokens": 512,
-                "temperature": 0.7,
+                "context_window": 512,
+                "max_concurrency": settings.huggingface_max_concurrency,
                 "supported_features": ["text_generation", "analysis", "skill_extraction"]
             })
-            if hf_adapter.is_available():
-                self.adapters["huggingface_local"] = hf_adapter
-                logger.info("HuggingFace local adapter initialized")
-        except Exception as e:
-            logger.warning(f"HuggingFace adapter failed: {e}")
+            logger.info(f"HuggingFace model server client initialized ({settings.hf_model_server_socket})")
+        else:
+            self._initialize_local_huggingface()
 
         # ---------------- Paid Providers ----------------
         if settings.openai_api_key:
-            self.adapters[AIProvider.OPENAI] = OpenAIAdapter(settings.openai_api_key, {
+            self.adapters[AIProvider.OPENAI.value] = OpenAIAdapter(settings.openai_api_key, {
                 "model": settings.openai_model,
                 "cost_per_1k_tokens": 0.002,
                 "max_tokens": settings.openai_max_tokens,
+                "context_window": settings.openai_context_window,
                 "temperature": settings.openai_temperature,
+                "requests_per_minute": settings.openai_requests_per_minute,
+                "tokens_per_minute": settings.openai_tokens_per_minute,
                 "supported_features": ["text_generation", "code_generation", "analysis", "student_ranking", "project_matching"]
             })
 
         if settings.google_ai_api_key:
-            self.adapters[AIProvider.GOOGLE] = GoogleAIAdapter(settings.google_ai_api_key, {
+            self.adapters[AIProvider.GOOGLE.value] = GoogleAIAdapter(settings.google_ai_api_key, {
                 "model": settings.google_ai_model,
                 "cost_per_1k_tokens": 0.001,
                 "max_tokens": 8000,
+                "context_window": settings.google_ai_context_window,
                 "temperature": 0.7,
+                "requests_per_minute": settings.google_ai_requests_per_minute,
+                "tokens_per_minute": settings.google_ai_tokens_per_minute,
                 "supported_features": ["text_generation", "analysis", "summarization", "student_ranking", "skill_extraction"]
             })
 
+        # ---------------- Dummy Adapter (tests only) ----------------
+        # Registered last so it can only ever follow the real providers
+        if settings.ai_enable_dummy_adapter:
+            class DummyAdapter:
+                cost_per_1k_tokens = 0.0
+                max_tokens = 1000
+                supported_features = []
+
+                def is_available(self):
+                    return True
+
+                async def generate_response(self, request: AIRequest) -> AIResponse:
+                    return AIResponse(
+                        content="Dummy response",
+                        provider="xai",
+                        task=request.task,
+                        cost=0.0,
+                        tokens_used=0,
+                        processing_time=0.0,
+                        error=None
+                    )
+
+            self.adapters["xai"] = DummyAdapter()
+            logger.info("Dummy xAI adapter initialized (for testing only)")
+
         logger.info(f"Initialized {len(self.adapters)} AI adapters")
 
+    def _initialize_local_huggingface(self):
+        """Load the Hugging Face model inside this process (single-worker deployments)"""
+        try:
+            hf_adapter = HuggingFaceAdapter({
+                "model": getattr(settings, "huggingface_model", "microsoft/DialoGPT-medium"),
+                "device": getattr(settings, "hf_device", "auto"),
+                "backend": settings.hf_inference_backend,
+                "num_threads": settings.hf_num_threads,
+                "cost_per_1k_tokens": 0.0,
+                "max_tokens": 512,
+                "temperature": 0.7,
+                "max_concurrency": settings.huggingface_max_concurrency,
+                "supported_features": ["text_generation", "analysis", "skill_extraction"]
+            })
+            # The model itself is loaded lazily or by the startup warm-up task
+            if hf_adapter.is_available():
+                self.adapters["huggingface_local"] = hf_adapter
+                logger.info("HuggingFace local adapter initialized")
+        except Exception as e:
+            logger.warning(f"HuggingFace adapter failed: {e}")
+
+    def _create_admission_controller(self, name: str, adapter: BaseAIAdapter) -> AdmissionController:
+        """Build the admission controller for an adapter from its config"""
+        config = getattr(adapter, "config", {}) or {}
+        return AdmissionController(
+            name,
+            max_concurrency=config.get("max_concurrency", settings.ai_max_concurrency),
+            requests_per_minute=config.get("requests_per_minute", 0),
+            tokens_per_minute=config.get("tokens_per_minute", 0)
+        )
+
+    async def start(self):
+        """Run an initial provider probe, start background health checks and model warm-up"""
+        await self.health_prober.probe_all()
+        self.health_prober.start()
+        await self.cost_tracker.start()
+        if settings.ai_warmup_on_startup:
+            self._warmup_task = asyncio.create_task(self._warm_up_adapters())
+
+    async def _warm_up_adapters(self):
+        """Warm up adapters one at a time so model loads don't compete for memory"""
+        pending = [(name, adapter.warm_up) for name, adapter in self.adapters.items() if hasattr(adapter, "warm_up")]
+        try:
+            for name, warm_up in pending:
+                self._warming[name] = time.monotonic()
+                try:
+                    await warm_up()
+                except Exception as e:
+                    logger.warning(f"Warm-up of AI provider {name} failed: {e}")
+                finally:
+                    self._warming.pop(name, None)
+        finally:
+            self._warming.clear()
+        logger.info("AI provider warm-up complete")
+
+    async def shutdown(self):
+        """Stop background tasks and close pooled provider connections"""
+        if self._warmup_task is not None and not self._warmup_task.done():
+            self._warmup_task.cancel()
+            try:
+                await self._warmup_task
+            except asyncio.CancelledError:
+                pass
+        await self.health_prober.stop()
+        await self.cost_tracker.stop()
+        for name, adapter in self.adapters.items():
+            close = getattr(adapter, "aclose", None)
+            if close is None:
+                continue
+            try:
+                await close()
+            except Exception as e:
+                logger.warning(f"Error closing adapter {name}: {e}")
+
     async def generate_response(self, request: AIRequest) -> AIResponse:
-        """Generate AI response using available providers and cost optimization"""
-        providers = self._get_optimal_providers(request.task)
+        """Generate AI response, failing over along the task's provider order"""
+        providers = [
+            name for name in self._get_optimal_providers(request.task)
+            if name in self.adapters and self.health_prober.is_available(name)
+            and self._within_cost_limit(name)
+        ]
+        spread_index = (request.metadata or {}).get("spread_index")
+        if spread_index is not None:
+            providers = self._spread_providers(request.task, providers, spread_index)
         last_exception = None
+        last_response = None
+
+        if self._should_hedge(request.task) and len(providers) >= 2:
+            response, last_response, last_exception = await self._generate_hedged(
+                request, providers[0], providers[1]
+            )
+            if response is not None:
+                return response
+            providers = providers[2:]
 
         for provider_name in providers:
-            adapter = self.adapters.get(provider_name)
-            if not adapter or not adapter.is_available():
-                continue
+            if time_remaining(request) == 0:
+                break
+            adapter = self.adapters[provider_name]
             try:
-                response = await adapter.generate_response(request)
-                # Track cost
-                self.cost_tracker.add_cost(provider_name, response.cost, request.task)
-                return response
+                response = await self._call_with_retries(provider_name, adapter, request)
+            except DeadlineExceeded as e:
+                last_exception = e
+                logger.warning(f"Giving up on {request.task.value} request: {e}")
+                break
+            except (AdmissionTimeout, CircuitOpenError) as e:
+                last_exception = e
+                logger.warning(f"Skipping provider {provider_name}: {e}")
+                continue
             except Exception as e:
                 last_exception = e
                 logger.warning(f"Provider {provider_name} failed: {e}")
+                continue
+
+            if not response.error:
+                return response
+            last_response = response
+            logger.warning(f"Provider {provider_name} failed, trying next provider: {response.error}")
 
-        # If all fail, raise
+        # Surface the last provider error to callers that check AIResponse.error
+        if last_response is not None:
+            return last_response
+        if time_remaining(request) == 0:
+            return AIResponse(
+                content="",
+                provider="none",
+                task=request.task,
+                cost=0.0,
+                tokens_used=0,
+                processing_time=0.0,
+                error=str(last_exception) if isinstance(last_exception, DeadlineExceeded) else "Deadline exceeded"
+            )
         raise Exception(f"All AI providers failed for task {request.task}") from last_exception
 
+    async def stream_response(self, request: AIRequest) -> AsyncIterator[AIStreamEvent]:
+        """Stream an AI response token by token.
+
+        Fails over to the next provider only until the first token has been
+        sent; the last event carries the complete AIResponse in ``final``.
+        """
+        last_exception = None
+
+        for provider_name in self._get_optimal_providers(request.task):
+            if time_remaining(request) == 0:
+                last_exception = DeadlineExceeded(f"Deadline passed before streaming {request.task.value}")
+                break
+            adapter = self.adapters.get(provider_name)
+            if not adapter or not self.health_prober.is_available(provider_name):
+                continue
+            if not self._within_cost_limit(provider_name):
+                continue
+            breaker = self.circuit_breakers[provider_name]
+            if not breaker.allow_request():
+                continue
+
+            controller = self.admission[provider_name]
+            provider_request, trimmed = self._fit_request(adapter, request)
+            count = getattr(adapter, "count_tokens", approximate_tokens)
+            estimated_tokens = estimate_request_tokens(provider_request, adapter.max_tokens, count)
+            start_time = time.time()
+            parts: List[str] = []
+            try:
+                async with controller.slot(provider_request, estimated_tokens) as ticket:
+                    stream = self._iter_adapter_stream(adapter, provider_request)
+                    try:
+                        while True:
+                            delta = await self._next_delta(stream, provider_request)
+                            if delta is None:
+                                break
+                            parts.append(delta)
+                            yield AIStreamEvent(delta=delta, provider=provider_name)
+                    finally:
+                        await stream.aclose()
+                    content = "".join(parts)
+                    tokens_used = count(provider_request.prompt) + count(content)
+                    ticket["tokens_used"] = tokens_used or estimated_tokens
+            except AdmissionTimeout as e:
+                breaker.record_ignored()
+                last_exception = e
+                continue
+            except DeadlineExceeded:
+                breaker.record_ignored()
+                self.routing.record(provider_name, request.task, time.time() - start_time, False)
+                raise
+            except Exception as e:
+                breaker.record_failure()
+                self.routing.record(provider_name, request.task, time.time() - start_time, False)
+                if isinstance(e, ProviderUnreachable):
+                    self.health_prober.mark_unavailable(provider_name, str(e))
+                last_exception = e
+                logger.warning(f"Streaming from provider {provider_name} failed: {e}")
+                if parts:
+                    raise  # Tokens already sent; cannot switch providers mid-response
+                continue
+            except BaseException:
+                breaker.record_ignored()
+                raise
+
+            breaker.record_success()
+            processing_time = time.time() - start_time
+            self.latencies[provider_name].append(processing_time)
+            calculate_cost = getattr(adapter, "calculate_cost", None)
+            cost = calculate_cost(tokens_used) if calculate_cost else 0.0
+            self.routing.record(provider_name, request.task, processing_time, True, cost)
+            self.cost_tracker.add_cost(
+                provider_name, cost, request.task,
+                tokens_used=tokens_used,
+                processing_time=processing_time,
+                model=self._model_name(adapter)
+            )
+            metadata = {"streamed": True}
+            if trimmed:
+                metadata["prompt_budget"] = trimmed
+
+            yield AIStreamEvent(
+                delta="",
+                provider=provider_name,
+                final=AIResponse(
+                    content=content,
+                    provider=provider_name,
+                    task=request.task,
+                    cost=cost,
+                    tokens_used=tokens_used,
+                    processing_time=processing_time,
+                    metadata=metadata
+                )
+            )
+            return
+
+        if isinstance(last_exception, DeadlineExceeded):
+            raise last_exception
+        raise Exception(f"All AI providers failed to stream task {request.task}") from last_exception
+
+    @staticmethod
+    async def _next_delta(stream: AsyncIterator[str], request: AIRequest) -> Optional[str]:
+        """Next streamed delta, or None at the end; raises DeadlineExceeded past the request deadline"""
+        try:
+            return await asyncio.wait_for(stream.__anext__(), timeout=time_remaining(request))
+        except StopAsyncIteration:
+            return None
+        except asyncio.TimeoutError as e:
+            if time_remaining(request) != 0:
+                raise
+            raise DeadlineExceeded(f"Deadline exceeded while streaming {request.task.value}") from e
+
+    @staticmethod
+    async def _iter_adapter_stream(adapter: Any, request: AIRequest) -> AsyncIterator[str]:
+        """Use the adapter's stream_response, or its full response for adapters without one"""
+        stream = getattr(adapter, "stream_response", None)
+        if stream is not None:
+            async for delta in stream(request):
+                yield delta
+            return
+        response = await adapter.generate_response(request)
+        if response.error:
+            raise RuntimeError(response.error)
+        yield response.content
+
+    def _should_hedge(self, task: AITask) -> bool:
+        task_name = task.value if hasattr(task, "value") else str(task)
+        return settings.ai_hedging_enabled and TASK_HEDGING_POLICY.get(task_name, False)
+
+    def _hedge_delay(self, provider_name: str) -> float:
+        """Observed p90 latency of the provider, or a default until enough samples exist"""
+        samples = sorted(self.latencies.get(provider_name, ()))
+        if len(samples) < settings.ai_hedge_min_samples:
+            return settings.ai_hedge_default_delay
+        p90 = samples[int(0.9 * (len(samples) - 1))]
+        return max(settings.ai_hedge_min_delay, p90)
+
+    async def _generate_hedged(self, request: AIRequest, primary: str, backup: str):
+        """Race the primary provider against a delayed backup and keep the first success.
+
+        Returns (winning_response, last_error_response, last_exception); the
+        winner is None when both providers failed.
+        """
+        last_response = None
+        last_exception = None
+
+        tasks = {
+            asyncio.create_task(self._call_with_retries(primary, self.adapters[primary], request)): primary
+        }
+        done, _ = await asyncio.wait(tasks.keys(), timeout=self._hedge_delay(primary))
+        if not done:
+            logger.info(f"Hedging {request.task.value} request: {primary} slower than p90, adding {backup}")
+            tasks[asyncio.create_task(self._call_with_retries(backup, self.adapters[backup], request))] = backup
+        elif not self._failed(next(iter(done))):
+            return next(iter(done)).result(), None, None
+        else:
+            # Primary failed fast: the backup becomes the next regular attempt
+            tasks[asyncio.create_task(self._call_with_retries(backup, self.adapters[backup], request))] = backup
+
+        pending = set(tasks.keys())
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        last_exception = task.exception()
+                        continue
+                    response = task.result()
+                    if response.error:
+                        last_response = response
+                        continue
+                    if len(tasks) > 1:
+                        response.metadata = {**(response.metadata or {}), "hedged": True}
+                    return response, None, None
+        finally:
+            # Cancel the loser; _call_provider charges its estimated cost
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+        return None, last_response, last_exception
+
+    @staticmethod
+    def _failed(task: asyncio.Task) -> bool:
+        return task.exception() is not None or bool(task.result().error)
+
+    async def _call_with_retries(self, provider_name: str, adapter: BaseAIAdapter, request: AIRequest) -> AIResponse:
+        """Call one provider with bounded, jittered retries guarded by its circuit breaker"""
+        breaker = self.circuit_breakers[provider_name]
+        response = None
+        last_exception = None
+
+        for attempt in range(settings.ai_max_retries + 1):
+            if attempt:
+                delay = self._backoff_delay(attempt)
+                remaining = time_remaining(request)
+                if remaining is not None and remaining <= delay:
+                    break  # No time left for another attempt
+                await asyncio.sleep(delay)
+            if not breaker.allow_request():
+                if response is not None:
+                    return response
+                raise CircuitOpenError(f"Circuit for provider {provider_name} is {breaker.state.value}")
+
+            try:
+                response = await self._call_provider(provider_name, adapter, request)
+            except (AdmissionTimeout, DeadlineExceeded):
+                breaker.record_ignored()
+                raise
+            except ProviderUnreachable as e:
+                # Retrying cannot help; skip the provider until a probe finds it up
+                breaker.record_failure()
+                self.health_prober.mark_unavailable(provider_name, str(e))
+                raise
+            except Exception as e:
+                breaker.record_failure()
+                last_exception = e
+                logger.warning(f"Provider {provider_name} attempt {attempt + 1} raised: {e}")
+                continue
+            except BaseException:
+                breaker.record_ignored()
+                raise
+
+            if response.error:
+                breaker.record_failure()
+                logger.warning(f"Provider {provider_name} attempt {attempt + 1} failed: {response.error}")
+                continue
+
+            breaker.record_success()
+            return response
+
+        if response is not None:
+            return response
+        raise last_exception
+
+    async def _call_provider(self, provider_name: str, adapter: BaseAIAdapter, request: AIRequest) -> AIResponse:
+        """Single provider call under admission control, with cost tracking"""
+        controller = self.admission[provider_name]
+        request, trimmed = self._fit_request(adapter, request)
+        count = getattr(adapter, "count_tokens", approximate_tokens)
+        estimated_tokens = estimate_request_tokens(request, adapter.max_tokens, count)
+        if time_remaining(request) == 0:
+            raise DeadlineExceeded(f"Deadline passed before calling provider {provider_name}")
+        async with controller.slot(request, estimated_tokens) as ticket:
+            start_time = time.time()
+            try:
+                # Past the deadline the call is cancelled, which closes the
+                # provider connection (local models stop generating)
+                response = await asyncio.wait_for(adapter.generate_response(request), timeout=time_remaining(request))
+            except asyncio.CancelledError:
+                # Cancelled mid-flight (e.g. a losing hedge): the provider has
+                # already been sent the prompt, so account for it
+                self._charge_abandoned(provider_name, adapter, request, count)
+                raise
+            except asyncio.TimeoutError as e:
+                self.routing.record(provider_name, request.task, time.time() - start_time, False)
+                if time_remaining(request) != 0:
+                    raise
+                self._charge_abandoned(provider_name, adapter, request, count)
+                raise DeadlineExceeded(f"Deadline exceeded waiting for provider {provider_name}") from e
+            except Exception:
+                self.routing.record(provider_name, request.task, time.time() - start_time, False)
+                raise
+            ticket["tokens_used"] = response.tokens_used or estimated_tokens
+        if trimmed:
+            response.metadata = {**(response.metadata or {}), "prompt_budget": trimmed}
+        self.cost_tracker.add_cost(
+            provider_name, response.cost, request.task,
+            tokens_used=response.tokens_used,
+            processing_time=response.processing_time,
+            success=not response.error,
+            model=(response.metadata or {}).get("model") or self._model_name(adapter)
+        )
+        self.routing.record(provider_name, request.task, response.processing_time, not response.error, response.cost)
+        if not response.error:
+            self.latencies[provider_name].append(response.processing_time)
+        return response
+
+    def _charge_abandoned(self, provider_name: str, adapter: BaseAIAdapter, request: AIRequest, count):
+        """Record the prompt cost of a call abandoned after the prompt was sent"""
+        calculate_cost = getattr(adapter, "calculate_cost", None)
+        if calculate_cost is not None:
+            prompt_tokens = count(request.prompt)
+            self.cost_tracker.add_cost(
+                provider_name, calculate_cost(prompt_tokens), request.task,
+                tokens_used=prompt_tokens, success=False, model=self._model_name(adapter)
+            )
+
+    def _within_cost_limit(self, provider_name: str) -> bool:
+        """Once today's spend across all workers hits the daily limit, only free providers are used"""
+        if not settings.cost_optimization_enabled or self.cost_tracker.is_under_daily_limit():
+            return True
+        return getattr(self.adapters[provider_name], "cost_per_1k_tokens", 0.0) == 0.0
+
+    @staticmethod
+    def _model_name(adapter: Any) -> str:
+        """Model identifier for cost records"""
+        model = getattr(adapter, "model_name", None) or getattr(adapter, "model", None)
+        return model if isinstance(model, str) else getattr(adapter, "provider_name", "unknown")
+
+    @staticmethod
+    def _fit_request(adapter: Any, request: AIRequest):
+        """Render a sectioned prompt to fit the adapter's context window.
+
+        Returns the request to send and a summary of what was trimmed (or None).
+        """
+        if not request.sections:
+            return request, None
+        count = getattr(adapter, "count_tokens", approximate_tokens)
+        context_window = getattr(adapter, "context_window", None)
+        if context_window is None:
+            return dataclasses.replace(request, sections=None), None
+
+        budget = prompt_budget(context_window, request.max_tokens or adapter.max_tokens)
+        fitted = fit_sections(request.sections, budget, count)
+        fitted_request = dataclasses.replace(request, prompt=fitted.prompt, sections=None)
+        if not fitted.was_trimmed:
+            return fitted_request, None
+        return fitted_request, {
+            "budget": fitted.budget,
+            "tokens": fitted.tokens,
+            "trimmed": fitted.trimmed,
+            "dropped_items": fitted.dropped_items,
+            "dropped_ids": fitted.dropped_ids
+        }
+
+    def prompt_budget_for(self, task: AITask, max_tokens: Optional[int] = None) -> Optional[int]:
+        """The smallest prompt budget among the providers that may serve ``task``.
+
+        A prompt fitted to this budget reaches every provider intact, so callers
+        can split work up front instead of having sections trimmed in flight.
+        None when no candidate provider declares a context window.
+        """
+        budgets = []
+        for name in self._get_optimal_providers(task):
+            if not self.health_prober.is_available(name):
+                continue
+            adapter = self.adapters[name]
+            context_window = getattr(adapter, "context_window", None)
+            if context_window is not None:
+                budgets.append(prompt_budget(context_window, max_tokens or adapter.max_tokens))
+        return min(budgets) if budgets else None
+
+    def _backoff_delay(self, attempt: int) -> float:
+        """Exponential backoff with full jitter"""
+        ceiling = min(settings.ai_retry_backoff_max, settings.ai_retry_backoff_base * (2 ** (attempt - 1)))
+        return random.uniform(0, ceiling)
+
     def _get_optimal_providers(self, task: AITask) -> List[str]:
-        """Return ordered list of provider names based on feature mapping"""
-        provider_order = getattr(settings, "FEATURE_PROVIDER_MAP", {})
+        """Return ordered provider names, chosen by the routing engine's objective"""
+        static_order, eligible = self._static_providers(task)
+        return self.routing.rank(task, static_order, eligible)
+
+    def _static_providers(self, task: AITask):
+        """The task's FEATURE_PROVIDER_MAP entry then the remaining adapters, and
+        the subset that declares support for the task (the ones routing may reorder)"""
         task_name = task.value if hasattr(task, "value") else str(task)
-        return provider_order.get(task_name, list(self.adapters.keys()))
+        preferred = [
+            provider.value if isinstance(provider, AIProvider) else provider
+            for provider in FEATURE_PROVIDER_MAP.get(task_name, [])
+        ]
+        ordered = [name for name in preferred if name in self.adapters]
+        ordered += [name for name in self.adapters if name not in ordered]
+        eligible = [
+            name for name in ordered
+            if name in preferred or task_name in getattr(self.adapters[name], "supported_features", [])
+        ]
+        return ordered, eligible
+
+    def get_routing_table(self) -> Dict[str, Any]:
+        """Live per-task provider order and latency/error/cost measurements"""
+        return self.routing.get_table(list(AITask), self._static_providers)
+
+    @staticmethod
+    def _spread_providers(task: AITask, providers: List[str], spread_index: int) -> List[str]:
+        """Rotate the task's preferred providers so parallel sub-requests (e.g. ranking
+        shards) share the load; the fallback providers keep their place at the end"""
+        preferred = {
+            provider.value if isinstance(provider, AIProvider) else provider
+            for provider in FEATURE_PROVIDER_MAP.get(task.value, [])
+        }
+        count = 0
+        while count < len(providers) and providers[count] in preferred:
+            count += 1
+        if count < 2:
+            return providers
+        offset = spread_index % count
+        return providers[offset:count] + providers[:offset] + providers[count:]
 
     def get_provider_status(self) -> Dict[str, Dict[str, Any]]:
-        """Return availability status of all AI adapters"""
+        """Return cached availability status of all AI adapters"""
         status = {}
+        for name in self.adapters:
+            cached = self.health_prober.status.get(name, {})
+            status[name] = {
+                "available": self.health_prober.is_available(name),
+                "last_checked": cached.get("last_checked"),
+                "circuit": self.circuit_breakers[name].get_status()
+            }
+        return status
+
+    def get_readiness(self) -> Dict[str, Dict[str, bool]]:
+        """Return liveness (available), readiness (warmed up) and whether a warm-up is running per adapter.
+
+        Only a running warm-up, for at most ai_warmup_timeout, counts as
+        warming up: lazily loaded adapters that were never warmed up, or
+        whose warm-up failed or stalled, load on their first call instead.
+        """
+        now = time.monotonic()
+        readiness = {}
         for name, adapter in self.adapters.items():
+            available = self.health_prober.is_available(name)
+            is_ready = getattr(adapter, "is_ready", None)
             try:
-                available = adapter.is_available()
+                ready = available and (is_ready() if is_ready else True)
             except Exception:
-                available = False
-            status[name] = {"available": available}
-        return status
+                ready = False
+            started = self._warming.get(name)
+            warming_up = (
+                available and not ready and started is not None
+                and now - started < settings.ai_warmup_timeout
+            )
+            readiness[name] = {"available": available, "ready": ready, "warming_up": warming_up}
+        return readiness
+
+    def get_admission_metrics(self) -> Dict[str, Dict[str, Any]]:
+        """Return queue depth, in-flight and wait-time metrics per provider"""
+        return {name: controller.get_metrics() for name, controller in self.admission.items()}
 
     def get_cost_summary(self) -> Dict[str, float]:
         """Return cost usage summary"""
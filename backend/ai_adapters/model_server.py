@@ -0,0 +1,184 @@
+"""
+Local model server for SMART Connect
+Single process that owns the Hugging Face model and serves every API worker over a Unix socket
+
+Usage:
+    python -m backend.ai_adapters.model_server --socket /run/smart_connect/hf.sock
+
+Point the API workers at it with HF_MODEL_SERVER_SOCKET. The protocol is one
+JSON object per line: the client sends {"op": ..., "request": {...}} and reads
+one reply line ("generate", "status") or a series of {"delta": ...} lines
+closed by {"done": true} ("stream"). Failures are replied as {"error": ...}.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+from dataclasses import asdict
+from typing import Dict, Any, Optional
+
+from .base import AIRequest, AIResponse, AITask
+from .huggingface_adapter import HuggingFaceAdapter
+from backend.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Prompts with embedded context can be far larger than asyncio's 64 KiB line default
+STREAM_LIMIT = 16 * 1024 * 1024
+
+
+def request_from_dict(data: Dict[str, Any]) -> AIRequest:
+    return AIRequest(**{**data, "task": AITask(data["task"])})
+
+
+class ModelServer:
+    """Serve one HuggingFaceAdapter to many API worker processes.
+
+    Requests from all connections go through the adapter's micro-batcher, so
+    concurrent prompts from different workers share forward passes. Once
+    ``max_pending`` requests are in flight new ones are rejected straight away
+    and the caller fails over instead of queueing behind a saturated model.
+    """
+
+    def __init__(self, adapter: HuggingFaceAdapter, socket_path: str, max_pending: Optional[int] = None):
+        self.adapter = adapter
+        self.socket_path = socket_path
+        self.max_pending = max_pending or settings.hf_server_max_pending
+        self.pending = 0
+        self.rejected = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._warmup_task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)  # Stale socket from a previous run
+        self._server = await asyncio.start_unix_server(
+            self._handle_connection,
+            path=self.socket_path,
+            limit=STREAM_LIMIT
+        )
+        self._warmup_task = asyncio.create_task(self.adapter.warm_up())
+        logger.info(f"Model server listening on {self.socket_path}")
+
+    async def serve_forever(self):
+        await self.start()
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.stop()
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            line = await reader.readline()
+            if not line:
+                return
+            message = json.loads(line)
+            op = message.get("op")
+
+            if op == "status":
+                await self._send(writer, self.get_status())
+            elif op in ("generate", "stream"):
+                if self.pending >= self.max_pending:
+                    self.rejected += 1
+                    await self._send(writer, {"error": "Model server overloaded", "overloaded": True})
+                    return
+                request = request_from_dict(message["request"])
+                self.pending += 1
+                try:
+                    if op == "generate":
+                        response = await self._generate(request, reader)
+                        await self._send(writer, {"response": asdict(response)})
+                    else:
+                        await self._stream(request, writer)
+                finally:
+                    self.pending -= 1
+            else:
+                await self._send(writer, {"error": f"Unknown operation: {op}"})
+        except (ConnectionError, asyncio.IncompleteReadError):
+            logger.debug("Model server client disconnected")
+        except Exception as e:
+            logger.error(f"Model server request failed: {e}")
+            try:
+                await self._send(writer, {"error": str(e)})
+            except ConnectionError:
+                pass
+        finally:
+            writer.close()
+
+    async def _generate(self, request: AIRequest, reader: asyncio.StreamReader) -> AIResponse:
+        """Generate a response, abandoning it if the client disconnects first"""
+        generation = asyncio.create_task(self.adapter.generate_response(request))
+        # The client sends nothing after its request line, so a read returns only at EOF
+        disconnected = asyncio.create_task(reader.read(1))
+        try:
+            await asyncio.wait({generation, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+            if not generation.done():
+                raise ConnectionError("Client disconnected before the response was ready")
+            return generation.result()
+        finally:
+            disconnected.cancel()
+            generation.cancel()
+
+    async def _stream(self, request: AIRequest, writer: asyncio.StreamWriter):
+        stream = self.adapter.stream_response(request)
+        try:
+            async for delta in stream:
+                # Raises ConnectionError once the API worker has gone away, ending generation
+                await self._send(writer, {"delta": delta})
+        except ConnectionError:
+            raise
+        except Exception as e:
+            await self._send(writer, {"error": str(e)})
+            return
+        finally:
+            await stream.aclose()
+        await self._send(writer, {"done": True})
+
+    async def _send(self, writer: asyncio.StreamWriter, payload: Dict[str, Any]):
+        writer.write(json.dumps(payload).encode() + b"\n")
+        await writer.drain()
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "available": self.adapter.is_available(),
+            "ready": self.adapter.is_ready(),
+            "pending": self.pending,
+            "max_pending": self.max_pending,
+            "rejected": self.rejected,
+            "info": self.adapter.get_provider_info()
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the local Hugging Face model to SMART Connect API workers")
+    parser.add_argument("--socket", default=settings.hf_model_server_socket or "/tmp/smart_connect_hf.sock")
+    parser.add_argument("--max-pending", type=int, default=settings.hf_server_max_pending)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    adapter = HuggingFaceAdapter({
+        "model": settings.huggingface_model,
+        "device": settings.hf_device,
+        "backend": settings.hf_inference_backend,
+        "num_threads": settings.hf_num_threads,
+        "max_length": 512,
+        "temperature": 0.7
+    })
+    server = ModelServer(adapter, args.socket, args.max_pending)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
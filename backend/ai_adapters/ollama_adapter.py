@@ -4,11 +4,11 @@ Free local AI models with no API costs
 """
 import asyncio
 import time
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, AsyncIterator
 import httpx
 import json
 
-from backend.ai_adapters.base import BaseAIAdapter, AIRequest, AIResponse, AITask
+from backend.ai_adapters.base import BaseAIAdapter, AIRequest, AIResponse, AITask, ProviderUnreachable
 
 from backend.core.config import settings
 
@@ -25,6 +25,16 @@ class OllamaAdapter(BaseAIAdapter):
         self.model = config.get("model", "llama2")
         self.default_temperature = config.get("temperature", 0.7)
         self.timeout = config.get("timeout", 120)
+        self.health_timeout = config.get("health_timeout", settings.ai_health_probe_timeout)
+        
+        self._client: Optional[httpx.AsyncClient] = None
+        self._available = False  # Cached by check_availability()
+    
+    def _get_client(self) -> httpx.AsyncClient:
+        """Return the shared keep-alive client, creating it on first use"""
+        if self._client is None or self._client.is_closed:
+            self._client = self._create_http_client(base_url=self.base_url, timeout=self.timeout)
+        return self._client
     
     async def generate_response(self, request: AIRequest) -> AIResponse:
         """Generate response using Ollama local model"""
@@ -32,32 +42,23 @@ class OllamaAdapter(BaseAIAdapter):
         
         try:
             # Prepare the request
-            prompt = self._build_prompt(request)
-            
-            payload = {
-                "model": self.model,
-                "prompt": prompt,
-                "stream": False,
-                "options": {
-                    "temperature": request.temperature or self.default_temperature,
-                    "num_predict": request.max_tokens or self.max_tokens
-                }
-            }
+            payload = self._build_payload(request, stream=False)
             
-            # Make request to local Ollama server
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(
-                    f"{self.base_url}/api/generate",
-                    json=payload
-                )
-                response.raise_for_status()
-                result = response.json()
+            # Make request to local Ollama server over the pooled connection
+            response = await self._get_client().post(
+                "/api/generate", json=payload, timeout=self.request_timeout(request, self.timeout)
+            )
+            response.raise_for_status()
+            result = response.json()
             
             # Extract response data
             content = result.get("response", "")
             
-            # Estimate tokens (Ollama doesn't provide exact counts)
-            estimated_tokens = len(content.split()) * 1.3
+            # Ollama reports prompt and completion token counts; estimate if missing
+            if "eval_count" in result:
+                estimated_tokens = result.get("prompt_eval_count", 0) + result["eval_count"]
+            else:
+                estimated_tokens = self.count_tokens(payload["prompt"]) + self.count_tokens(content)
             cost = 0.0  # Free!
             processing_time = time.time() - start_time
             
@@ -76,9 +77,12 @@ class OllamaAdapter(BaseAIAdapter):
                 }
             )
             
-        except httpx.ConnectError:
+        except httpx.ConnectError as e:
             error_msg = f"Cannot connect to Ollama server at {self.base_url}. Make sure Ollama is running."
             logger.error(error_msg)
+            raise ProviderUnreachable(error_msg) from e
+        except httpx.TimeoutException:
+            # The connection is closed on timeout, which also stops Ollama generating
             return AIResponse(
                 content="",
                 provider=self.provider_name,
@@ -86,7 +90,7 @@ class OllamaAdapter(BaseAIAdapter):
                 cost=0.0,
                 tokens_used=0,
                 processing_time=time.time() - start_time,
-                error=error_msg
+                error="Ollama request timed out"
             )
         except Exception as e:
             logger.error(f"Ollama API error: {str(e)}")
@@ -100,15 +104,63 @@ class OllamaAdapter(BaseAIAdapter):
                 error=str(e)
             )
     
+    async def stream_response(self, request: AIRequest) -> AsyncIterator[str]:
+        """Stream tokens from Ollama's newline-delimited JSON response"""
+        payload = self._build_payload(request, stream=True)
+        
+        try:
+            async with self._get_client().stream(
+                "POST", "/api/generate", json=payload, timeout=self.request_timeout(request, self.timeout)
+            ) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    if chunk.get("error"):
+                        raise RuntimeError(chunk["error"])
+                    if chunk.get("response"):
+                        yield chunk["response"]
+                    if chunk.get("done"):
+                        break
+        except httpx.ConnectError as e:
+            raise ProviderUnreachable(f"Cannot connect to Ollama server at {self.base_url}") from e
+    
+    def _build_payload(self, request: AIRequest, stream: bool) -> Dict[str, Any]:
+        """Build the /api/generate request body"""
+        payload = {
+            "model": self.model,
+            "prompt": self._build_prompt(request),
+            "stream": stream,
+            "options": {
+                "temperature": request.temperature or self.default_temperature,
+                "num_predict": request.max_tokens or self.max_tokens,
+                "num_ctx": self.context_window
+            }
+        }
+        if request.json_schema:
+            # Constrain sampling to valid JSON
+            payload["format"] = "json"
+        return payload
+    
     def is_available(self) -> bool:
-        """Check if Ollama server is running"""
+        """Return the cached result of the last availability probe"""
+        return self._available
+    
+    async def check_availability(self) -> bool:
+        """Check if Ollama server is running and cache the result"""
         try:
-            import httpx
-            with httpx.Client(timeout=5) as client:
-                response = client.get(f"{self.base_url}/api/tags")
-                return response.status_code == 200
+            response = await self._get_client().get("/api/tags", timeout=self.health_timeout)
+            self._available = response.status_code == 200
         except Exception:
-            return False
+            self._available = False
+        return self._available
+    
+    async def aclose(self):
+        """Close the pooled HTTP client"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
     
     def _build_prompt(self, request: AIRequest) -> str:
         """Build complete prompt for Ollama"""
@@ -120,7 +172,10 @@ class OllamaAdapter(BaseAIAdapter):
             parts.append(f"Context: {json.dumps(request.context, indent=2)}")
         
         parts.append(f"Request: {request.prompt}")
-        parts.append("Please provide a detailed, structured response:")
+        if request.json_schema:
+            parts.append("Respond with JSON only:")
+        else:
+            parts.append("Please provide a detailed, structured response:")
         
         return "\n\n".join(parts)
     
@@ -4,49 +4,56 @@ OpenAI GPT integration with cost optimization
 """
 import asyncio
 import time
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List, AsyncIterator
 import openai
 from openai import AsyncOpenAI
 
-from backend.ai_adapters.base import BaseAIAdapter, AIRequest, AIResponse, AITask
+from backend.ai_adapters.base import BaseAIAdapter, AIRequest, AIResponse, AITask, time_remaining
 
 from backend.core.config import settings
 
 import logging
 logger = logging.getLogger(__name__)
 
+# Exact token counts for prompt budgeting when tiktoken is installed
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
+# Chat models that accept response_format={"type": "json_object"}
+JSON_MODE_MODELS = ("gpt-4o", "gpt-4-turbo", "gpt-4-1106", "gpt-4-0125", "gpt-3.5-turbo-1106", "gpt-3.5-turbo-0125")
+
 
 class OpenAIAdapter(BaseAIAdapter):
     """OpenAI GPT adapter with cost optimization"""
     
     def __init__(self, api_key: str, config: Dict[str, Any]):
         super().__init__("OpenAI", api_key, config)
-        self.client = AsyncOpenAI(api_key=api_key)
+        # Reuse one keep-alive pool for every request to the API
+        self.client = AsyncOpenAI(api_key=api_key, http_client=self._create_http_client())
         self.model = config.get("model", "gpt-4")
         self.default_temperature = config.get("temperature", 0.7)
+        self._encoding = None
+        if TIKTOKEN_AVAILABLE:
+            try:
+                self._encoding = tiktoken.encoding_for_model(self.model)
+            except KeyError:
+                self._encoding = tiktoken.get_encoding("cl100k_base")
     
     async def generate_response(self, request: AIRequest) -> AIResponse:
         """Generate response using OpenAI"""
         start_time = time.time()
         
         try:
-            # Prepare the request
-            messages = [
-                {"role": "system", "content": self._get_system_prompt(request.task)},
-                {"role": "user", "content": request.prompt}
-            ]
-            
-            # Add context if provided
-            if request.context:
-                context_message = f"Context: {request.context}"
-                messages.insert(1, {"role": "user", "content": context_message})
-            
             # Make API call
             response = await self.client.chat.completions.create(
                 model=self.model,
-                messages=messages,
+                messages=self._build_messages(request),
                 max_tokens=request.max_tokens or self.max_tokens,
-                temperature=request.temperature or self.default_temperature
+                temperature=request.temperature or self.default_temperature,
+                **self._request_options(request)
             )
             
             # Extract response data
@@ -81,6 +88,50 @@ class OpenAIAdapter(BaseAIAdapter):
                 error=str(e)
             )
     
+    async def stream_response(self, request: AIRequest) -> AsyncIterator[str]:
+        """Stream completion deltas from the chat completions API"""
+        stream = await self.client.chat.completions.create(
+            model=self.model,
+            messages=self._build_messages(request),
+            max_tokens=request.max_tokens or self.max_tokens,
+            temperature=request.temperature or self.default_temperature,
+            stream=True,
+            **self._request_options(request)
+        )
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    
+    def _request_options(self, request: AIRequest) -> Dict[str, Any]:
+        """Per-request API options: JSON mode on models that support it, and the deadline as timeout"""
+        options = {}
+        if request.json_schema and self.model.startswith(JSON_MODE_MODELS):
+            options["response_format"] = {"type": "json_object"}
+        remaining = time_remaining(request)
+        if remaining is not None:
+            options["timeout"] = remaining
+        return options
+    
+    def _build_messages(self, request: AIRequest) -> List[Dict[str, str]]:
+        """Build chat messages for the request"""
+        messages = [
+            {"role": "system", "content": self._get_system_prompt(request.task)},
+            {"role": "user", "content": request.prompt}
+        ]
+        
+        # Add context if provided
+        if request.context:
+            context_message = f"Context: {request.context}"
+            messages.insert(1, {"role": "user", "content": context_message})
+        
+        return messages
+    
+    def count_tokens(self, text: str) -> int:
+        """Count tokens with the model's tiktoken encoding when available"""
+        if self._encoding is None:
+            return super().count_tokens(text)
+        return len(self._encoding.encode(text, disallowed_special=()))
+    
     def is_available(self) -> bool:
         """Check if OpenAI is available"""
         try:
@@ -89,6 +140,10 @@ class OpenAIAdapter(BaseAIAdapter):
         except Exception:
             return False
     
+    async def aclose(self):
+        """Close the underlying HTTP connection pool"""
+        await self.client.close()
+    
     def _get_system_prompt(self, task: AITask) -> str:
         """Get system prompt based on task type"""
         prompts = {
@@ -0,0 +1,172 @@
+"""
+Adaptive provider routing for SMART Connect
+Orders AI providers per task from live latency, error rate and cost measurements
+"""
+import random
+import time
+import logging
+from collections import deque
+from typing import Dict, Any, List, Optional, Tuple
+
+from .base import AITask
+from backend.core.config import settings, TASK_LATENCY_SLO
+
+logger = logging.getLogger(__name__)
+
+ROUTING_OBJECTIVES = ("static", "fastest", "cheapest_under_slo", "weighted")
+
+
+class ProviderTaskStats:
+    """Rolling window of outcomes for one provider on one task"""
+
+    def __init__(self, window_size: int, sample_ttl: float):
+        self.samples: deque = deque(maxlen=window_size)  # (timestamp, latency, success, cost)
+        self.sample_ttl = sample_ttl
+
+    def record(self, latency: float, success: bool, cost: float):
+        self.samples.append((time.monotonic(), latency, success, cost))
+
+    def _recent(self) -> List[Tuple[float, float, bool, float]]:
+        # Old samples expire so a recovered provider is judged on fresh calls
+        cutoff = time.monotonic() - self.sample_ttl
+        return [sample for sample in self.samples if sample[0] >= cutoff]
+
+    def summary(self) -> Dict[str, Any]:
+        recent = self._recent()
+        latencies = sorted(latency for _, latency, success, _ in recent if success)
+        errors = sum(1 for _, _, success, _ in recent if not success)
+        costs = [cost for _, _, success, cost in recent if success]
+        return {
+            "samples": len(recent),
+            "p50": latencies[int(0.5 * (len(latencies) - 1))] if latencies else None,
+            "p95": latencies[int(0.95 * (len(latencies) - 1))] if latencies else None,
+            "error_rate": errors / len(recent) if recent else None,
+            "avg_cost": sum(costs) / len(costs) if costs else None,
+            "last_sample_age": time.monotonic() - recent[-1][0] if recent else None
+        }
+
+
+class RoutingEngine:
+    """
+    Choose the provider order for a task by a configurable objective.
+
+    - ``static``: FEATURE_PROVIDER_MAP order, unchanged
+    - ``fastest``: lowest p50 latency, inflated by the error rate
+    - ``cheapest_under_slo``: cheapest provider whose p95 meets the task's
+      latency SLO and whose error rate is acceptable; the rest by p95
+    - ``weighted``: blend of p95 relative to the SLO, cost and error rate
+
+    Only providers that declare support for the task are reordered; the
+    others keep their static place as last-resort fallbacks. Providers
+    without enough fresh samples follow the measured ones, and with
+    probability ``exploration_rate`` the least recently measured provider
+    is tried first so its numbers stay current.
+    """
+
+    def __init__(
+        self,
+        objective: Optional[str] = None,
+        exploration_rate: Optional[float] = None,
+        min_samples: Optional[int] = None,
+        window_size: Optional[int] = None,
+        sample_ttl: Optional[float] = None
+    ):
+        self.objective = objective or settings.ai_routing_objective
+        if self.objective not in ROUTING_OBJECTIVES:
+            logger.warning(f"Unknown routing objective '{self.objective}', using static")
+            self.objective = "static"
+        self.exploration_rate = exploration_rate if exploration_rate is not None else settings.ai_routing_exploration_rate
+        self.min_samples = min_samples or settings.ai_routing_min_samples
+        self.window_size = window_size or settings.ai_routing_window_size
+        self.sample_ttl = sample_ttl or settings.ai_routing_sample_ttl
+
+        self.stats: Dict[Tuple[str, str], ProviderTaskStats] = {}
+        self.explorations = 0
+
+    def record(self, provider: str, task: AITask, latency: float, success: bool, cost: float = 0.0):
+        key = (provider, task.value)
+        stats = self.stats.get(key)
+        if stats is None:
+            stats = self.stats[key] = ProviderTaskStats(self.window_size, self.sample_ttl)
+        stats.record(latency, success, cost)
+
+    def summary(self, provider: str, task: AITask) -> Dict[str, Any]:
+        stats = self.stats.get((provider, task.value))
+        if stats is None:
+            return {"samples": 0, "p50": None, "p95": None, "error_rate": None, "avg_cost": None, "last_sample_age": None}
+        return stats.summary()
+
+    def rank(self, task: AITask, static_order: List[str], eligible: List[str], explore: bool = True) -> List[str]:
+        """Reorder ``static_order``; only names in ``eligible`` are moved"""
+        if self.objective == "static":
+            return static_order
+
+        candidates = [name for name in static_order if name in eligible]
+        fallbacks = [name for name in static_order if name not in eligible]
+        if len(candidates) < 2:
+            return static_order
+
+        summaries = {name: self.summary(name, task) for name in candidates}
+        measured = [name for name in candidates if summaries[name]["samples"] >= self.min_samples and summaries[name]["p50"] is not None]
+        unmeasured = [name for name in candidates if name not in measured]
+        if not measured:
+            ordered = candidates
+        else:
+            slo = TASK_LATENCY_SLO.get(task.value, settings.ai_routing_default_slo)
+            ordered = self._order(measured, summaries, slo) + unmeasured
+
+        if explore and self.exploration_rate and random.random() < self.exploration_rate:
+            stalest = min(
+                candidates,
+                key=lambda name: (summaries[name]["samples"] >= self.min_samples, -(summaries[name]["last_sample_age"] or float("inf")))
+            )
+            if stalest != ordered[0]:
+                self.explorations += 1
+                ordered = [stalest] + [name for name in ordered if name != stalest]
+
+        return ordered + fallbacks
+
+    def _order(self, names: List[str], summaries: Dict[str, Dict[str, Any]], slo: float) -> List[str]:
+        if self.objective == "fastest":
+            return sorted(names, key=lambda name: summaries[name]["p50"] / max(0.05, 1 - summaries[name]["error_rate"]))
+
+        if self.objective == "cheapest_under_slo":
+            within = [
+                name for name in names
+                if summaries[name]["p95"] <= slo and summaries[name]["error_rate"] <= settings.ai_routing_max_error_rate
+            ]
+            others = [name for name in names if name not in within]
+            return (
+                sorted(within, key=lambda name: (summaries[name]["avg_cost"], summaries[name]["p50"]))
+                + sorted(others, key=lambda name: summaries[name]["p95"])
+            )
+
+        # weighted
+        max_cost = max(settings.max_cost_per_request, 1e-9)
+
+        def score(name: str) -> float:
+            summary = summaries[name]
+            return (
+                settings.ai_routing_latency_weight * summary["p95"] / slo
+                + settings.ai_routing_cost_weight * summary["avg_cost"] / max_cost
+                + settings.ai_routing_error_weight * summary["error_rate"]
+            )
+
+        return sorted(names, key=score)
+
+    def get_table(self, tasks: List[AITask], providers_for_task) -> Dict[str, Any]:
+        """Live routing table: per task, the current order and each provider's measurements"""
+        table = {}
+        for task in tasks:
+            static_order, eligible = providers_for_task(task)
+            table[task.value] = {
+                "slo_seconds": TASK_LATENCY_SLO.get(task.value, settings.ai_routing_default_slo),
+                "order": self.rank(task, static_order, eligible, explore=False),
+                "providers": {name: self.summary(name, task) for name in static_order}
+            }
+        return {
+            "objective": self.objective,
+            "exploration_rate": self.exploration_rate,
+            "explorations": self.explorations,
+            "tasks": table
+        }
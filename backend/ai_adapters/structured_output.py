@@ -0,0 +1,152 @@
+"""
+Structured output parsing for SMART Connect
+Tolerant, incremental JSON parsing of model output that may be wrapped in prose or cut short
+"""
+import json
+import re
+import logging
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+TRAILING_COMMA = re.compile(r",\s*([\]}])")
+MAX_REPAIR_ATTEMPTS = 50
+
+
+def _loads_lenient(text: str) -> Any:
+    """json.loads that also accepts trailing commas"""
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        return json.loads(TRAILING_COMMA.sub(r"\1", text))
+
+
+def parse_json_tolerant(text: str) -> Optional[Any]:
+    """Parse the JSON value in a model response.
+
+    Skips markdown fences and prose around the value, drops trailing commas
+    and closes strings, arrays and objects left open by a truncated response.
+    Returns None if no JSON value can be recovered.
+    """
+    start = min((i for i in (text.find("{"), text.find("[")) if i >= 0), default=-1)
+    if start < 0:
+        return None
+    body = text[start:]
+
+    # Walk the value to find where it ends (or what is left open), remembering
+    # the open containers at each comma as fallback cut points
+    stack: List[str] = []
+    cut_points: List[tuple] = []
+    in_string = escape = False
+    end = None
+    for i, char in enumerate(body):
+        if in_string:
+            if escape:
+                escape = False
+            elif char == "\\":
+                escape = True
+            elif char == '"':
+                in_string = False
+            continue
+        if char == '"':
+            in_string = True
+        elif char in "{[":
+            stack.append("}" if char == "{" else "]")
+        elif char in "}]":
+            if stack:
+                stack.pop()
+            if not stack:
+                end = i + 1
+                break
+        elif char == ",":
+            cut_points.append((i, "".join(reversed(stack))))
+
+    if end is not None:
+        try:
+            return _loads_lenient(body[:end])
+        except json.JSONDecodeError as e:
+            logger.debug(f"Could not parse JSON from model output: {e}")
+            return None
+
+    # Truncated: close what is open, first keeping the partial last element,
+    # then dropping back one element at a time
+    attempts = [body + ('"' if in_string else "") + "".join(reversed(stack))]
+    attempts += [body[:i] + closers for i, closers in reversed(cut_points[-MAX_REPAIR_ATTEMPTS:])]
+    for candidate in attempts:
+        try:
+            return _loads_lenient(candidate)
+        except json.JSONDecodeError:
+            continue
+    logger.debug("Could not recover JSON from truncated model output")
+    return None
+
+
+class IncrementalJSONParser:
+    """
+    Emit the objects of a streamed JSON array as soon as each one closes.
+
+    Works on either a bare array (``[{...}, {...}]``) or an array nested in
+    an object (``{"rankings": [{...}], ...}``): objects at the first depth
+    where an object appears inside an array are emitted. Text before the
+    JSON (prose, code fences) is ignored.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self._position = 0
+        self._stack: List[str] = []   # "{" or "[" for each open container
+        self._in_string = False
+        self._escape = False
+        self._entry_depth: Optional[int] = None
+        self._entry_start: Optional[int] = None
+        self.errors = 0
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """Add streamed text; returns objects completed by it"""
+        self.buffer += chunk
+        completed = []
+
+        while self._position < len(self.buffer):
+            i = self._position
+            char = self.buffer[i]
+            self._position += 1
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            if char == '"':
+                if self._stack:
+                    self._in_string = True
+            elif char in "{[":
+                if char == "{" and self._stack and self._stack[-1] == "[":
+                    if self._entry_depth is None:
+                        self._entry_depth = len(self._stack)
+                    if len(self._stack) == self._entry_depth:
+                        self._entry_start = i
+                self._stack.append(char)
+            elif char in "}]":
+                if not self._stack:
+                    continue
+                self._stack.pop()
+                if char == "}" and self._entry_start is not None and len(self._stack) == self._entry_depth:
+                    text = self.buffer[self._entry_start:i + 1]
+                    self._entry_start = None
+                    try:
+                        value = _loads_lenient(text)
+                    except json.JSONDecodeError:
+                        self.errors += 1
+                        continue
+                    if isinstance(value, dict):
+                        completed.append(value)
+
+        return completed
+
+    def result(self) -> Optional[Any]:
+        """The whole value parsed so far, repaired if the stream was cut short"""
+        return parse_json_tolerant(self.buffer)
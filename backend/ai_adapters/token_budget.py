@@ -0,0 +1,187 @@
+"""
+Prompt token budgeting for SMART Connect
+Counts tokens per provider and trims prompt sections to fit each provider's context window
+"""
+import logging
+import math
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+TokenCounter = Callable[[str], int]
+
+# Tokens kept free for the adapter's system prompt, context line and chat framing
+PROMPT_OVERHEAD_TOKENS = 128
+TRUNCATION_MARKER = "..."
+
+
+def approximate_tokens(text: str) -> int:
+    """Tokenizer-free estimate that errs on the high side.
+
+    BPE tokenizers average ~4 characters per token on English prose, but
+    names, numbers and JSON punctuation tokenize worse; taking the larger of
+    the character and word based estimates keeps those from overflowing.
+    """
+    if not text:
+        return 0
+    return max(math.ceil(len(text) / 4), math.ceil(len(text.split()) * 1.3))
+
+
+def truncate_to_tokens(text: str, max_tokens: int, count: TokenCounter = approximate_tokens) -> str:
+    """Cut text to at most ``max_tokens`` tokens on a word boundary where possible"""
+    if max_tokens <= 0:
+        return ""
+    if count(text) <= max_tokens:
+        return text
+
+    # Binary search on character length works with any tokenizer's counter
+    low, high = 0, len(text)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if count(text[:mid] + TRUNCATION_MARKER) <= max_tokens:
+            low = mid
+        else:
+            high = mid - 1
+
+    cut = text[:low]
+    space = cut.rfind(" ")
+    if space > low * 0.8:
+        cut = cut[:space]
+    return cut.rstrip() + TRUNCATION_MARKER if cut.strip() else ""
+
+
+@dataclass
+class PromptSection:
+    """A named part of a prompt.
+
+    Priority 0 is never trimmed; higher numbers are trimmed first. Sections
+    with ``items`` (one entry per student, resume, ...) either drop items
+    from the end or, with ``shrink_items``, shorten every item evenly.
+    ``item_ids`` (parallel to ``items``) lets the caller learn which items,
+    e.g. which students, were dropped.
+    """
+    name: str
+    text: str = ""
+    priority: int = 0
+    items: Optional[List[str]] = None
+    shrink_items: bool = False
+    separator: str = "\n"
+    item_ids: Optional[List[Any]] = None
+
+    def render(self) -> str:
+        if self.items is None:
+            return self.text
+        if not self.items:
+            return ""
+        body = self.separator.join(self.items)
+        return f"{self.text}\n{body}" if self.text else body
+
+
+@dataclass
+class FittedPrompt:
+    """Result of fitting prompt sections into a token budget"""
+    prompt: str
+    tokens: int
+    budget: int
+    trimmed: Dict[str, int] = field(default_factory=dict)  # section name -> tokens removed
+    dropped_items: Dict[str, int] = field(default_factory=dict)  # section name -> items removed
+    dropped_ids: Dict[str, List[Any]] = field(default_factory=dict)  # section name -> ids of removed items
+
+    @property
+    def was_trimmed(self) -> bool:
+        return bool(self.trimmed)
+
+
+def render_sections(sections: List[PromptSection]) -> str:
+    return "\n\n".join(text for text in (section.render() for section in sections) if text)
+
+
+def fit_sections(sections: List[PromptSection], budget: int, count: TokenCounter = approximate_tokens) -> FittedPrompt:
+    """Render sections into one prompt of at most ``budget`` tokens.
+
+    Lowest-priority sections are trimmed first and only as much as needed;
+    required (priority 0) sections are always kept whole, so the result can
+    still exceed the budget if they alone do.
+    """
+    sections = [
+        PromptSection(
+            s.name, s.text, s.priority,
+            list(s.items) if s.items is not None else None,
+            s.shrink_items, s.separator,
+            list(s.item_ids) if s.item_ids is not None else None
+        )
+        for s in sections
+    ]
+    tokens = {id(section): count(section.render()) for section in sections}
+    total = sum(tokens.values())
+    trimmed: Dict[str, int] = {}
+    dropped: Dict[str, int] = {}
+    dropped_ids: Dict[str, List[Any]] = {}
+
+    for section in sorted(sections, key=lambda s: -s.priority):
+        if total <= budget:
+            break
+        if section.priority <= 0:
+            break
+
+        before = tokens[id(section)]
+        allowed = max(0, before - (total - budget))
+        item_ids = section.item_ids
+        removed_items = _trim_section(section, allowed, count)
+        after = count(section.render())
+
+        tokens[id(section)] = after
+        total += after - before
+        trimmed[section.name] = before - after
+        if removed_items:
+            dropped[section.name] = len(removed_items)
+            if item_ids is not None:
+                removed = set(removed_items)
+                dropped_ids[section.name] = [item_ids[i] for i in removed_items]
+                section.item_ids = [item_id for i, item_id in enumerate(item_ids) if i not in removed]
+
+    if trimmed:
+        logger.info(f"Trimmed prompt to {total}/{budget} tokens: {trimmed}")
+    return FittedPrompt(render_sections(sections), total, budget, trimmed, dropped, dropped_ids)
+
+
+def _trim_section(section: PromptSection, allowed: int, count: TokenCounter) -> List[int]:
+    """Shrink a section in place to ``allowed`` tokens; returns the positions of the items dropped"""
+    if section.items is None:
+        section.text = truncate_to_tokens(section.text, allowed, count)
+        return []
+
+    header = count(section.text) if section.text else 0
+    if allowed <= header:
+        dropped = list(range(len(section.items)))
+        section.items = []
+        return dropped
+
+    if section.shrink_items:
+        share = (allowed - header) // len(section.items) - 1
+        shrunk = [truncate_to_tokens(item, share, count) for item in section.items]
+        section.items = [item for item in shrunk if item]
+        return [i for i, item in enumerate(shrunk) if not item]
+
+    kept: List[str] = []
+    used = header
+    for item in section.items:
+        item_tokens = count(item) + 1  # separator
+        if used + item_tokens > allowed:
+            break
+        kept.append(item)
+        used += item_tokens
+    dropped = list(range(len(kept), len(section.items)))
+    section.items = kept
+    return dropped
+
+
+def prompt_budget(context_window: int, max_output_tokens: int) -> int:
+    """Input tokens available once the completion and adapter framing are reserved.
+
+    The output reservation is capped at half the window so small local
+    models still get room for the prompt.
+    """
+    reserved_output = min(max_output_tokens, context_window // 2)
+    return max(0, context_window - reserved_output - PROMPT_OVERHEAD_TOKENS)
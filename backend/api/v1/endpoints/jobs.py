@@ -0,0 +1,54 @@
+"""
+Background job endpoints for SMART Connect
+Queue submission shared by the ranking and skill endpoints, and job status polling
+"""
+import uuid
+from typing import Dict, Any
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+
+from backend.core.security import get_current_user
+from backend.models.user import User
+from backend.flows.job_queue import ai_job_queue, JobQueueFull
+from backend.api.v1.schemas import AIJobAccepted, AIJobResponse
+
+router = APIRouter(prefix="/jobs", tags=["Background Jobs"])
+
+
+async def submit_job(job_type: str, payload: Dict[str, Any], current_user: User, request: Request) -> AIJobAccepted:
+    """Queue a job, answering 503 with Retry-After when the queue is full"""
+    try:
+        job_id = await ai_job_queue.submit(job_type, payload, created_by=current_user.id)
+    except JobQueueFull as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "30"}
+        )
+    return AIJobAccepted(
+        job_id=str(job_id),
+        status="queued",
+        status_url=str(request.url_for("get_job", job_id=str(job_id)))
+    )
+
+
+async def load_job(job_id: uuid.UUID, current_user: User) -> AIJobResponse:
+    """A job visible to ``current_user``: their own, or any job for admins"""
+    job = await ai_job_queue.get_job(job_id)
+    if job is None or (current_user.role != "Admin" and job["created_by"] != current_user.id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found or expired"
+        )
+    return AIJobResponse(**job)
+
+
+@router.get("/{job_id}", response_model=AIJobResponse)
+async def get_job(
+    job_id: uuid.UUID,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Status of a queued job; ``result`` holds its output once it has succeeded
+    """
+
+    return await load_job(job_id, current_user)
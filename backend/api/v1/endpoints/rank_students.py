@@ -2,22 +2,55 @@
 AI-powered student ranking endpoint for SMART Connect
 Rank students for projects using multiple AI providers
 """
-from typing import List, Optional, Dict, Any
-from fastapi import APIRouter, Depends, HTTPException, status
+import asyncio
+import json
+import time
+import uuid
+from typing import List, Optional, Dict, Any, AsyncIterator, Awaitable
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session, joinedload
 
+from backend.core.config import settings
 from backend.core.database import get_db
 from backend.core.security import get_current_mentor  # Mentors and admins can rank
 from backend.models.user import User
 from backend.models.student import Student
 from backend.models.project import Project
-from backend.ai_adapters.base import AIRequest, AITask
-from backend.ai_adapters.manager import ai_manager
+from backend.ai_adapters.base import AIStreamEvent
+from backend.flows.assignment import (
+    assignment_solver,
+    AssignmentCandidate,
+    ProjectSlot,
+    build_score_matrix,
+    feasibility_mask
+)
+from backend.flows.ranking_engine import ranking_engine, CRITERIA
+from backend.flows.ranking_index import ranking_index, GLOBAL_CONTEXT, program_context, semester_context, project_context
+from backend.flows.ranking_output import RankingStreamParser
+from backend.flows.skill_match_cache import skill_match_cache
+from backend.flows.skill_matrix import skill_matrix
+from backend.flows.rank_students_flow import (
+    student_ranking_flow,
+    StudentProfile,
+    ProjectRequirements,
+    RankingCriteria,
+    ranking_job_payload,
+    skill_ranking_job_payload
+)
 from backend.api.v1.schemas import (
     StudentRankingRequest,
+    LocalRankingRequest,
     StudentRankingResponse,
+    ProjectFitRequest,
+    AIJobAccepted,
+    AIJobResponse,
+    AssignmentRequest,
+    AssignmentResponse,
+    ProjectConstraints,
     ErrorResponse
 )
+from backend.api.v1.endpoints.jobs import submit_job, load_job
 
 router = APIRouter(prefix="/rank-students", tags=["AI Student Ranking"])
 
@@ -25,6 +58,7 @@ router = APIRouter(prefix="/rank-students", tags=["AI Student Ranking"])
 @router.post("/", response_model=StudentRankingResponse)
 async def rank_students_for_project(
     ranking_request: StudentRankingRequest,
+    request: Request,
     current_user: User = Depends(get_current_mentor),
     db: Session = Depends(get_db)
 ):
@@ -47,7 +81,7 @@ async def rank_students_for_project(
             )
         
         # Get project details if project_id is provided
-        project_context = ""
+        project_requirements = None
         if ranking_request.project_id:
             project = db.query(Project).filter(Project.id == ranking_request.project_id).first()
             if not project:
@@ -55,22 +89,7 @@ async def rank_students_for_project(
                     status_code=status.HTTP_404_NOT_FOUND,
                     detail="Project not found"
                 )
-            project_context = f"Project: {project.name}\nDescription: {project.description or 'N/A'}"
-        
-        # Prepare student data for AI
-        student_data = []
-        for student in students:
-            student_info = {
-                "id": student.user_id,
-                "name": student.user.full_name or "N/A",
-                "email": student.user.email,
-                "student_id": student.student_id_number or "N/A",
-                "gpa": float(student.gpa) if student.gpa else None,
-                "program": student.program or "N/A",
-                "skills": student.skills or {},
-                "resume_summary": student.resume_text[:500] if student.resume_text else "No resume available"
-            }
-            student_data.append(student_info)
+            project_requirements = _to_project_requirements(project)
         
         # Prepare ranking criteria
         default_criteria = {
@@ -83,63 +102,29 @@ async def rank_students_for_project(
         criteria = ranking_request.criteria or default_criteria
         limit = ranking_request.limit or 10
         
-        # Create AI prompt
-        prompt = f"""
-        Please rank the following students for {'the specified project' if project_context else 'general capstone program placement'}.
-        
-        {project_context}
-        
-        Ranking Criteria (weights): {criteria}
-        
-        Students to rank:
-        {student_data}
-        
-        Please provide:
-        1. A ranked list of top {limit} students
-        2. For each student, provide:
-           - Rank (1 to {limit})
-           - Student ID and name
-           - Overall score (0-100)
-           - Reasoning for the ranking
-           - Strengths
-           - Areas for improvement
-        3. Summary of ranking methodology used
-        
-        Format the response as a structured analysis that can be easily parsed.
-        """
-        
-        # Create AI request
-        ai_request = AIRequest(
-            task=AITask.STUDENT_RANKING,
-            prompt=prompt,
-            context={
-                "project_id": ranking_request.project_id,
-                "criteria": criteria,
-                "student_count": len(students)
-            },
-            max_tokens=3000,
-            temperature=0.3  # Lower temperature for more consistent rankings
-        )
-        
-        # Get AI response
-        ai_response = await ai_manager.generate_response(ai_request)
+        # The flow shards large cohorts and re-ranks only the shard winners
+        result = await _cancel_on_disconnect(request, student_ranking_flow.rank_students_for_project(
+            [_to_student_profile(student) for student in students],
+            project_requirements,
+            _to_ranking_criteria(criteria),
+            limit,
+            deadline=_request_deadline()
+        ))
         
-        if ai_response.error:
+        if not result["success"]:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"AI ranking failed: {ai_response.error}"
+                detail=f"AI ranking failed: {result['error']}"
             )
         
-        # Parse AI response and create structured result
-        # In a real implementation, you'd parse the AI response more carefully
-        ranked_students = _parse_ranking_response(ai_response.content, student_data[:limit])
-        
+        ai_metadata = result["ai_metadata"]
         return StudentRankingResponse(
-            students=ranked_students,
+            students=result["ranked_students"],
             criteria_used=criteria,
-            ai_provider=ai_response.provider,
-            processing_time=ai_response.processing_time,
-            cost=ai_response.cost
+            ai_provider=ai_metadata["provider"],
+            processing_time=ai_metadata["processing_time"],
+            cost=ai_metadata["cost"],
+            unranked_student_ids=result["unranked_student_ids"]
         )
         
     except HTTPException:
@@ -159,74 +144,53 @@ async def rank_students_by_skills(
     db: Session = Depends(get_db)
 ):
     """
-    Rank students based on specific skills
+    Rank students by cosine similarity of their skills to the required skills
+    (skill_alignment in student_ranking.json). Served from the in-memory skill
+    matrix; use /by-skills/jobs for an AI ranking with reasoning.
     """
     
     try:
-        # Get all approved students with skills
-        students = db.query(Student).options(joinedload(Student.user)).filter(
-            Student.status == "Approved",
-            Student.skills.isnot(None)
-        ).all()
+        start_time = time.perf_counter()
+        if skill_matrix.expired:
+            rows = db.query(Student.user_id, Student.skills).filter(
+                Student.status == "Approved",
+                Student.skills.isnot(None)
+            ).all()
+            skill_matrix.build(rows)
         
-        if not students:
+        if skill_matrix.size == 0:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="No students with skills found"
             )
         
-        # Prepare student data
-        student_data = []
-        for student in students:
-            student_info = {
-                "id": student.user_id,
+        matches = skill_matrix.top_matches(required_skills, limit=limit or 10)
+        students = db.query(Student).options(joinedload(Student.user)).filter(
+            Student.user_id.in_([match["student_id"] for match in matches])
+        ).all()
+        by_id = {student.user_id: student for student in students}
+        
+        ranked_students = []
+        for match in matches:
+            student = by_id.get(match["student_id"])
+            if student is None:
+                continue  # Deleted since the matrix was updated
+            ranked_students.append({
+                **match,
                 "name": student.user.full_name or "N/A",
-                "skills": student.skills or {},
+                "email": student.user.email,
                 "gpa": float(student.gpa) if student.gpa else None,
-                "program": student.program or "N/A"
-            }
-            student_data.append(student_info)
-        
-        # Create AI prompt for skills-based ranking
-        prompt = f"""
-        Rank the following students based on their match with these required skills: {required_skills}
-        
-        Students:
-        {student_data}
-        
-        For each student, analyze:
-        1. How many of the required skills they possess
-        2. The proficiency level in each skill (if available)
-        3. Related or transferable skills
-        4. Overall skill match percentage
-        
-        Provide top {limit} students ranked by skill match, with scores and explanations.
-        """
-        
-        ai_request = AIRequest(
-            task=AITask.SKILL_EXTRACTION,
-            prompt=prompt,
-            context={"required_skills": required_skills},
-            max_tokens=2000,
-            temperature=0.2
-        )
-        
-        ai_response = await ai_manager.generate_response(ai_request)
-        
-        if ai_response.error:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Skill ranking failed: {ai_response.error}"
-            )
-        
-        ranked_students = _parse_ranking_response(ai_response.content, student_data[:limit])
+                "program": student.program,
+                "skill_match_score": match["score"],
+                "all_skills": list((student.skills or {}).keys()) if isinstance(student.skills, dict) else student.skills
+            })
         
         return StudentRankingResponse(
             students=ranked_students,
-            criteria_used={"required_skills": required_skills, "skill_match_weight": 1.0},
-            ai_provider=ai_response.provider,
-            processing_time=ai_response.processing_time,
-            cost=ai_response.cost
+            criteria_used={"required_skills": required_skills, "skill_match_weight": 1.0, "similarity": "cosine"},
+            ai_provider="local",
+            processing_time=time.perf_counter() - start_time,
+            cost=0.0
         )
         
     except HTTPException:
@@ -238,33 +202,641 @@ async def rank_students_by_skills(
         )
 
 
-def _parse_ranking_response(ai_content: str, student_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+@router.post("/local", response_model=StudentRankingResponse)
+async def rank_students_locally(
+    ranking_request: LocalRankingRequest,
+    current_user: User = Depends(get_current_mentor),
+    db: Session = Depends(get_db)
+):
+    """
+    Rank students with the weighted-score engine from student_ranking.json.
+    No provider is called, so the ranking is deterministic, free and fast
+    enough for interactive use on large cohorts.
+    """
+    
+    cohort = _local_cohort(db)
+    project_requirements = _local_requirements(db, ranking_request)
+    
+    result = ranking_engine.rank(
+        cohort,
+        project_requirements,
+        _to_ranking_criteria(ranking_request.criteria),
+        ranking_request.limit or 10
+    )
+    return StudentRankingResponse(
+        students=result["ranked_students"],
+        criteria_used=result["weights"],
+        ai_provider="local",
+        processing_time=result["processing_time"],
+        cost=0.0
+    )
+
+
+@router.post("/local/reweight", response_model=StudentRankingResponse)
+async def reweight_local_ranking(
+    ranking_request: LocalRankingRequest,
+    current_user: User = Depends(get_current_mentor),
+    db: Session = Depends(get_db)
+):
     """
-    Parse AI ranking response into structured format
-    This is a simplified parser - in production, you'd want more robust parsing
+    What-if re-ranking for criteria weight tuning. The per-student,
+    per-criterion scores for the project are computed once and cached, so
+    each weight change is one matrix-vector product and a top-k selection
+    instead of a new AI ranking.
     """
     
-    # For now, return the student data with mock ranking scores
-    # In a real implementation, you'd parse the AI response
+    cohort = _local_cohort(db)
+    project_requirements = _local_requirements(db, ranking_request)
+    
+    result = ranking_engine.reweight(
+        cohort,
+        project_requirements.required_skills,
+        project_requirements.program_preferences,
+        _to_ranking_criteria(ranking_request.criteria),
+        ranking_request.limit or 10
+    )
+    return StudentRankingResponse(
+        students=result["ranked_students"],
+        criteria_used={**result["weights"], "components_cached": result["components_cached"]},
+        ai_provider="local",
+        processing_time=result["processing_time"],
+        cost=0.0
+    )
+
+
+@router.get("/projects/{project_id}/matches", response_model=StudentRankingResponse)
+async def get_project_skill_matches(
+    project_id: int,
+    limit: int = Query(10, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    current_user: User = Depends(get_current_mentor)
+):
+    """
+    Students ranked by skill match to a project's required and preferred
+    skills, served from skill_matching_cache (computed on first use and
+    recomputed when students or the project change)
+    """
+    
+    start_time = time.perf_counter()
+    matches = await skill_match_cache.rank_project(project_id, limit, offset)
+    if matches is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Project not found"
+        )
+    
+    return StudentRankingResponse(
+        students=matches,
+        criteria_used={"project_id": project_id, "skill_match_weight": 1.0, "similarity": "cosine"},
+        ai_provider="local",
+        processing_time=time.perf_counter() - start_time,
+        cost=0.0
+    )
+
+
+@router.get("/standings", response_model=StudentRankingResponse)
+async def get_standings(
+    program: Optional[str] = Query(None, description="Rank within one program"),
+    semester: Optional[str] = Query(None, description="Rank within one registration term, e.g. Fall 2024"),
+    project_id: Optional[int] = Query(None, description="Rank against a project's required skills"),
+    limit: int = Query(10, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    current_user: User = Depends(get_current_mentor),
+    db: Session = Depends(get_db)
+):
+    """
+    Top students from the maintained ranking index (local weighted scores,
+    default weights). Saving a student moves only that student, so pages
+    are read without re-ranking.
+    """
+    
+    start_time = time.perf_counter()
+    context = await _standings_context(db, program, semester, project_id)
+    entries = ranking_index.top(context, limit, offset)
+    student_ids = [student_id for student_id, _ in entries]
+    students = {
+        student.user_id: student
+        for student in db.query(Student).options(joinedload(Student.user)).filter(
+            Student.user_id.in_(student_ids)
+        ).all()
+    }
+    standings = ranking_index.standings(context, student_ids)
+    
     ranked_students = []
+    for student_id in student_ids:
+        student, standing = students.get(student_id), standings.get(student_id)
+        if student is None or standing is None:
+            continue
+        ranked_students.append({
+            "rank": standing["rank"],
+            "student_id": student_id,
+            "name": student.user.full_name or "N/A",
+            "email": student.user.email,
+            "gpa": float(student.gpa) if student.gpa else None,
+            "program": student.program,
+            "score": standing["score"],
+            "tier": standing["tier"],
+            "percentile": standing["percentile"]
+        })
     
-    for i, student in enumerate(student_data):
-        ranked_student = {
-            "rank": i + 1,
-            "student_id": student.get("id"),
-            "name": student.get("name"),
-            "email": student.get("email"),
-            "gpa": student.get("gpa"),
-            "program": student.get("program"),
-            "skills": student.get("skills", {}),
-            "score": 95 - (i * 3),  # Mock scoring
-            "reasoning": "AI analysis based on profile match",
-            "strengths": ["Strong technical skills", "Good academic performance"],
-            "areas_for_improvement": ["Could improve soft skills", "More project experience needed"]
-        }
-        ranked_students.append(ranked_student)
+    return StudentRankingResponse(
+        students=ranked_students,
+        criteria_used={"context": context, **dict(zip(CRITERIA, ranking_engine.criteria_weights(None).round(4).tolist()))},
+        ai_provider="local",
+        processing_time=time.perf_counter() - start_time,
+        cost=0.0
+    )
+
+
+@router.get("/standings/batch", response_model=Dict[int, Dict[str, Any]])
+async def get_standings_batch(
+    student_ids: List[int] = Query(..., description="A page of students, e.g. from GET /students/"),
+    program: Optional[str] = Query(None),
+    semester: Optional[str] = Query(None),
+    project_id: Optional[int] = Query(None),
+    current_user: User = Depends(get_current_mentor),
+    db: Session = Depends(get_db)
+):
+    """
+    Rank, percentile and tier of many students in one call; students not
+    ranked in the context are left out
+    """
+    
+    context = await _standings_context(db, program, semester, project_id)
+    return ranking_index.standings(context, student_ids)
+
+
+@router.get("/standings/{student_id}")
+async def get_student_standing(
+    student_id: int,
+    program: Optional[str] = Query(None),
+    semester: Optional[str] = Query(None),
+    project_id: Optional[int] = Query(None),
+    current_user: User = Depends(get_current_mentor),
+    db: Session = Depends(get_db)
+):
+    """
+    One student's rank, score, percentile and tier in the maintained ranking index
+    """
+    
+    context = await _standings_context(db, program, semester, project_id)
+    standing = ranking_index.standing(context, student_id)
+    if standing is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Student is not ranked in this context"
+        )
+    return standing
+
+
+@router.post("/assignments", response_model=AssignmentResponse)
+async def assign_students_to_projects(
+    assignment_request: AssignmentRequest,
+    current_user: User = Depends(get_current_mentor),
+    db: Session = Depends(get_db)
+):
+    """
+    Propose a global assignment of approved students to projects that
+    maximizes total skill match within each project's team size and hard
+    constraints (GPA floor, programs, excluded pairs, locked students).
+    Nothing is saved; re-solving after small changes starts from the
+    previous solution.
+    """
+    
+    projects_query = db.query(Project)
+    if assignment_request.project_ids:
+        projects_query = projects_query.filter(Project.id.in_(assignment_request.project_ids))
+    else:
+        projects_query = projects_query.filter(Project.status == "Not Assigned")
+    projects = projects_query.order_by(Project.id).all()
+    if not projects:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No projects to assign"
+        )
+    
+    students = db.query(Student).options(joinedload(Student.user)).filter(
+        Student.status == "Approved"
+    ).order_by(Student.user_id).all()
+    if not students:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No approved students found"
+        )
+    
+    slots = []
+    for project in projects:
+        constraints = assignment_request.constraints.get(project.id) or ProjectConstraints()
+        capacity = constraints.capacity if constraints.capacity is not None else (project.max_students or 1)
+        # Locked students take their seats before the solve
+        capacity -= sum(1 for project_id in assignment_request.locked.values() if project_id == project.id)
+        slots.append(ProjectSlot(
+            id=project.id,
+            name=project.name,
+            capacity=max(0, capacity),
+            required_skills=list(project.required_skills or []),
+            preferred_skills=list(project.preferred_skills or []),
+            min_gpa=constraints.min_gpa,
+            programs=constraints.programs
+        ))
+    candidates = [
+        AssignmentCandidate(
+            id=student.user_id,
+            gpa=float(student.gpa) if student.gpa else None,
+            program=student.program,
+            skills=student.skills or {}
+        )
+        for student in students
+        if student.user_id not in assignment_request.locked
+    ]
+    
+    def solve():
+        scores = build_score_matrix(candidates, slots)
+        feasible = feasibility_mask(candidates, slots)
+        row_of = {candidate.id: row for row, candidate in enumerate(candidates)}
+        column_of = {slot.id: column for column, slot in enumerate(slots)}
+        for pair in assignment_request.excluded_pairs:
+            if len(pair) == 2 and pair[0] in row_of and pair[1] in column_of:
+                feasible[row_of[pair[0]], column_of[pair[1]]] = False
+        return assignment_solver.solve(
+            [candidate.id for candidate in candidates],
+            [slot.id for slot in slots],
+            scores,
+            [slot.capacity for slot in slots],
+            feasible,
+            warm_start=assignment_request.warm_start
+        )
+    
+    result = await asyncio.to_thread(solve)
+    
+    by_id = {student.user_id: student for student in students}
+    teams: Dict[int, List[Dict[str, Any]]] = {slot.id: [] for slot in slots}
+    for student_id, project_id in assignment_request.locked.items():
+        if project_id in teams and student_id in by_id:
+            teams[project_id].append({"student_id": student_id, "name": by_id[student_id].user.full_name, "score": None, "locked": True})
+    for student_id, project_id in result["assignments"].items():
+        teams[project_id].append({
+            "student_id": student_id,
+            "name": by_id[student_id].user.full_name,
+            "score": result["scores"][student_id],
+            "locked": False
+        })
+    
+    assigned_count = len(result["assignments"])
+    return AssignmentResponse(
+        projects=[
+            {
+                "project_id": project.id,
+                "name": project.name,
+                "capacity": slot.capacity + sum(1 for member in teams[project.id] if member["locked"]),
+                "students": teams[project.id]
+            }
+            for project, slot in zip(projects, slots)
+        ],
+        unassigned_students=result["unassigned"],
+        total_score=result["total_score"],
+        average_score=round(result["total_score"] / assigned_count, 2) if assigned_count else 0.0,
+        rounds=result["rounds"],
+        warm_started=result["warm_started"],
+        processing_time=result["processing_time"]
+    )
+
+
+@router.post("/jobs", response_model=AIJobAccepted, status_code=status.HTTP_202_ACCEPTED)
+async def submit_ranking_job(
+    ranking_request: StudentRankingRequest,
+    request: Request,
+    current_user: User = Depends(get_current_mentor),
+    db: Session = Depends(get_db)
+):
+    """
+    Queue a student ranking and return at once; poll the job for the result
+    """
+    
+    students = db.query(Student).options(joinedload(Student.user)).filter(
+        Student.status == "Approved"
+    ).all()
+    
+    if not students:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No approved students found"
+        )
+    
+    project_requirements = None
+    if ranking_request.project_id:
+        project = db.query(Project).filter(Project.id == ranking_request.project_id).first()
+        if not project:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Project not found"
+            )
+        project_requirements = _to_project_requirements(project)
+    
+    payload = ranking_job_payload(
+        [_to_student_profile(student) for student in students],
+        project_requirements,
+        _to_ranking_criteria(ranking_request.criteria),
+        ranking_request.limit or 10
+    )
+    return await submit_job("rank_students", payload, current_user, request)
+
+
+@router.post("/by-skills/jobs", response_model=AIJobAccepted, status_code=status.HTTP_202_ACCEPTED)
+async def submit_skill_ranking_job(
+    required_skills: List[str],
+    request: Request,
+    limit: Optional[int] = 10,
+    current_user: User = Depends(get_current_mentor),
+    db: Session = Depends(get_db)
+):
+    """
+    Queue a skills-based ranking and return at once; poll the job for the result
+    """
+    
+    students = db.query(Student).options(joinedload(Student.user)).filter(
+        Student.status == "Approved",
+        Student.skills.isnot(None)
+    ).all()
+    
+    if not students:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No students with skills found"
+        )
+    
+    payload = skill_ranking_job_payload(
+        [_to_student_profile(student) for student in students],
+        required_skills,
+        None,
+        limit or 10
+    )
+    return await submit_job("rank_students_by_skills", payload, current_user, request)
+
+
+@router.get("/jobs/{job_id}", response_model=AIJobResponse)
+async def get_ranking_job(
+    job_id: uuid.UUID,
+    current_user: User = Depends(get_current_mentor)
+):
+    """
+    Status of a queued ranking; ``result`` holds the ranking once it has succeeded
+    """
+    
+    # Kept for existing clients; same lookup as GET /jobs/{job_id}
+    return await load_job(job_id, current_user)
+
+
+@router.post("/stream")
+async def stream_rank_students(
+    ranking_request: StudentRankingRequest,
+    request: Request,
+    current_user: User = Depends(get_current_mentor),
+    db: Session = Depends(get_db)
+):
+    """
+    Rank students using AI, streaming tokens as Server-Sent Events.
+    Each ranked student is also sent as a ``ranking`` event as soon as its
+    JSON entry is complete and validated. Large cohorts are sharded before
+    the stream starts; only the final ranking of the finalists is streamed.
+    """
+    
+    students = db.query(Student).options(joinedload(Student.user)).filter(
+        Student.status == "Approved"
+    ).all()
+    
+    if not students:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No approved students found"
+        )
+    
+    project_requirements = None
+    if ranking_request.project_id:
+        project = db.query(Project).filter(Project.id == ranking_request.project_id).first()
+        if not project:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Project not found"
+            )
+        project_requirements = _to_project_requirements(project)
+    
+    criteria = _to_ranking_criteria(ranking_request.criteria)
+    limit = ranking_request.limit or 10
+    deadline = _request_deadline()
+    try:
+        finalists, _ = await _cancel_on_disconnect(request, student_ranking_flow.select_ranking_candidates(
+            [_to_student_profile(student) for student in students],
+            project_requirements,
+            criteria,
+            limit,
+            deadline=deadline
+        ))
+    except RuntimeError as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"AI ranking failed: {str(e)}"
+        )
+    
+    events = student_ranking_flow.stream_rank_students_for_project(
+        finalists,
+        project_requirements,
+        criteria,
+        limit,
+        deadline=deadline
+    )
+    return _sse_response(events, RankingStreamParser([profile.id for profile in finalists], limit))
+
+
+@router.post("/fit/stream")
+async def stream_student_project_fit(
+    fit_request: ProjectFitRequest,
+    current_user: User = Depends(get_current_mentor),
+    db: Session = Depends(get_db)
+):
+    """
+    Analyze a student's fit for a project, streaming tokens as Server-Sent Events
+    """
+    
+    student = db.query(Student).options(joinedload(Student.user)).filter(
+        Student.user_id == fit_request.student_id
+    ).first()
+    if not student:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Student not found"
+        )
+    
+    project = db.query(Project).filter(Project.id == fit_request.project_id).first()
+    if not project:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Project not found"
+        )
+    
+    events = student_ranking_flow.stream_student_project_fit(
+        _to_student_profile(student),
+        _to_project_requirements(project),
+        deadline=_request_deadline()
+    )
+    return _sse_response(events)
+
+
+def _request_deadline() -> float:
+    """Deadline for AI calls made while the client waits on the response"""
+    return time.time() + settings.ai_request_deadline
+
+
+async def _cancel_on_disconnect(request: Request, work: Awaitable[Any]) -> Any:
+    """Await ``work``, cancelling it (and the provider call behind it) if the client disconnects"""
+    task = asyncio.ensure_future(work)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=settings.ai_disconnect_poll_interval)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                raise HTTPException(status_code=499, detail="Client closed request")
+    finally:
+        if not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+
+def _local_cohort(db: Session):
+    """The local engine's cached cohort of approved students, rebuilt once expired"""
+    cohort = ranking_engine.get_cohort()
+    if cohort is None:
+        students = db.query(Student).options(joinedload(Student.user)).filter(
+            Student.status == "Approved"
+        ).all()
+        cohort = ranking_engine.set_cohort([_to_student_profile(student) for student in students])
+    
+    if cohort.size == 0:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No approved students found"
+        )
+    return cohort
+
+
+def _local_requirements(db: Session, ranking_request: LocalRankingRequest) -> ProjectRequirements:
+    """Requirements from the request, falling back to the project's required skills"""
+    project_requirements = ProjectRequirements(
+        id=None,
+        name="Ad hoc requirements",
+        description=None,
+        required_skills=ranking_request.required_skills,
+        preferred_gpa=None,
+        program_preferences=ranking_request.program_preferences
+    )
+    if ranking_request.project_id:
+        project = db.query(Project).filter(Project.id == ranking_request.project_id).first()
+        if not project:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Project not found"
+            )
+        project_requirements.id = project.id
+        project_requirements.name = project.name
+        project_requirements.description = project.description
+        if not ranking_request.required_skills:
+            project_requirements.required_skills = list(project.required_skills or [])
+    return project_requirements
+
+
+async def _standings_context(db: Session, program: Optional[str], semester: Optional[str], project_id: Optional[int]) -> str:
+    """Ranking index context for the query, built on first use"""
+    if project_id is not None:
+        if not await asyncio.to_thread(ranking_index.ensure_project, db, project_id):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Project not found"
+            )
+        return project_context(project_id)
+    await asyncio.to_thread(ranking_index.ensure_global, db)
+    if program:
+        return program_context(program)
+    if semester:
+        return semester_context(semester)
+    return GLOBAL_CONTEXT
+
+
+def _to_student_profile(student: Student) -> StudentProfile:
+    """Convert a Student row into the ranking flow's profile"""
+    return StudentProfile(
+        id=student.user_id,
+        name=student.user.full_name or "N/A",
+        email=student.user.email,
+        gpa=float(student.gpa) if student.gpa else None,
+        program=student.program,
+        skills=student.skills or {},
+        resume_text=student.resume_text,
+        student_id_number=student.student_id_number
+    )
+
+
+def _to_project_requirements(project: Project) -> ProjectRequirements:
+    """Convert a Project row into the ranking flow's requirements"""
+    return ProjectRequirements(
+        id=project.id,
+        name=project.name,
+        description=project.description,
+        required_skills=list(project.required_skills or []),
+        preferred_gpa=None,
+        program_preferences=[]
+    )
+
+
+def _to_ranking_criteria(criteria: Optional[Dict[str, Any]]) -> RankingCriteria:
+    """Map request criteria onto RankingCriteria weights; unknown keys become custom criteria"""
+    if not criteria:
+        return RankingCriteria()
+    weight_fields = {"gpa_weight", "skills_match_weight", "program_relevance_weight", "overall_profile_weight"}
+    weights = {key: float(value) for key, value in criteria.items() if key in weight_fields}
+    custom = {key: value for key, value in criteria.items() if key not in weight_fields}
+    return RankingCriteria(**weights, custom_criteria=custom or None)
+
+
+def _sse_event(data: Dict[str, Any], event: Optional[str] = None) -> str:
+    """Format a Server-Sent Event"""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+
+def _sse_response(
+    events: AsyncIterator[AIStreamEvent],
+    ranking_parser: Optional[RankingStreamParser] = None
+) -> StreamingResponse:
+    """Wrap AI stream events as a text/event-stream response.
+    
+    Starlette cancels the response task when the client disconnects, which
+    closes ``events`` and with it the provider stream.
+    """
+    
+    async def event_source():
+        try:
+            async for event in events:
+                if event.final is None:
+                    yield _sse_event({"delta": event.delta, "provider": event.provider})
+                    if ranking_parser is not None:
+                        for entry in ranking_parser.feed(event.delta):
+                            yield _sse_event(entry, event="ranking")
+                else:
+                    yield _sse_event({
+                        "provider": event.final.provider,
+                        "processing_time": event.final.processing_time,
+                        "tokens_used": event.final.tokens_used,
+                        "cost": event.final.cost
+                    }, event="done")
+        except Exception as e:
+            yield _sse_event({"error": str(e)}, event="error")
     
-    return ranked_students
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 @router.get("/criteria", response_model=Dict[str, Any])
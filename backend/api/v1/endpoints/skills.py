@@ -0,0 +1,100 @@
+"""
+Skill endpoints for SMART Connect
+Extract skills from resume text locally and map skill names to their canonical forms
+"""
+import time
+from typing import Dict, List, Optional
+from fastapi import APIRouter, Depends, Query, Request, status
+
+from backend.core.security import get_current_user, get_current_admin
+from backend.core.skill_dictionary import skill_dictionary
+from backend.models.user import User
+from backend.flows.skill_extractor import skill_extractor, skill_extraction_job_payload
+from backend.flows.skill_normalization import skill_normalization_job_payload
+from backend.api.v1.schemas import (
+    SkillExtractionRequest,
+    SkillExtractionResponse,
+    SkillExtractionJobRequest,
+    SkillNormalizationJobRequest,
+    AIJobAccepted
+)
+from backend.api.v1.endpoints.jobs import submit_job
+
+router = APIRouter(prefix="/skills", tags=["Skills"])
+
+
+@router.post("/extract", response_model=SkillExtractionResponse)
+async def extract_skills(
+    extraction_request: SkillExtractionRequest,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Extract skills from resume text with the local extractor (config/skill_extraction.json)
+    """
+    
+    start_time = time.time()
+    text = extraction_request.resume_text
+    if extraction_request.additional_context:
+        text = f"{text}\n\n{extraction_request.additional_context}"
+    result = skill_extractor.extract(text)
+    
+    return SkillExtractionResponse(
+        extracted_skills=result,
+        confidence_scores={skill["name"]: skill["confidence"] for skill in result["skills"]},
+        ai_provider="local",
+        processing_time=time.time() - start_time,
+        cost=0.0
+    )
+
+
+@router.post("/extract/jobs", response_model=AIJobAccepted, status_code=status.HTTP_202_ACCEPTED)
+async def submit_skill_extraction_job(
+    job_request: SkillExtractionJobRequest,
+    request: Request,
+    current_user: User = Depends(get_current_admin)
+):
+    """
+    Queue extraction over stored resumes; poll ``status_url`` for the result
+    """
+    
+    payload = skill_extraction_job_payload(job_request.student_ids, job_request.update_profiles)
+    return await submit_job("extract_skills", payload, current_user, request)
+
+
+@router.get("/canonical", response_model=Dict[str, Optional[str]])
+async def canonical_skill_names(
+    names: List[str] = Query(..., description="Skill names as written, e.g. JS or React.js"),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Canonical name of each skill; null for names that match no known skill or alias
+    """
+    
+    return {name: skill_dictionary.lookup(name) for name in names}
+
+
+@router.get("/suggestions", response_model=Dict[str, Optional[str]])
+async def suggest_skill_names(
+    names: List[str] = Query(..., description="Skill names as written, e.g. Javascrpt"),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Closest canonical name of each skill by spelling similarity, for review; never applied to stored skills
+    """
+    
+    return {name: skill_dictionary.suggest(name) for name in names}
+
+
+@router.post("/normalize/jobs", response_model=AIJobAccepted, status_code=status.HTTP_202_ACCEPTED)
+async def submit_skill_normalization_job(
+    job_request: SkillNormalizationJobRequest,
+    request: Request,
+    current_user: User = Depends(get_current_admin)
+):
+    """
+    Queue a rewrite of all stored student, mentor and project skills under canonical names
+    """
+    
+    payload = skill_normalization_job_payload(job_request.dry_run)
+    return await submit_job("normalize_skills", payload, current_user, request)
+
@@ -2,6 +2,7 @@
 Student endpoints for SMART Connect
 CRUD operations for students
 """
+import asyncio
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session, joinedload
@@ -10,6 +11,10 @@ from backend.core.database import get_db
 from backend.core.security import get_current_user, get_current_admin, get_current_mentor
 from backend.models.user import User
 from backend.models.student import Student
+from backend.flows.ranking_engine import ranking_engine
+from backend.flows.ranking_index import ranking_index, GLOBAL_CONTEXT
+from backend.flows.skill_match_cache import skill_match_cache
+from backend.flows.skill_matrix import skill_matrix
 from backend.api.v1.schemas import (
     StudentCreate,
     StudentUpdate,
@@ -72,6 +77,34 @@ async def get_student(
     return student
 
 
+@router.get("/{student_id}/standing")
+async def get_student_standing(
+    student_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Rank, percentile and tier of a student overall and within their program and semester"""
+    
+    # Students can only view their own standing, mentors and admins can view any
+    if current_user.role == "Student" and current_user.id != student_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    
+    await asyncio.to_thread(ranking_index.ensure_global, db)
+    contexts = [GLOBAL_CONTEXT, *ranking_index.cohorts_of(student_id)]
+    standings = [ranking_index.standing(context, student_id) for context in contexts]
+    standings = [standing for standing in standings if standing is not None]
+    if not standings:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Student is not ranked (only approved students are)"
+        )
+    
+    return {"student_id": student_id, "standings": standings}
+
+
 @router.post("/", response_model=StudentResponse)
 async def create_student(
     student_data: StudentCreate,
@@ -104,6 +137,11 @@ async def create_student(
     db.add(db_student)
     db.commit()
     db.refresh(db_student)
+    skill_matrix.sync_student(db_student.user_id, db_student.skills, db_student.status == "Approved")
+    ranking_index.update_student(db_student)
+    ranking_engine.invalidate()
+    if db_student.status == "Approved" and db_student.skills:
+        skill_match_cache.invalidate_student(db, db_student.user_id, active=True)
     
     return db_student
 
@@ -142,6 +180,13 @@ async def update_student(
     
     db.commit()
     db.refresh(student)
+    skill_matrix.sync_student(student.user_id, student.skills, student.status == "Approved")
+    ranking_index.update_student(student)
+    ranking_engine.invalidate()
+    if "skills" in update_data or "status" in update_data:
+        skill_match_cache.invalidate_student(
+            db, student.user_id, active=student.status == "Approved" and bool(student.skills)
+        )
     
     return student
 
@@ -163,6 +208,10 @@ async def delete_student(
     
     db.delete(student)
     db.commit()
+    skill_matrix.remove(student_id)
+    ranking_index.remove_student(student_id)
+    ranking_engine.invalidate()
+    skill_match_cache.invalidate_student(db, student_id, active=False)
     
     return {
         "message": "Student profile deleted successfully",
@@ -7,6 +7,13 @@ from typing import Optional, List, Dict, Any
 from pydantic import BaseModel, EmailStr, validator
 from enum import Enum
 
+from backend.core.skill_dictionary import skill_dictionary
+
+
+def _canonical_skills(cls, value):
+    """Store skills under canonical names (see core.skill_dictionary)"""
+    return skill_dictionary.normalize_skills(value) if value else value
+
 
 # Enums
 class UserRole(str, Enum):
@@ -88,6 +95,8 @@ class StudentCreate(BaseModel):
     skills: Optional[Dict[str, Any]] = None
     registration_date: Optional[date] = None
 
+    canonical_skills = validator('skills', allow_reuse=True)(_canonical_skills)
+
 
 class StudentUpdate(BaseModel):
     student_id_number: Optional[str] = None
@@ -97,6 +106,8 @@ class StudentUpdate(BaseModel):
     skills: Optional[Dict[str, Any]] = None
     status: Optional[StudentStatus] = None
 
+    canonical_skills = validator('skills', allow_reuse=True)(_canonical_skills)
+
 
 class StudentResponse(BaseModel):
     user_id: int
@@ -118,12 +129,16 @@ class MentorCreate(BaseModel):
     skills: Optional[Dict[str, Any]] = None
     past_projects: Optional[Dict[str, Any]] = None
 
+    canonical_skills = validator('skills', allow_reuse=True)(_canonical_skills)
+
 
 class MentorUpdate(BaseModel):
     skills: Optional[Dict[str, Any]] = None
     past_projects: Optional[Dict[str, Any]] = None
     status: Optional[MentorStatus] = None
 
+    canonical_skills = validator('skills', allow_reuse=True)(_canonical_skills)
+
 
 class MentorResponse(BaseModel):
     user_id: int
@@ -172,6 +187,10 @@ class ProjectCreate(BaseModel):
     company_id: Optional[int] = None
     start_date: Optional[date] = None
     completion_date: Optional[date] = None
+    required_skills: List[str] = []
+    preferred_skills: List[str] = []
+
+    canonical_skills = validator('required_skills', 'preferred_skills', allow_reuse=True)(_canonical_skills)
 
 
 class ProjectUpdate(BaseModel):
@@ -181,6 +200,10 @@ class ProjectUpdate(BaseModel):
     status: Optional[ProjectStatus] = None
     start_date: Optional[date] = None
     completion_date: Optional[date] = None
+    required_skills: Optional[List[str]] = None
+    preferred_skills: Optional[List[str]] = None
+
+    canonical_skills = validator('required_skills', 'preferred_skills', allow_reuse=True)(_canonical_skills)
 
 
 class ProjectResponse(BaseModel):
@@ -191,6 +214,8 @@ class ProjectResponse(BaseModel):
     status: ProjectStatus
     start_date: Optional[date]
     completion_date: Optional[date]
+    required_skills: Optional[List[str]] = None
+    preferred_skills: Optional[List[str]] = None
     company: Optional[CompanyResponse]
     
     class Config:
@@ -276,12 +301,42 @@ class StudentRankingRequest(BaseModel):
     limit: Optional[int] = 10
 
 
+class LocalRankingRequest(StudentRankingRequest):
+    required_skills: List[str] = []
+    program_preferences: List[str] = []
+
+
 class StudentRankingResponse(BaseModel):
     students: List[Dict[str, Any]]
     criteria_used: Dict[str, Any]
     ai_provider: str
     processing_time: float
     cost: float
+    unranked_student_ids: List[int] = []
+
+
+class AIJobAccepted(BaseModel):
+    job_id: str
+    status: str
+    status_url: str
+
+
+class AIJobResponse(BaseModel):
+    job_id: str
+    job_type: str
+    status: str  # queued, running, succeeded, failed
+    attempts: int
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    expires_at: datetime
+
+
+class ProjectFitRequest(BaseModel):
+    student_id: int
+    project_id: int
 
 
 class ProjectMatchingRequest(BaseModel):
@@ -298,6 +353,30 @@ class ProjectMatchingResponse(BaseModel):
     cost: float
 
 
+class ProjectConstraints(BaseModel):
+    capacity: Optional[int] = None        # Defaults to the project's max_students
+    min_gpa: Optional[float] = None
+    programs: List[str] = []              # Empty: any program
+
+
+class AssignmentRequest(BaseModel):
+    project_ids: Optional[List[int]] = None   # Defaults to projects not yet assigned
+    constraints: Dict[int, ProjectConstraints] = {}
+    locked: Dict[int, int] = {}               # student_id -> project_id, kept as is
+    excluded_pairs: List[List[int]] = []      # [student_id, project_id] pairs never assigned
+    warm_start: bool = True
+
+
+class AssignmentResponse(BaseModel):
+    projects: List[Dict[str, Any]]
+    unassigned_students: List[int]
+    total_score: float
+    average_score: float
+    rounds: int
+    warm_started: bool
+    processing_time: float
+
+
 class SkillExtractionRequest(BaseModel):
     resume_text: str
     additional_context: Optional[str] = None
@@ -310,6 +389,15 @@ class SkillExtractionResponse(BaseModel):
     processing_time: float
     cost: float
 
+
+class SkillExtractionJobRequest(BaseModel):
+    student_ids: Optional[List[int]] = None   # Defaults to every student with a resume
+    update_profiles: bool = True              # Add extracted skills missing from Student.skills
+
+
+class SkillNormalizationJobRequest(BaseModel):
+    dry_run: bool = False                     # Count the rows that would change without writing
+
 # Generic base response schema
 class BaseResponse(BaseModel):
     success: bool = True
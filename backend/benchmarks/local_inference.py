@@ -0,0 +1,122 @@
+"""
+Local inference benchmark for SMART Connect
+Compares tokens/sec and resident memory of the Hugging Face adapter backends
+
+Usage:
+    python -m backend.benchmarks.local_inference --backends pytorch int8 onnx --threads 4
+
+Each backend runs in its own process so RSS figures are not polluted by
+models loaded for the other backends.
+"""
+import argparse
+import asyncio
+import multiprocessing
+import queue
+import time
+from typing import Dict, Any, List
+
+PROMPTS = [
+    "Summarize the strengths of a student with Python, SQL and React experience.",
+    "List three capstone project ideas for a data science student.",
+    "Explain what makes a good team for a web development project.",
+    "Describe the skills needed for a machine learning capstone project.",
+]
+
+
+def _rss_mb() -> float:
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    except ImportError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _run_backend(backend: str, model: str, threads: int, requests: int, max_new_tokens: int, results) -> None:
+    from backend.ai_adapters.huggingface_adapter import HuggingFaceAdapter
+
+    adapter = HuggingFaceAdapter({
+        "model": model,
+        "device": -1,
+        "backend": backend,
+        "num_threads": threads,
+        "temperature": 0.7
+    })
+
+    async def run() -> Dict[str, Any]:
+        rss_before = _rss_mb()
+        load_start = time.perf_counter()
+        await adapter.warm_up()
+        if not adapter.is_ready():
+            return {"backend": backend, "error": "model failed to load"}
+        load_time = time.perf_counter() - load_start
+        rss_loaded = _rss_mb()
+
+        generated_tokens = 0
+        start = time.perf_counter()
+        for i in range(requests):
+            prompt = PROMPTS[i % len(PROMPTS)]
+            output = adapter.pipeline(
+                prompt,
+                max_new_tokens=max_new_tokens,
+                do_sample=False,
+                pad_token_id=adapter.tokenizer.eos_token_id,
+                return_full_text=False
+            )
+            generated_tokens += len(adapter.tokenizer.encode(output[0]["generated_text"]))
+        elapsed = time.perf_counter() - start
+
+        return {
+            "backend": backend,
+            "load_time_s": load_time,
+            "tokens_per_sec": generated_tokens / elapsed if elapsed else 0.0,
+            "latency_per_request_s": elapsed / requests,
+            "rss_model_mb": rss_loaded - rss_before,
+            "rss_peak_mb": _rss_mb()
+        }
+
+    results.put(asyncio.run(run()))
+
+
+def benchmark(backends: List[str], model: str, threads: int, requests: int, max_new_tokens: int) -> List[Dict[str, Any]]:
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    rows = []
+    for backend in backends:
+        process = ctx.Process(
+            target=_run_backend,
+            args=(backend, model, threads, requests, max_new_tokens, results)
+        )
+        process.start()
+        process.join()
+        try:
+            rows.append(results.get(timeout=5))
+        except queue.Empty:
+            rows.append({"backend": backend, "error": f"process exited with code {process.exitcode}"})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark local Hugging Face inference backends")
+    parser.add_argument("--backends", nargs="+", default=["pytorch", "int8", "onnx"])
+    parser.add_argument("--model", default="microsoft/DialoGPT-medium")
+    parser.add_argument("--threads", type=int, default=0, help="Intra-op threads (0 = library default)")
+    parser.add_argument("--requests", type=int, default=8)
+    parser.add_argument("--max-new-tokens", type=int, default=64)
+    args = parser.parse_args()
+
+    rows = benchmark(args.backends, args.model, args.threads, args.requests, args.max_new_tokens)
+
+    print(f"{'backend':<10} {'tokens/s':>10} {'s/request':>10} {'load s':>8} {'model MB':>10} {'peak MB':>10}")
+    for row in rows:
+        if "error" in row:
+            print(f"{row['backend']:<10} error: {row['error']}")
+            continue
+        print(
+            f"{row['backend']:<10} {row['tokens_per_sec']:>10.1f} {row['latency_per_request_s']:>10.2f} "
+            f"{row['load_time_s']:>8.1f} {row['rss_model_mb']:>10.0f} {row['rss_peak_mb']:>10.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
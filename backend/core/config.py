@@ -60,10 +60,12 @@ class Settings(BaseSettings):
     openai_model: str = "gpt-4"
     openai_max_tokens: int = 2000
     openai_temperature: float = 0.7
+    openai_context_window: int = 8192
     
     # Google AI Settings
     google_ai_api_key: Optional[str] = None
     google_ai_model: str = "gemini-pro"
+    google_ai_context_window: int = 30720
     
     # Anthropic Settings
     anthropic_api_key: Optional[str] = None
@@ -75,10 +77,110 @@ class Settings(BaseSettings):
     azure_openai_api_version: str = "2024-02-15-preview"
     azure_openai_deployment_name: str = "gpt-4"
     
+    # Local AI Provider Settings
+    ollama_url: str = "http://localhost:11434"
+    ollama_model: str = "llama2"
+    ollama_context_window: int = 4096
+    huggingface_model: str = "microsoft/DialoGPT-medium"
+    hf_device: str = "auto"
+    hf_batch_size: int = 8                   # Max prompts per batched pipeline call
+    hf_batch_wait_ms: float = 10.0           # Max time a prompt waits for batch-mates
+    ai_warmup_on_startup: bool = True        # Load local models in the background at startup
+    ai_warmup_timeout: float = 600.0         # Seconds a running warm-up may hold /ready at 503
+    ai_enable_dummy_adapter: bool = False    # Register the canned-response "xai" adapter (tests only)
+    hf_inference_backend: str = "pytorch"    # pytorch, int8 (dynamic quantization) or onnx
+    hf_num_threads: int = 0                  # Intra-op CPU threads; 0 keeps the library default
+    hf_onnx_model_path: Optional[str] = None # Pre-exported ONNX model dir; exported on load if unset
+    hf_model_server_socket: Optional[str] = None  # Unix socket of the shared model server; in-process model if unset
+    hf_server_max_pending: int = 64          # Requests the model server holds before rejecting new ones
+    hf_server_timeout: float = 120.0         # Seconds an API worker waits for a model server reply
+
+    # AI Provider Connection Settings
+    ai_http_max_connections: int = 20        # Per-adapter connection pool size
+    ai_http_max_keepalive: int = 10          # Idle connections kept open per adapter
+    ai_http_keepalive_expiry: float = 30.0   # Seconds before an idle connection is dropped
+    ai_health_probe_interval: float = 30.0   # Seconds between background availability probes
+    ai_health_probe_timeout: float = 3.0     # Timeout for a single availability probe
+
+    # AI Admission Control (per provider; 0 disables a rate limit)
+    ai_max_concurrency: int = 8              # Default max in-flight requests per provider
+    ai_queue_timeout: float = 30.0           # Max seconds a request waits for a provider slot
+    ollama_max_concurrency: int = 1          # Ollama serializes generation on one model
+    huggingface_max_concurrency: int = 8     # Concurrent requests are micro-batched
+    openai_requests_per_minute: int = 500
+    openai_tokens_per_minute: int = 40000
+    google_ai_requests_per_minute: int = 60
+    google_ai_tokens_per_minute: int = 32000
+
+    # AI Failover Settings
+    ai_max_retries: int = 1                  # Extra attempts per provider before failing over
+    ai_retry_backoff_base: float = 0.5       # Seconds; doubled per attempt with full jitter
+    ai_retry_backoff_max: float = 5.0
+    ai_circuit_failure_rate: float = 0.5     # Failure rate that opens a provider's circuit
+    ai_circuit_window_size: int = 20         # Recent calls considered for the failure rate
+    ai_circuit_min_calls: int = 5            # Calls needed before the circuit can open
+    ai_circuit_open_seconds: float = 30.0    # Cool-down before a half-open trial request
+
+    # AI Request Deadlines
+    ai_request_deadline: float = 55.0        # Seconds an interactive AI request may take (under the proxy's 60s)
+    ai_disconnect_poll_interval: float = 0.5  # Seconds between client-disconnect checks while waiting on AI
+
+    # AI Request Hedging (see TASK_HEDGING_POLICY)
+    ai_hedging_enabled: bool = True
+    ai_hedge_default_delay: float = 2.0      # Seconds before hedging while latency samples are scarce
+    ai_hedge_min_delay: float = 0.25         # Never hedge sooner than this
+    ai_hedge_min_samples: int = 10           # Latency samples needed to trust the observed p90
+
+    # AI Adaptive Routing (see TASK_LATENCY_SLO)
+    ai_routing_objective: str = "weighted"   # static, fastest, cheapest_under_slo or weighted
+    ai_routing_exploration_rate: float = 0.05  # Share of requests sent to the least recently measured provider
+    ai_routing_min_samples: int = 5          # Fresh samples before a provider's numbers are trusted
+    ai_routing_window_size: int = 100        # Samples kept per provider and task
+    ai_routing_sample_ttl: float = 900.0     # Seconds before a sample stops counting
+    ai_routing_default_slo: float = 15.0     # p95 latency target for tasks without an entry
+    ai_routing_max_error_rate: float = 0.2   # Error rate above which a provider misses the SLO
+    ai_routing_latency_weight: float = 0.4   # Weighted objective: p95 relative to the SLO
+    ai_routing_cost_weight: float = 0.2      # Weighted objective: cost relative to max_cost_per_request
+    ai_routing_error_weight: float = 1.0     # Weighted objective: error rate (a failure costs a retry)
+
+    # AI Ranking Settings
+    ranking_shard_size: int = 25             # Students per ranking prompt; larger pools are ranked in shards
+    ranking_max_parallel_shards: int = 8     # Shards ranked concurrently
+
+    # AI Job Queue (background rankings)
+    ai_job_workers: int = 4                  # Jobs run concurrently per API process
+    ai_job_max_queued: int = 200             # Waiting jobs beyond this are rejected with 503
+    ai_job_max_attempts: int = 3             # Attempts per job before it is marked failed
+    ai_job_retry_delay: float = 5.0          # Seconds before the first retry; doubled per attempt
+    ai_job_timeout: float = 600.0            # Max seconds for one attempt
+    ai_job_result_ttl: float = 86400.0       # Seconds a job and its result are kept
+    ai_job_sweep_interval: float = 60.0      # Seconds between expiry/recovery sweeps
+
+    # Local Ranking Engine (config/student_ranking.json)
+    ranking_engine_cache_ttl: float = 300.0  # Seconds the approved-student score arrays are reused
+    ranking_index_ttl: float = 300.0         # Seconds before a ranking index context is rebuilt from the database
+    skill_matrix_ttl: float = 300.0          # Seconds before the skill matrix is rebuilt from the database
+
+    # Skill Matching Cache (skill_matching_cache table)
+    skill_match_cache_ttl: float = 86400.0   # Seconds before a cached match is recomputed anyway
+    skill_match_sweep_interval: float = 300.0  # Seconds between background recomputes of invalid matches
+    skill_match_batch_size: int = 500        # Rows per bulk upsert
+
+    # Student-Project Assignment
+    assignment_epsilon: float = 0.05         # Max score points per student below the optimal assignment
+    assignment_max_rounds: int = 100000      # Auction rounds before giving up
+
+    # Local Skill Extraction (config/skill_extraction.json)
+    skill_extraction_workers: int = 0        # Worker processes for batch extraction; 0 uses every CPU
+    skill_extraction_chunk_size: int = 200   # Resumes handed to a worker at a time
+
     # Cost Optimization Settings
     cost_optimization_enabled: bool = True
     max_cost_per_request: float = 0.50  # Maximum cost per AI request in USD
     daily_cost_limit: float = 100.0     # Daily cost limit in USD
+    ai_cost_history_size: int = 1000    # Recent requests kept in memory per worker
+    ai_cost_flush_interval: float = 15.0  # Seconds between batched writes to ai_cost_tracking
+    ai_cost_retention_days: int = 31    # Days of per-day totals kept in memory
     
     # Rate Limiting
     rate_limit_per_minute: int = 100
@@ -145,4 +247,29 @@ FEATURE_PROVIDER_MAP = {
     "report_generation": [AIProvider.ANTHROPIC, AIProvider.OPENAI],
     "survey_analysis": [AIProvider.GOOGLE, AIProvider.OPENAI],
     "case_study_generation": [AIProvider.OPENAI, AIProvider.ANTHROPIC]
-}
\ No newline at end of file
+}
+
+# Hedging policy per task: interactive tasks may send a backup request when the
+# primary provider is slower than its observed p90; expensive batch tasks never hedge
+TASK_HEDGING_POLICY = {
+    "project_matching": True,
+    "text_analysis": True,
+    "skill_extraction": False,
+    "student_ranking": False,
+    "report_generation": False,
+    "survey_analysis": False,
+    "case_study_generation": False,
+    "code_generation": False
+}
+
+# p95 latency targets (seconds) per task for adaptive routing
+TASK_LATENCY_SLO = {
+    "project_matching": 5.0,
+    "text_analysis": 5.0,
+    "skill_extraction": 10.0,
+    "student_ranking": 30.0,
+    "survey_analysis": 30.0,
+    "report_generation": 60.0,
+    "case_study_generation": 60.0,
+    "code_generation": 30.0
+}
@@ -19,6 +19,7 @@ from ..models.company import Company
 from ..models.survey import Survey, SurveyResponse
 from ..models.user import User
 from ..models.course import Course
+from .skill_dictionary import skill_dictionary
 
 
 class SearchOperator(str, Enum):
@@ -315,6 +316,9 @@ class DataMiningEngine:
             return query
         
         value = self._convert_value(filter_condition.value, filter_condition.data_type)
+        if filter_condition.field.endswith("skills") and isinstance(value, (str, list, dict)):
+            # Skill columns are stored under canonical names
+            value = skill_dictionary.canonical(value) if isinstance(value, str) else skill_dictionary.normalize_skills(value)
         
         if filter_condition.operator == SearchOperator.EQUALS:
             return query.filter(field_attr == value)
@@ -0,0 +1,194 @@
+"""
+Skill dictionary for SMART Connect
+Canonical skill names with an alias table and a trigram index for fuzzy suggestions
+"""
+import json
+import re
+import threading
+from collections import Counter, defaultdict
+from difflib import SequenceMatcher
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+import logging
+logger = logging.getLogger(__name__)
+
+CONFIG_DIR = Path(__file__).resolve().parent.parent / "config"
+EXTRACTION_CONFIG = CONFIG_DIR / "skill_extraction.json"
+ALIASES_CONFIG = CONFIG_DIR / "skill_aliases.json"
+
+MIN_FUZZY_LENGTH = 4      # Shorter names ("C", "Go", "SQL") only match exactly
+MAX_CANDIDATES = 8        # Terms sharing the most trigrams that are scored per lookup
+CACHE_SIZE = 65536        # Lookups remembered before the cache is cleared
+
+_SEPARATORS = re.compile(r"[\s._\-/]+")
+
+
+def skill_key(name: Any) -> str:
+    """Lowercase, whitespace-collapsed comparison key of a skill name"""
+    return " ".join(str(name).lower().split())
+
+
+def _compact(name: str) -> str:
+    """Key used for alias and fuzzy lookup: "React.js", "react js" and "ReactJS" all give "reactjs" """
+    return _SEPARATORS.sub("", name.lower())
+
+
+def _trigrams(compact: str) -> set:
+    padded = f"  {compact} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SkillDictionary:
+    """
+    Map free-form skill names to canonical ones.
+
+    The canonical names are the skills of skill_extraction.json; the alias
+    table (skill_aliases.json) adds spellings such as "JS" or "Postgres".
+    A name is looked up by its compact form (lowercase, separators removed);
+    only these exact and alias matches rewrite skill names. Names with no
+    match keep their own spelling, tidied.
+
+    Near misses are suggestion-only: when
+    ``processing_options.merge_similar_skills`` is on, ``suggest`` looks a
+    name up through a trigram index, scoring the terms sharing the most
+    trigrams with a sequence-similarity ratio; the best one at or above
+    ``similarity_threshold`` is offered. Similar spellings are often
+    different skills ("Java EE" and "Java", "Product" and "Project
+    Management"), so suggestions are never applied to stored data.
+    """
+
+    def __init__(self, extraction_config: Optional[Dict[str, Any]] = None, aliases: Optional[Dict[str, List[str]]] = None):
+        if extraction_config is None:
+            with open(EXTRACTION_CONFIG, encoding="utf-8") as f:
+                extraction_config = json.load(f)
+        if aliases is None:
+            with open(ALIASES_CONFIG, encoding="utf-8") as f:
+                aliases = json.load(f)["aliases"]
+        options = extraction_config.get("processing_options", {})
+        self.fuzzy = options.get("merge_similar_skills", True)
+        self.similarity_threshold = options.get("similarity_threshold", 0.8)
+
+        self.canonical_names: List[str] = []
+        self.category_of: Dict[str, str] = {}
+        for category, definition in extraction_config["categories"].items():
+            for skill in definition["skills"]:
+                if skill not in self.category_of:
+                    self.category_of[skill] = category
+                    self.canonical_names.append(skill)
+
+        self._exact: Dict[str, str] = {}   # Compact name or alias -> canonical name
+        for name in self.canonical_names:
+            self._exact.setdefault(_compact(name), name)
+        for name, spellings in aliases.items():
+            if name not in self.category_of:
+                logger.warning(f"Skill alias table names unknown skill {name!r}")
+                continue
+            for spelling in spellings:
+                self._exact.setdefault(_compact(spelling), name)
+
+        self._terms = [term for term in self._exact if len(term) >= MIN_FUZZY_LENGTH]
+        self._index: Dict[str, List[int]] = defaultdict(list)
+        for term_id, term in enumerate(self._terms):
+            for trigram in _trigrams(term):
+                self._index[trigram].append(term_id)
+
+        self._cache: Dict[str, Optional[str]] = {}
+        self._lock = threading.Lock()
+        self.fuzzy_suggestions = 0
+
+    def lookup(self, name: Any) -> Optional[str]:
+        """Canonical name for ``name`` (exact or alias match), or None if it is not a known skill"""
+        compact = _compact(str(name))
+        return self._exact.get(compact) if compact else None
+
+    def suggest(self, name: Any) -> Optional[str]:
+        """Closest canonical name for an unknown spelling, for review only; None without a close one"""
+        compact = _compact(str(name))
+        if not compact or not self.fuzzy:
+            return None
+        canonical = self._exact.get(compact)
+        if canonical is not None:
+            return canonical
+        try:
+            return self._cache[compact]
+        except KeyError:
+            pass
+        canonical = self._fuzzy(compact)
+        with self._lock:
+            if len(self._cache) >= CACHE_SIZE:
+                self._cache.clear()
+            self._cache[compact] = canonical
+            if canonical is not None:
+                self.fuzzy_suggestions += 1
+        return canonical
+
+    def _fuzzy(self, compact: str) -> Optional[str]:
+        if len(compact) < MIN_FUZZY_LENGTH:
+            return None
+        shared = Counter()
+        for trigram in _trigrams(compact):
+            shared.update(self._index.get(trigram, ()))
+
+        best, best_ratio = None, self.similarity_threshold
+        for term_id, _ in shared.most_common(MAX_CANDIDATES):
+            term = self._terms[term_id]
+            # The ratio can never exceed this, so skip terms of very different length
+            if 2 * min(len(term), len(compact)) / (len(term) + len(compact)) < best_ratio:
+                continue
+            ratio = SequenceMatcher(None, compact, term, autojunk=False).ratio()
+            if ratio >= best_ratio and (best is None or ratio > best_ratio):
+                best, best_ratio = term, ratio
+        return self._exact[best] if best is not None else None
+
+    def canonical(self, name: Any) -> str:
+        """Canonical name of an exact or alias match, or the name itself with whitespace tidied"""
+        return self.lookup(name) or " ".join(str(name).split())
+
+    def canonical_key(self, name: Any) -> str:
+        """Comparison key of the canonical name ("JS" and "javascript " both give "javascript")"""
+        return skill_key(self.canonical(name))
+
+    def normalize_skills(self, skills: Any) -> Any:
+        """Skills (a name -> level dict or a list of names) under canonical names, duplicates merged.
+
+        When two spellings of one skill both carry a numeric level, the higher
+        level is kept; otherwise the first one seen.
+        """
+        if isinstance(skills, dict):
+            merged: Dict[str, Any] = {}
+            keys: Dict[str, str] = {}
+            for name, level in skills.items():
+                canonical = self.canonical(name)
+                if not canonical:
+                    continue
+                existing = keys.get(skill_key(canonical))
+                if existing is None:
+                    keys[skill_key(canonical)] = canonical
+                    merged[canonical] = level
+                elif isinstance(level, (int, float)) and isinstance(merged[existing], (int, float)):
+                    merged[existing] = max(merged[existing], level)
+            return merged
+        if isinstance(skills, (list, tuple)):
+            seen = set()
+            names = []
+            for name in skills:
+                canonical = self.canonical(name)
+                if canonical and skill_key(canonical) not in seen:
+                    seen.add(skill_key(canonical))
+                    names.append(canonical)
+            return names
+        return skills
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "canonical_skills": len(self.canonical_names),
+            "lookup_terms": len(self._exact),
+            "fuzzy_terms": len(self._terms),
+            "cached_suggestions": len(self._cache),
+            "fuzzy_suggestions": self.fuzzy_suggestions
+        }
+
+
+# Global skill dictionary instance
+skill_dictionary = SkillDictionary()
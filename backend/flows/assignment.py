@@ -0,0 +1,346 @@
+"""
+Student-project assignment for SMART Connect
+Capacity-constrained global assignment of students to projects by an epsilon-scaling auction
+"""
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..core.config import settings
+from .skill_match_cache import PREFERRED_SKILL_WEIGHT
+from .skill_matrix import StudentSkillMatrix
+
+import logging
+logger = logging.getLogger(__name__)
+
+INFEASIBLE = -np.inf
+EPSILON_SCALING_FACTOR = 4.0
+
+
+@dataclass
+class ProjectSlot:
+    """A project offered for assignment, with its team size and hard constraints"""
+    id: int
+    name: str
+    capacity: int = 1
+    required_skills: List[str] = field(default_factory=list)
+    preferred_skills: List[str] = field(default_factory=list)
+    min_gpa: Optional[float] = None
+    programs: List[str] = field(default_factory=list)   # Empty: any program
+
+
+@dataclass
+class AssignmentCandidate:
+    """A student offered for assignment"""
+    id: int
+    gpa: Optional[float]
+    program: Optional[str]
+    skills: Dict[str, Any]
+
+
+def build_score_matrix(students: Sequence[AssignmentCandidate], projects: Sequence[ProjectSlot]) -> np.ndarray:
+    """(students, projects) skill alignment scores, 0-100.
+
+    One StudentSkillMatrix holds every student's skills, so each project
+    column is a single cosine-similarity product.
+    """
+    scores = np.zeros((len(students), len(projects)), dtype=np.float64)
+    if not students:
+        return scores
+    matrix = StudentSkillMatrix()
+    matrix.build((student.id, student.skills) for student in students)
+    row_of = {student.id: row for row, student in enumerate(students)}
+
+    for column, project in enumerate(projects):
+        weights = {skill: PREFERRED_SKILL_WEIGHT for skill in project.preferred_skills}
+        weights.update({skill: 1.0 for skill in project.required_skills})
+        if not weights:
+            continue
+        student_ids, similarity = matrix.similarity(list(weights), weights)
+        rows = np.fromiter((row_of[int(student_id)] for student_id in student_ids), dtype=np.int64, count=len(student_ids))
+        scores[rows, column] = np.minimum(similarity, 1.0) * 100
+    return scores
+
+
+def feasibility_mask(students: Sequence[AssignmentCandidate], projects: Sequence[ProjectSlot]) -> np.ndarray:
+    """(students, projects) boolean mask of pairs allowed by each project's GPA floor and programs"""
+    gpa = np.array([student.gpa if student.gpa is not None else np.nan for student in students], dtype=np.float64)
+    programs = np.array([(student.program or "").strip().lower() for student in students], dtype=object)
+    mask = np.ones((len(students), len(projects)), dtype=bool)
+    for column, project in enumerate(projects):
+        if project.min_gpa is not None:
+            mask[:, column] &= np.nan_to_num(gpa, nan=-1.0) >= project.min_gpa
+        if project.programs:
+            allowed = {program.strip().lower() for program in project.programs}
+            mask[:, column] &= np.fromiter((program in allowed for program in programs), dtype=bool, count=len(students))
+    return mask
+
+
+@dataclass
+class _SolverState:
+    """Result of the previous solve, kept for warm starts"""
+    student_ids: np.ndarray
+    project_ids: np.ndarray
+    benefits: np.ndarray
+    capacities: np.ndarray
+    prices: np.ndarray
+    assigned: np.ndarray   # Column per student, -1 if unassigned
+    bids: np.ndarray       # Price each assigned student paid for its slot
+
+
+class AssignmentSolver:
+    """
+    Maximize the total score of a many-to-one student-project assignment.
+
+    Each project has ``capacity`` identical seats; infeasible pairs (hard
+    constraints) are excluded and students may stay unassigned when seats
+    run out. Solved with Bertsekas' auction algorithm, the price-based
+    relative of the Hungarian method: unassigned students all bid at once
+    (one vectorized NumPy round) for their best project at its current price,
+    each project keeps its highest bids up to capacity, and the price of a
+    full project is its lowest accepted bid. Epsilon scaling keeps the
+    number of rounds low; the result is within ``students * epsilon`` of
+    the optimal total.
+
+    The prices and assignment of the last solve are kept. A re-solve with
+    ``warm_start`` reuses them: only students whose scores changed, holders
+    of changed or shrunken projects and students no longer at equilibrium
+    bid again, so small edits settle in a few rounds.
+    """
+
+    def __init__(self, epsilon: Optional[float] = None, max_rounds: Optional[int] = None):
+        self.epsilon = epsilon or settings.assignment_epsilon
+        self.max_rounds = max_rounds or settings.assignment_max_rounds
+        self._state: Optional[_SolverState] = None
+        self._lock = threading.Lock()
+
+    def solve(
+        self,
+        student_ids: Sequence[int],
+        project_ids: Sequence[int],
+        scores: np.ndarray,
+        capacities: Sequence[int],
+        feasible: Optional[np.ndarray] = None,
+        warm_start: bool = True
+    ) -> Dict[str, Any]:
+        """Assign students (rows of ``scores``) to projects (columns)"""
+        start_time = time.perf_counter()
+        student_ids = np.asarray(student_ids, dtype=np.int64)
+        project_ids = np.asarray(project_ids, dtype=np.int64)
+        capacities = np.maximum(np.asarray(capacities, dtype=np.int64), 0)
+        benefits = np.asarray(scores, dtype=np.float64).copy()
+        if feasible is not None:
+            benefits[~feasible] = INFEASIBLE
+        benefits[:, capacities == 0] = INFEASIBLE
+
+        with self._lock:
+            initial = self._warm_state(student_ids, project_ids, benefits, capacities) if warm_start else None
+            prices, assigned, bids, rounds = self._auction(benefits, capacities, initial)
+            self._state = _SolverState(student_ids, project_ids, benefits, capacities, prices, assigned, bids)
+
+        rows = np.flatnonzero(assigned >= 0)
+        total = float(benefits[rows, assigned[rows]].sum()) if len(rows) else 0.0
+        return {
+            "assignments": {int(student_ids[row]): int(project_ids[assigned[row]]) for row in rows},
+            "scores": {int(student_ids[row]): round(float(benefits[row, assigned[row]]), 2) for row in rows},
+            "unassigned": [int(student_id) for student_id in student_ids[assigned < 0]],
+            "total_score": round(total, 2),
+            "rounds": rounds,
+            "warm_started": initial is not None,
+            "processing_time": time.perf_counter() - start_time
+        }
+
+    def _warm_state(
+        self,
+        student_ids: np.ndarray,
+        project_ids: np.ndarray,
+        benefits: np.ndarray,
+        capacities: np.ndarray
+    ) -> Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """Prices, assignment and bids carried over from the last solve, or None"""
+        previous = self._state
+        if previous is None:
+            return None
+
+        previous_column = {int(project_id): column for column, project_id in enumerate(previous.project_ids)}
+        previous_row = {int(student_id): row for row, student_id in enumerate(previous.student_ids)}
+        columns = np.array([previous_column.get(int(project_id), -1) for project_id in project_ids], dtype=np.int64)
+        rows = np.array([previous_row.get(int(student_id), -1) for student_id in student_ids], dtype=np.int64)
+        if not (columns >= 0).any() or not (rows >= 0).any():
+            return None
+
+        n, m = benefits.shape
+        prices = np.zeros(m, dtype=np.float64)
+        kept_columns = np.flatnonzero(columns >= 0)
+        prices[kept_columns] = previous.prices[columns[kept_columns]]
+
+        # Scores that changed for students and projects present in both solves
+        kept_rows = np.flatnonzero(rows >= 0)
+        old = previous.benefits[np.ix_(rows[kept_rows], columns[kept_columns])]
+        new = benefits[np.ix_(kept_rows, kept_columns)]
+        changed = ~((old == new) | (np.isinf(old) & np.isinf(new)))
+        changed_rows = np.zeros(n, dtype=bool)
+        changed_rows[kept_rows] = changed.any(axis=1)
+        changed_columns = np.zeros(m, dtype=bool)
+        changed_columns[kept_columns] = changed.any(axis=0)
+
+        # Previous column -> current column, -1 for removed projects
+        column_map = np.full(len(previous.project_ids), -1, dtype=np.int64)
+        column_map[columns[kept_columns]] = kept_columns
+        assigned = np.full(n, -1, dtype=np.int64)
+        bids = np.zeros(n, dtype=np.float64)
+        held = kept_rows[previous.assigned[rows[kept_rows]] >= 0]
+        assigned[held] = column_map[previous.assigned[rows[held]]]
+        bids[held] = previous.bids[rows[held]]
+
+        release = (assigned >= 0) & (changed_rows | changed_columns[np.maximum(assigned, 0)])
+        assigned[release] = -1
+
+        # Projects now over capacity keep their highest bids
+        self._enforce_capacity(assigned, bids, capacities)
+        self._reprice(prices, assigned, bids, capacities)
+
+        self._release_unsettled(benefits, prices, assigned, bids, capacities, self.epsilon)
+        return prices, assigned, bids
+
+    def _release_unsettled(
+        self,
+        benefits: np.ndarray,
+        prices: np.ndarray,
+        assigned: np.ndarray,
+        bids: np.ndarray,
+        capacities: np.ndarray,
+        epsilon: float
+    ):
+        """Unassign students no longer within ``epsilon`` of their best option.
+
+        Freed seats lower prices, so repeat until no one else is released.
+        """
+        while True:
+            holders = np.flatnonzero(assigned >= 0)
+            if not len(holders):
+                return
+            best = np.maximum((benefits[holders] - prices).max(axis=1), 0.0)
+            current = benefits[holders, assigned[holders]] - prices[assigned[holders]]
+            unsettled = holders[current < best - epsilon]
+            if not len(unsettled):
+                return
+            assigned[unsettled] = -1
+            self._reprice(prices, assigned, bids, capacities)
+
+    @staticmethod
+    def _enforce_capacity(assigned: np.ndarray, bids: np.ndarray, capacities: np.ndarray):
+        holders = np.flatnonzero(assigned >= 0)
+        if not len(holders):
+            return
+        order = np.lexsort((-bids[holders], assigned[holders]))
+        holders = holders[order]
+        columns = assigned[holders]
+        starts = np.searchsorted(columns, columns, side="left")
+        seat = np.arange(len(holders)) - starts
+        assigned[holders[seat >= capacities[columns]]] = -1
+
+    @staticmethod
+    def _reprice(prices: np.ndarray, assigned: np.ndarray, bids: np.ndarray, capacities: np.ndarray):
+        """Price of a full project is its lowest accepted bid; projects with free seats cost 0"""
+        holders = np.flatnonzero(assigned >= 0)
+        counts = np.bincount(assigned[holders], minlength=len(prices))
+        lowest = np.full(len(prices), np.inf)
+        np.minimum.at(lowest, assigned[holders], bids[holders])
+        full = (counts >= capacities) & (capacities > 0)
+        prices[:] = np.where(full, lowest, 0.0)
+
+    def _auction(
+        self,
+        benefits: np.ndarray,
+        capacities: np.ndarray,
+        initial: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]]
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, int]:
+        n, m = benefits.shape
+        if initial is not None:
+            prices, assigned, bids = initial
+            epsilons = [self.epsilon]
+        else:
+            prices = np.zeros(m, dtype=np.float64)
+            assigned = np.full(n, -1, dtype=np.int64)
+            bids = np.zeros(n, dtype=np.float64)
+            finite = benefits[np.isfinite(benefits)]
+            spread = float(finite.max() - min(0.0, finite.min())) if finite.size else 0.0
+            epsilons = []
+            epsilon = max(spread / EPSILON_SCALING_FACTOR, self.epsilon)
+            while epsilon > self.epsilon:
+                epsilons.append(epsilon)
+                epsilon /= EPSILON_SCALING_FACTOR
+            epsilons.append(self.epsilon)
+
+        rounds = 0
+        if n == 0 or m == 0:
+            return prices, assigned, bids, rounds
+
+        for phase, epsilon in enumerate(epsilons):
+            if phase > 0:
+                # Keep the assignment where it still holds at the finer epsilon
+                self._release_unsettled(benefits, prices, assigned, bids, capacities, epsilon)
+            # Students whose best option is staying unassigned stop bidding
+            dropped = np.zeros(n, dtype=bool)
+            while rounds < self.max_rounds:
+                bidders = np.flatnonzero((assigned < 0) & ~dropped)
+                if not len(bidders):
+                    break
+                rounds += 1
+
+                values = benefits[bidders] - prices
+                index = np.arange(len(bidders))
+                best = values.argmax(axis=1)
+                best_value = values[index, best]
+                values[index, best] = INFEASIBLE
+                second_value = values.max(axis=1)
+                # Staying unassigned is worth 0
+                second_value = np.maximum(second_value, 0.0)
+
+                out = ~(best_value >= 0)
+                dropped[bidders[out]] = True
+                bidders, best, best_value, second_value = bidders[~out], best[~out], best_value[~out], second_value[~out]
+                if not len(bidders):
+                    continue
+
+                offers = prices[best] + (best_value - second_value) + epsilon
+
+                # Each project keeps its best offers and current holders up to capacity
+                contested = np.zeros(m, dtype=bool)
+                contested[best] = True
+                holders = np.flatnonzero((assigned >= 0) & contested[np.maximum(assigned, 0)])
+                candidates = np.concatenate([holders, bidders])
+                columns = np.concatenate([assigned[holders], best])
+                amounts = np.concatenate([bids[holders], offers])
+
+                order = np.lexsort((-amounts, columns))
+                candidates, columns, amounts = candidates[order], columns[order], amounts[order]
+                seat = np.arange(len(candidates)) - np.searchsorted(columns, columns, side="left")
+                accepted = seat < capacities[columns]
+
+                assigned[candidates[~accepted]] = -1
+                assigned[candidates[accepted]] = columns[accepted]
+                bids[candidates[accepted]] = amounts[accepted]
+
+                # Only contested projects change price: the last accepted offer (lowest) once full
+                next_accepted = np.append(accepted[1:] & (columns[1:] == columns[:-1]), False)
+                last = np.flatnonzero(accepted & ~next_accepted)
+                filled = seat[last] + 1 >= capacities[columns[last]]
+                prices[columns[last]] = np.where(filled, amounts[last], 0.0)
+            else:
+                logger.warning(f"Assignment auction stopped after {rounds} rounds without converging")
+
+        return prices, assigned, bids, rounds
+
+    def reset(self):
+        """Forget the last solve so the next one starts cold"""
+        with self._lock:
+            self._state = None
+
+
+# Global solver instance (keeps the last solve for warm starts)
+assignment_solver = AssignmentSolver()
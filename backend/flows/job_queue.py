@@ -0,0 +1,321 @@
+"""
+AI job queue for SMART Connect
+Long-running AI tasks run on a bounded worker pool; jobs and results are persisted in ai_jobs for polling
+"""
+import asyncio
+import json
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, List, Optional, Callable, Awaitable, Tuple
+
+from sqlalchemy import update, delete, select, or_
+
+from ..core.config import settings
+from ..core.database import SessionLocal
+from ..models.ai_job import AIJob
+
+import logging
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+
+class JobQueueFull(Exception):
+    """Raised when ``max_queued`` jobs are already waiting"""
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _jsonable(value: Any) -> Any:
+    # Flow results hold dataclass dicts, Decimals and datetimes
+    return json.loads(json.dumps(value, default=str))
+
+
+class AIJobQueue:
+    """
+    Bounded asyncio worker pool for AI jobs.
+
+    ``submit`` persists the job and returns its id straight away, so the HTTP
+    request and its DB session end before the provider is called. Workers
+    claim a job with a conditional UPDATE, which lets several API processes
+    share ai_jobs without running a job twice. A failed attempt is retried
+    with exponential backoff up to ``ai_job_max_attempts``. Jobs left running
+    by a dead worker are requeued by the periodic sweep, which also deletes
+    jobs past ``expires_at``.
+    """
+
+    def __init__(self, workers: Optional[int] = None, max_queued: Optional[int] = None):
+        self.workers = workers or settings.ai_job_workers
+        self.max_queued = max_queued or settings.ai_job_max_queued
+        self.handlers: Dict[str, JobHandler] = {}
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._queued_ids: set = set()
+        self._tasks: List[asyncio.Task] = []
+        self._retry_timers: set = set()
+        self._running = 0
+        self.completed = 0
+        self.failed = 0
+        self.retried = 0
+        self.expired = 0
+
+    def register(self, job_type: str, handler: JobHandler):
+        """Register the coroutine that runs jobs of ``job_type``; it returns the result dict or raises"""
+        self.handlers[job_type] = handler
+
+    async def start(self):
+        """Start the workers and pick up jobs left queued by a previous run"""
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        await self.sweep()
+        self._tasks.append(asyncio.create_task(self._sweep_loop()))
+        logger.info(f"AI job queue started with {self.workers} workers")
+
+    async def stop(self):
+        """Stop the workers; interrupted jobs go back to the queue for the next start"""
+        for timer in self._retry_timers:
+            timer.cancel()
+        self._retry_timers.clear()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+        self._queued_ids.clear()
+
+    async def submit(self, job_type: str, payload: Dict[str, Any], created_by: Optional[int] = None) -> uuid.UUID:
+        """Persist a job and queue it; raises JobQueueFull when too many are waiting"""
+        if job_type not in self.handlers:
+            raise ValueError(f"Unknown job type '{job_type}'")
+        if self._queue is None:
+            raise RuntimeError("AI job queue is not running")
+        if len(self._queued_ids) >= self.max_queued:
+            raise JobQueueFull(f"{len(self._queued_ids)} AI jobs are already waiting")
+
+        job_id = await asyncio.to_thread(self._insert, job_type, _jsonable(payload), created_by)
+        self._enqueue(job_id)
+        return job_id
+
+    async def get_job(self, job_id: uuid.UUID) -> Optional[Dict[str, Any]]:
+        """The job's status and, once finished, its result; None if unknown or expired"""
+        return await asyncio.to_thread(self._load, job_id)
+
+    def _enqueue(self, job_id: uuid.UUID):
+        if self._queue is None or job_id in self._queued_ids:
+            return
+        self._queued_ids.add(job_id)
+        self._queue.put_nowait(job_id)
+
+    def _schedule_retry(self, job_id: uuid.UUID, delay: float):
+        def fire():
+            self._retry_timers.discard(timer)
+            self._enqueue(job_id)
+        timer = asyncio.get_running_loop().call_later(delay, fire)
+        self._retry_timers.add(timer)
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            self._queued_ids.discard(job_id)
+            self._running += 1
+            try:
+                await self._run(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"AI job {job_id} could not be processed: {e}")
+            finally:
+                self._running -= 1
+                self._queue.task_done()
+
+    async def _run(self, job_id: uuid.UUID):
+        claimed = await asyncio.to_thread(self._claim, job_id)
+        if claimed is None:
+            return  # Finished, expired, backing off or taken by another process
+        job_type, payload, attempts = claimed
+
+        try:
+            handler = self.handlers.get(job_type)
+            if handler is None:
+                raise ValueError(f"No handler for job type '{job_type}'")
+            result = await asyncio.wait_for(handler(payload), timeout=settings.ai_job_timeout)
+        except asyncio.CancelledError:
+            # Shutting down: hand the job back without using up an attempt
+            await asyncio.shield(asyncio.to_thread(self._release, job_id, None, 0.0, True))
+            raise
+        except Exception as e:
+            error = str(e) or type(e).__name__
+            if attempts < settings.ai_job_max_attempts:
+                delay = settings.ai_job_retry_delay * 2 ** (attempts - 1)
+                logger.warning(f"AI job {job_id} attempt {attempts} failed, retrying in {delay:.0f}s: {error}")
+                await asyncio.to_thread(self._release, job_id, error, delay)
+                self.retried += 1
+                self._schedule_retry(job_id, delay)
+            else:
+                logger.error(f"AI job {job_id} failed after {attempts} attempts: {error}")
+                await asyncio.to_thread(self._finish, job_id, "failed", None, error)
+                self.failed += 1
+            return
+
+        await asyncio.to_thread(self._finish, job_id, "succeeded", _jsonable(result), None)
+        self.completed += 1
+
+    async def _sweep_loop(self):
+        while True:
+            await asyncio.sleep(settings.ai_job_sweep_interval)
+            await self.sweep()
+
+    async def sweep(self):
+        """Delete expired jobs, requeue stale running ones and queue jobs that are due"""
+        try:
+            expired, due = await asyncio.to_thread(self._sweep_db)
+        except Exception as e:
+            logger.warning(f"AI job sweep failed: {e}")
+            return
+        self.expired += expired
+        for job_id in due:
+            if len(self._queued_ids) >= self.max_queued:
+                break
+            self._enqueue(job_id)
+
+    # Database operations (run in worker threads)
+
+    def _insert(self, job_type: str, payload: Dict[str, Any], created_by: Optional[int]) -> uuid.UUID:
+        db = SessionLocal()
+        try:
+            job = AIJob(
+                job_type=job_type,
+                status="queued",
+                payload=payload,
+                created_by=created_by,
+                expires_at=_now() + timedelta(seconds=settings.ai_job_result_ttl)
+            )
+            db.add(job)
+            db.commit()
+            return job.id
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _claim(self, job_id: uuid.UUID) -> Optional[Tuple[str, Dict[str, Any], int]]:
+        now = _now()
+        db = SessionLocal()
+        try:
+            row = db.execute(
+                update(AIJob)
+                .where(
+                    AIJob.id == job_id,
+                    AIJob.status == "queued",
+                    or_(AIJob.next_attempt_at.is_(None), AIJob.next_attempt_at <= now)
+                )
+                .values(status="running", attempts=AIJob.attempts + 1, started_at=now)
+                .returning(AIJob.job_type, AIJob.payload, AIJob.attempts)
+            ).first()
+            db.commit()
+            return (row.job_type, row.payload, row.attempts) if row else None
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _release(self, job_id: uuid.UUID, error: Optional[str], delay: float, refund: bool = False):
+        values = {"status": "queued", "next_attempt_at": _now() + timedelta(seconds=delay)}
+        if error is not None:
+            values["error"] = error
+        if refund:
+            values["attempts"] = AIJob.attempts - 1
+        self._update(job_id, values)
+
+    def _finish(self, job_id: uuid.UUID, status: str, result: Optional[Dict[str, Any]], error: Optional[str]):
+        now = _now()
+        self._update(job_id, {
+            "status": status,
+            "result": result,
+            "error": error,
+            "finished_at": now,
+            "expires_at": now + timedelta(seconds=settings.ai_job_result_ttl)
+        })
+
+    def _update(self, job_id: uuid.UUID, values: Dict[str, Any]):
+        db = SessionLocal()
+        try:
+            db.execute(update(AIJob).where(AIJob.id == job_id).values(**values))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _load(self, job_id: uuid.UUID) -> Optional[Dict[str, Any]]:
+        db = SessionLocal()
+        try:
+            job = db.get(AIJob, job_id)
+            if job is None or job.expires_at <= _now():
+                return None
+            return {
+                "job_id": str(job.id),
+                "job_type": job.job_type,
+                "status": job.status,
+                "attempts": job.attempts,
+                "created_by": job.created_by,
+                "result": job.result,
+                "error": job.error,
+                "created_at": job.created_at,
+                "started_at": job.started_at,
+                "finished_at": job.finished_at,
+                "expires_at": job.expires_at
+            }
+        finally:
+            db.close()
+
+    def _sweep_db(self) -> Tuple[int, List[uuid.UUID]]:
+        now = _now()
+        # A live worker gives up on an attempt after ai_job_timeout
+        stale = now - timedelta(seconds=2 * settings.ai_job_timeout)
+        db = SessionLocal()
+        try:
+            expired = db.execute(delete(AIJob).where(AIJob.expires_at <= now)).rowcount
+            running_stale = [AIJob.status == "running", AIJob.started_at < stale]
+            db.execute(
+                update(AIJob)
+                .where(*running_stale, AIJob.attempts >= settings.ai_job_max_attempts)
+                .values(status="failed", error="Worker stopped while running the job", finished_at=now)
+            )
+            db.execute(update(AIJob).where(*running_stale).values(status="queued", next_attempt_at=now))
+            due = db.execute(
+                select(AIJob.id)
+                .where(AIJob.status == "queued", or_(AIJob.next_attempt_at.is_(None), AIJob.next_attempt_at <= now))
+                .order_by(AIJob.created_at)
+                .limit(self.max_queued)
+            ).scalars().all()
+            db.commit()
+            return expired, list(due)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "running": self._running,
+            "queued": len(self._queued_ids),
+            "retry_scheduled": len(self._retry_timers),
+            "completed": self.completed,
+            "failed": self.failed,
+            "retried": self.retried,
+            "expired": self.expired
+        }
+
+
+# Global job queue instance
+ai_job_queue = AIJobQueue()
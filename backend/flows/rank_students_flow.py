@@ -3,11 +3,17 @@ Student ranking flow for SMART Connect using Genkit
 Integration with existing Genkit flows for AI-powered student ranking
 """
 import asyncio
-from typing import Dict, Any, List, Optional
-from dataclasses import dataclass
+import time
+from typing import Callable, Dict, Any, List, Optional, AsyncIterator
+from dataclasses import dataclass, asdict
 
-from ..ai_adapters.base import AIRequest, AIResponse, AITask
+from ..ai_adapters.base import AIRequest, AIResponse, AIStreamEvent, AITask
 from ..ai_adapters.manager import ai_manager
+from ..ai_adapters.token_budget import PromptSection, approximate_tokens, fit_sections, render_sections
+from .job_queue import ai_job_queue
+from .ranking_engine import normalize_skill
+from .ranking_output import RANKING_JSON_SCHEMA, parse_ranking, ranking_format_instructions
+from .sharded_ranking import ShardedRanker, extract_ranked_ids
 from ..core.config import settings
 
 import logging
@@ -56,16 +62,19 @@ class StudentRankingFlow:
     
     def __init__(self):
         self.ai_manager = ai_manager
+        self.sharded_ranker = ShardedRanker(self)
     
     async def rank_students_for_project(
         self,
         students: List[StudentProfile],
         project: Optional[ProjectRequirements] = None,
         criteria: Optional[RankingCriteria] = None,
-        limit: int = 10
+        limit: int = 10,
+        deadline: Optional[float] = None
     ) -> Dict[str, Any]:
         """
-        Main flow for ranking students for a project
+        Main flow for ranking students for a project.
+        ``deadline`` (time.time()) bounds every AI call, shard rankings included.
         """
         
         try:
@@ -73,6 +82,11 @@ class StudentRankingFlow:
             if criteria is None:
                 criteria = RankingCriteria()
             
+            # Large pools are narrowed down shard by shard before the final ranking
+            students, sharding = await self.select_ranking_candidates(
+                students, project, criteria, limit, deadline
+            )
+            
             # Prepare context for AI
             context = {
                 "student_count": len(students),
@@ -81,16 +95,19 @@ class StudentRankingFlow:
                 "limit": limit
             }
             
-            # Build comprehensive prompt
-            prompt = self._build_ranking_prompt(students, project, criteria, limit)
+            # Build comprehensive prompt; the manager trims it to each provider's budget
+            sections = self._build_ranking_sections(students, project, criteria, limit)
             
             # Create AI request
             ai_request = AIRequest(
                 task=AITask.STUDENT_RANKING,
-                prompt=prompt,
+                prompt=render_sections(sections),
+                sections=sections,
                 context=context,
                 max_tokens=3000,
-                temperature=0.3
+                temperature=0.3,
+                json_schema=RANKING_JSON_SCHEMA,
+                deadline=deadline
             )
             
             # Get AI response
@@ -104,21 +121,27 @@ class StudentRankingFlow:
                     "ranked_students": []
                 }
             
-            # Process and structure the response
-            ranked_students = await self._process_ranking_response(
+            # Parse the model's ranking and validate it against the candidates
+            ranking = await self._process_ranking_response(
                 ai_response, students, limit
             )
             
             return {
                 "success": True,
-                "ranked_students": ranked_students,
+                "ranked_students": ranking["ranked_students"],
+                "methodology": ranking["methodology"],
                 "criteria_used": criteria.__dict__,
                 "ai_metadata": {
                     "provider": ai_response.provider,
-                    "cost": ai_response.cost,
-                    "processing_time": ai_response.processing_time,
-                    "tokens_used": ai_response.tokens_used
+                    "cost": ai_response.cost + (sharding["cost"] if sharding else 0.0),
+                    "processing_time": ai_response.processing_time + (sharding["processing_time"] if sharding else 0.0),
+                    "tokens_used": ai_response.tokens_used,
+                    "structured_output": ranking["structured"],
+                    "rejected_entries": ranking["rejected"],
+                    "sharding": sharding,
+                    "prompt_budget": _prompt_budget(ai_response)
                 },
+                "unranked_student_ids": _unranked_ids(ai_response),
                 "project_context": project.__dict__ if project else None
             }
             
@@ -135,31 +158,40 @@ class StudentRankingFlow:
         students: List[StudentProfile],
         required_skills: List[str],
         skill_weights: Optional[Dict[str, float]] = None,
-        limit: int = 10
+        limit: int = 10,
+        deadline: Optional[float] = None
     ) -> Dict[str, Any]:
         """
         Flow for ranking students based on specific skills
         """
         
         try:
-            # Prepare skill-focused prompt
-            prompt = self._build_skill_ranking_prompt(
-                students, required_skills, skill_weights, limit
+            # Pools larger than one prompt can hold are narrowed down shard by shard
+            build_sections = self._skill_sections(required_skills, skill_weights)
+            students, sharding = await self._select_candidates(
+                students, build_sections, AITask.SKILL_EXTRACTION, 2500, limit, deadline
             )
             
+            # Prepare skill-focused prompt
+            sections = build_sections(students, limit)
+            
             context = {
                 "ranking_type": "skills_based",
                 "required_skills": required_skills,
                 "skill_weights": skill_weights or {},
-                "student_count": len(students)
+                "student_count": len(students),
+                "limit": limit
             }
             
             ai_request = AIRequest(
                 task=AITask.SKILL_EXTRACTION,
-                prompt=prompt,
+                prompt=render_sections(sections),
+                sections=sections,
                 context=context,
                 max_tokens=2500,
-                temperature=0.2
+                temperature=0.2,
+                json_schema=RANKING_JSON_SCHEMA,
+                deadline=deadline
             )
             
             ai_response = await self.ai_manager.generate_response(ai_request)
@@ -171,20 +203,26 @@ class StudentRankingFlow:
                     "ranked_students": []
                 }
             
-            ranked_students = await self._process_skill_ranking_response(
+            ranking = await self._process_skill_ranking_response(
                 ai_response, students, required_skills, limit
             )
             
             return {
                 "success": True,
-                "ranked_students": ranked_students,
+                "ranked_students": ranking["ranked_students"],
+                "methodology": ranking["methodology"],
                 "ranking_type": "skills_based",
                 "required_skills": required_skills,
                 "ai_metadata": {
                     "provider": ai_response.provider,
-                    "cost": ai_response.cost,
-                    "processing_time": ai_response.processing_time
-                }
+                    "cost": ai_response.cost + (sharding["cost"] if sharding else 0.0),
+                    "processing_time": ai_response.processing_time + (sharding["processing_time"] if sharding else 0.0),
+                    "structured_output": ranking["structured"],
+                    "rejected_entries": ranking["rejected"],
+                    "sharding": sharding,
+                    "prompt_budget": _prompt_budget(ai_response)
+                },
+                "unranked_student_ids": _unranked_ids(ai_response)
             }
             
         except Exception as e:
@@ -198,50 +236,15 @@ class StudentRankingFlow:
     async def analyze_student_project_fit(
         self,
         student: StudentProfile,
-        project: ProjectRequirements
+        project: ProjectRequirements,
+        deadline: Optional[float] = None
     ) -> Dict[str, Any]:
         """
         Analyze how well a specific student fits a specific project
         """
         
         try:
-            prompt = f"""
-            Analyze the fit between this student and project:
-            
-            Student Profile:
-            - Name: {student.name}
-            - GPA: {student.gpa or 'N/A'}
-            - Program: {student.program or 'N/A'}
-            - Skills: {student.skills}
-            - Resume Summary: {student.resume_text[:300] if student.resume_text else 'N/A'}
-            
-            Project Requirements:
-            - Name: {project.name}
-            - Description: {project.description or 'N/A'}
-            - Required Skills: {project.required_skills}
-            - Preferred GPA: {project.preferred_gpa or 'N/A'}
-            - Program Preferences: {project.program_preferences}
-            
-            Provide:
-            1. Overall fit score (0-100)
-            2. Skill match analysis
-            3. Academic fit assessment
-            4. Strengths for this project
-            5. Potential challenges
-            6. Recommendations for improvement
-            """
-            
-            ai_request = AIRequest(
-                task=AITask.PROJECT_MATCHING,
-                prompt=prompt,
-                context={
-                    "student_id": student.id,
-                    "project_id": project.id,
-                    "analysis_type": "individual_fit"
-                },
-                max_tokens=1500,
-                temperature=0.4
-            )
+            ai_request = self._build_fit_request(student, project, deadline)
             
             ai_response = await self.ai_manager.generate_response(ai_request)
             
@@ -270,163 +273,358 @@ class StudentRankingFlow:
                 "error": str(e)
             }
     
-    def _build_ranking_prompt(
+    async def stream_rank_students_for_project(
         self,
         students: List[StudentProfile],
-        project: Optional[ProjectRequirements],
-        criteria: RankingCriteria,
-        limit: int
-    ) -> str:
-        """Build comprehensive ranking prompt"""
-        
-        # Project context
-        project_context = ""
-        if project:
-            project_context = f"""
-            PROJECT DETAILS:
-            Name: {project.name}
-            Description: {project.description or 'N/A'}
-            Required Skills: {project.required_skills}
-            Preferred GPA: {project.preferred_gpa or 'No preference'}
-            Program Preferences: {project.program_preferences}
-            """
+        project: Optional[ProjectRequirements] = None,
+        criteria: Optional[RankingCriteria] = None,
+        limit: int = 10,
+        deadline: Optional[float] = None
+    ) -> AsyncIterator[AIStreamEvent]:
+        """
+        Streaming variant of rank_students_for_project that yields tokens as they are generated.
+        ``students`` are ranked as given: narrow large pools with
+        select_ranking_candidates first, so the stream is validated against the finalists.
+        """
+        if criteria is None:
+            criteria = RankingCriteria()
         
-        # Student data
-        student_data = []
-        for student in students:
-            student_info = f"""
-            ID: {student.id}
-            Name: {student.name}
-            GPA: {student.gpa or 'N/A'}
-            Program: {student.program or 'N/A'}
-            Skills: {student.skills}
-            Resume Summary: {student.resume_text[:200] if student.resume_text else 'No resume'}
-            """
-            student_data.append(student_info)
+        sections = self._build_ranking_sections(students, project, criteria, limit)
+        ai_request = AIRequest(
+            task=AITask.STUDENT_RANKING,
+            prompt=render_sections(sections),
+            sections=sections,
+            context={
+                "student_count": len(students),
+                "project_id": project.id if project else None,
+                "criteria": criteria.__dict__,
+                "limit": limit
+            },
+            max_tokens=3000,
+            temperature=0.3,
+            json_schema=RANKING_JSON_SCHEMA,
+            deadline=deadline
+        )
         
-        # Criteria
-        criteria_text = f"""
-        RANKING CRITERIA:
-        - Academic Performance (GPA): {criteria.gpa_weight * 100}%
-        - Skills Match: {criteria.skills_match_weight * 100}%
-        - Program Relevance: {criteria.program_relevance_weight * 100}%
-        - Overall Profile: {criteria.overall_profile_weight * 100}%
+        async for event in self.ai_manager.stream_response(ai_request):
+            yield event
+    
+    async def stream_student_project_fit(
+        self,
+        student: StudentProfile,
+        project: ProjectRequirements,
+        deadline: Optional[float] = None
+    ) -> AsyncIterator[AIStreamEvent]:
         """
+        Streaming variant of analyze_student_project_fit
+        """
+        async for event in self.ai_manager.stream_response(self._build_fit_request(student, project, deadline)):
+            yield event
+    
+    def _build_fit_request(
+        self,
+        student: StudentProfile,
+        project: ProjectRequirements,
+        deadline: Optional[float] = None
+    ) -> AIRequest:
+        """Build the AI request for a single student/project fit analysis"""
         
-        if criteria.custom_criteria:
-            criteria_text += f"\nCustom Criteria: {criteria.custom_criteria}"
+        sections = [
+            PromptSection("task", "Analyze the fit between this student and project:"),
+            PromptSection("student", "\n".join([
+                "Student Profile:",
+                f"- Name: {student.name}",
+                f"- GPA: {student.gpa or 'N/A'}",
+                f"- Program: {student.program or 'N/A'}",
+                f"- Skills: {student.skills}"
+            ])),
+            PromptSection(
+                "resume",
+                f"Resume Summary: {student.resume_text[:300] if student.resume_text else 'N/A'}",
+                priority=2
+            ),
+            PromptSection("project", "\n".join([
+                "Project Requirements:",
+                f"- Name: {project.name}",
+                f"- Required Skills: {project.required_skills}",
+                f"- Preferred GPA: {project.preferred_gpa or 'N/A'}",
+                f"- Program Preferences: {project.program_preferences}"
+            ])),
+            PromptSection("project_description", f"Project Description: {project.description or 'N/A'}", priority=1),
+            PromptSection("instructions", """Provide:
+1. Overall fit score (0-100)
+2. Skill match analysis
+3. Academic fit assessment
+4. Strengths for this project
+5. Potential challenges
+6. Recommendations for improvement""")
+        ]
         
-        prompt = f"""
-        TASK: Rank students for {'project assignment' if project else 'general capstone program'}.
+        return AIRequest(
+            task=AITask.PROJECT_MATCHING,
+            prompt=render_sections(sections),
+            sections=sections,
+            context={
+                "student_id": student.id,
+                "project_id": project.id,
+                "analysis_type": "individual_fit"
+            },
+            max_tokens=1500,
+            temperature=0.4,
+            deadline=deadline
+        )
+    
+    async def select_ranking_candidates(
+        self,
+        students: List[StudentProfile],
+        project: Optional[ProjectRequirements] = None,
+        criteria: Optional[RankingCriteria] = None,
+        limit: int = 10,
+        deadline: Optional[float] = None
+    ):
+        """The finalists of a project ranking, and sharding stats (or None if the pool fits one prompt)"""
+        if criteria is None:
+            criteria = RankingCriteria()
+        return await self._select_candidates(
+            students, self._project_sections(project, criteria), AITask.STUDENT_RANKING,
+            3000, limit, deadline, project, criteria
+        )
+    
+    async def _select_candidates(
+        self,
+        students: List[StudentProfile],
+        build_sections: Callable[[List[StudentProfile], int], List[PromptSection]],
+        task: AITask,
+        max_tokens: int,
+        limit: int,
+        deadline: Optional[float] = None,
+        project: Optional[ProjectRequirements] = None,
+        criteria: Optional[RankingCriteria] = None
+    ):
+        """The students to put in the final prompt, and sharding stats (or None).
+
+        Pools above the configured shard size, or above what the smallest
+        provider prompt budget holds, are narrowed by the sharded ranker so no
+        candidate is trimmed from the prompt unseen.
+        """
+        capacity = self._prompt_capacity(students, build_sections, task, max_tokens, limit)
+        if not self.sharded_ranker.needs_sharding(students, capacity):
+            return students, None
+        return await self.sharded_ranker.select_finalists(
+            students, project, criteria, limit, deadline,
+            shard_size=capacity, build_sections=build_sections, task=task
+        )
+    
+    def _prompt_capacity(
+        self,
+        students: List[StudentProfile],
+        build_sections: Callable[[List[StudentProfile], int], List[PromptSection]],
+        task: AITask,
+        max_tokens: int,
+        limit: int
+    ) -> Optional[int]:
+        """How many students one prompt holds, or None when the whole pool fits"""
+        budget = self.ai_manager.prompt_budget_for(task, max_tokens)
+        if budget is None or not students:
+            return None
+        sections = build_sections(students, limit)
+        if not fit_sections(sections, budget).dropped_items.get("students"):
+            return None
         
-        {project_context}
+        # Count with the longest entries first so the capacity holds for any shard
+        lengths = {
+            student_id: approximate_tokens(item)
+            for section in sections if section.name == "students"
+            for student_id, item in zip(section.item_ids or [], section.items or [])
+        }
+        longest_first = sorted(students, key=lambda student: lengths.get(student.id, 0), reverse=True)
+        dropped = fit_sections(build_sections(longest_first, limit), budget).dropped_items.get("students", 0)
+        return len(students) - dropped
+    
+    def _project_sections(
+        self,
+        project: Optional[ProjectRequirements],
+        criteria: RankingCriteria
+    ) -> Callable[[List[StudentProfile], int], List[PromptSection]]:
+        return lambda students, limit: self._build_ranking_sections(students, project, criteria, limit)
+    
+    def _skill_sections(
+        self,
+        required_skills: List[str],
+        skill_weights: Optional[Dict[str, float]]
+    ) -> Callable[[List[StudentProfile], int], List[PromptSection]]:
+        return lambda students, limit: self._build_skill_ranking_sections(students, required_skills, skill_weights, limit)
+    
+    def _build_ranking_sections(
+        self,
+        students: List[StudentProfile],
+        project: Optional[ProjectRequirements],
+        criteria: RankingCriteria,
+        limit: int
+    ) -> List[PromptSection]:
+        """Build the ranking prompt as sections; resumes are trimmed first, then students from the end"""
         
-        {criteria_text}
+        sections = [PromptSection(
+            "task",
+            f"TASK: Rank students for {'project assignment' if project else 'general capstone program'}."
+        )]
         
-        STUDENTS TO RANK:
-        {chr(10).join(student_data)}
+        # Project context
+        if project:
+            sections.append(PromptSection("project", "\n".join([
+                "PROJECT DETAILS:",
+                f"Name: {project.name}",
+                f"Description: {project.description or 'N/A'}",
+                f"Required Skills: {project.required_skills}",
+                f"Preferred GPA: {project.preferred_gpa or 'No preference'}",
+                f"Program Preferences: {project.program_preferences}"
+            ]), priority=1))
         
-        INSTRUCTIONS:
-        1. Evaluate each student against the criteria
-        2. Provide top {limit} students ranked by overall score
-        3. For each ranked student, include:
-           - Rank (1-{limit})
-           - Student ID and Name
-           - Overall Score (0-100)
-           - Detailed reasoning
-           - Key strengths
-           - Areas for development
-           - Specific project fit (if applicable)
+        # Criteria
+        criteria_lines = [
+            "RANKING CRITERIA:",
+            f"- Academic Performance (GPA): {criteria.gpa_weight * 100}%",
+            f"- Skills Match: {criteria.skills_match_weight * 100}%",
+            f"- Program Relevance: {criteria.program_relevance_weight * 100}%",
+            f"- Overall Profile: {criteria.overall_profile_weight * 100}%"
+        ]
+        if criteria.custom_criteria:
+            criteria_lines.append(f"Custom Criteria: {criteria.custom_criteria}")
+        sections.append(PromptSection("criteria", "\n".join(criteria_lines)))
         
-        4. Provide a summary of your ranking methodology
+        # Student data
+        sections.append(PromptSection(
+            "students",
+            "STUDENTS TO RANK:",
+            priority=2,
+            items=[
+                f"ID: {student.id} | Name: {student.name} | GPA: {student.gpa or 'N/A'} | "
+                f"Program: {student.program or 'N/A'} | Skills: {student.skills}"
+                for student in students
+            ],
+            item_ids=[student.id for student in students]
+        ))
+        sections.append(PromptSection(
+            "resumes",
+            "RESUME SUMMARIES:",
+            priority=3,
+            items=[
+                f"ID {student.id}: {student.resume_text[:200]}"
+                for student in students if student.resume_text
+            ],
+            shrink_items=True
+        ))
         
-        Format your response clearly with student rankings and explanations.
-        """
+        sections.append(PromptSection("instructions", f"""INSTRUCTIONS:
+1. Evaluate each student against the criteria
+2. Rank the top {limit} students by overall score (0-100)
+3. For each, give detailed reasoning (including project fit, if applicable), key strengths and areas for development
+4. Summarize your ranking methodology
+
+{ranking_format_instructions(limit)}"""))
         
-        return prompt
+        return sections
     
-    def _build_skill_ranking_prompt(
+    def _build_skill_ranking_sections(
         self,
         students: List[StudentProfile],
         required_skills: List[str],
         skill_weights: Optional[Dict[str, float]],
         limit: int
-    ) -> str:
-        """Build skill-focused ranking prompt"""
+    ) -> List[PromptSection]:
+        """Build the skill-focused ranking prompt as sections"""
         
-        student_data = []
-        for student in students:
-            student_info = f"""
-            ID: {student.id}
-            Name: {student.name}
-            Skills: {student.skills}
-            Program: {student.program or 'N/A'}
-            GPA: {student.gpa or 'N/A'}
-            """
-            student_data.append(student_info)
-        
-        weights_text = ""
+        task_lines = [
+            "TASK: Rank students based on skill match for required skills.",
+            f"REQUIRED SKILLS: {required_skills}"
+        ]
         if skill_weights:
-            weights_text = f"Skill Weights: {skill_weights}"
-        
-        prompt = f"""
-        TASK: Rank students based on skill match for required skills.
-        
-        REQUIRED SKILLS: {required_skills}
-        {weights_text}
-        
-        STUDENTS:
-        {chr(10).join(student_data)}
+            task_lines.append(f"Skill Weights: {skill_weights}")
         
-        ANALYSIS REQUIREMENTS:
-        1. Calculate skill match percentage for each student
-        2. Consider skill proficiency levels if available
-        3. Account for related/transferable skills
-        4. Rank top {limit} students by skill match
-        
-        For each student provide:
-        - Skill match score (0-100)
-        - Matched skills list
-        - Missing critical skills
-        - Transferable skills identified
-        - Overall assessment
+        return [
+            PromptSection("task", "\n".join(task_lines)),
+            PromptSection(
+                "students",
+                "STUDENTS:",
+                priority=2,
+                items=[
+                    f"ID: {student.id} | Name: {student.name} | Skills: {student.skills} | "
+                    f"Program: {student.program or 'N/A'} | GPA: {student.gpa or 'N/A'}"
+                    for student in students
+                ],
+                item_ids=[student.id for student in students]
+            ),
+            PromptSection("instructions", f"""ANALYSIS REQUIREMENTS:
+1. Calculate skill match percentage for each student
+2. Consider skill proficiency levels if available
+3. Account for related/transferable skills
+4. Rank top {limit} students by skill match
+
+Use the skill match percentage as the score (0-100), list matched and missing
+critical skills, and mention transferable skills in the reasoning.
+Focus purely on technical skill alignment.
+
+{ranking_format_instructions(limit, skill_fields=True)}""")
+        ]
+    
+    def _parse_ranked_entries(
+        self,
+        content: str,
+        students: List[StudentProfile],
+        limit: int
+    ) -> Dict[str, Any]:
+        """Validated ranking entries from the model output.
         
-        Focus purely on technical skill alignment.
+        Falls back to the order in which an unstructured reply mentions
+        student IDs (without scores) when no JSON ranking can be recovered.
         """
-        
-        return prompt
+        candidate_ids = [student.id for student in students]
+        parsed = parse_ranking(content, candidate_ids, limit)
+        if not parsed["rankings"]:
+            parsed["rankings"] = [
+                {
+                    "rank": i + 1,
+                    "student_id": student_id,
+                    "score": None,
+                    "reasoning": "",
+                    "strengths": [],
+                    "areas_for_improvement": []
+                }
+                for i, student_id in enumerate(extract_ranked_ids(content, candidate_ids)[:limit])
+            ]
+            parsed["structured"] = False
+            logger.warning("AI ranking response had no structured rankings; using mentioned student order")
+        return parsed
     
     async def _process_ranking_response(
         self,
         ai_response: AIResponse,
         students: List[StudentProfile],
         limit: int
-    ) -> List[Dict[str, Any]]:
+    ) -> Dict[str, Any]:
         """Process AI ranking response into structured format"""
         
-        # In a production system, you'd implement robust parsing of the AI response
-        # For now, we'll create a structured response based on the input students
+        parsed = self._parse_ranked_entries(ai_response.content, students, limit)
+        by_id = {student.id: student for student in students}
         
         ranked_students = []
-        
-        for i, student in enumerate(students[:limit]):
-            ranked_student = {
-                "rank": i + 1,
-                "student_id": student.id,
+        for entry in parsed["rankings"]:
+            student = by_id[entry["student_id"]]
+            ranked_students.append({
+                **entry,
                 "name": student.name,
                 "email": student.email,
                 "gpa": student.gpa,
                 "program": student.program,
-                "skills": student.skills,
-                "score": max(95 - (i * 2), 60),  # Mock scoring for demo
-                "reasoning": f"Strong candidate based on profile analysis. {ai_response.content[:100]}...",
-                "strengths": ["Technical skills", "Academic performance", "Program fit"],
-                "areas_for_improvement": ["Industry experience", "Soft skills development"],
-                "ai_analysis_excerpt": ai_response.content[:200]
-            }
-            ranked_students.append(ranked_student)
+                "skills": student.skills
+            })
         
-        return ranked_students
+        return {
+            "ranked_students": ranked_students,
+            "methodology": parsed["methodology"],
+            "structured": parsed["structured"],
+            "rejected": parsed["rejected"]
+        }
     
     async def _process_skill_ranking_response(
         self,
@@ -434,31 +632,112 @@ class StudentRankingFlow:
         students: List[StudentProfile],
         required_skills: List[str],
         limit: int
-    ) -> List[Dict[str, Any]]:
+    ) -> Dict[str, Any]:
         """Process skill-based ranking response"""
         
-        ranked_students = []
+        parsed = self._parse_ranked_entries(ai_response.content, students, limit)
+        by_id = {student.id: student for student in students}
+        required = [(skill, normalize_skill(skill)) for skill in required_skills]
         
-        for i, student in enumerate(students[:limit]):
-            # Calculate simple skill match (in production, parse from AI response)
+        ranked_students = []
+        for entry in parsed["rankings"]:
+            student = by_id[entry["student_id"]]
             student_skills = list(student.skills.keys()) if student.skills else []
-            matched_skills = [skill for skill in required_skills if skill.lower() in [s.lower() for s in student_skills]]
-            skill_match_percentage = (len(matched_skills) / len(required_skills)) * 100 if required_skills else 0
+            # Exact matches from the profile when the model did not list them
+            if "matched_skills" not in entry:
+                normalized = {normalize_skill(skill) for skill in student_skills}
+                entry["matched_skills"] = [skill for skill, key in required if key in normalized]
+            if "missing_skills" not in entry:
+                entry["missing_skills"] = [skill for skill in required_skills if skill not in entry["matched_skills"]]
             
-            ranked_student = {
-                "rank": i + 1,
-                "student_id": student.id,
+            ranked_students.append({
+                **entry,
                 "name": student.name,
-                "skill_match_score": min(skill_match_percentage + (90 - i * 5), 100),
-                "matched_skills": matched_skills,
-                "missing_skills": [skill for skill in required_skills if skill not in matched_skills],
-                "all_skills": student_skills,
-                "ai_analysis": ai_response.content[:150]
-            }
-            ranked_students.append(ranked_student)
+                "email": student.email,
+                "gpa": student.gpa,
+                "program": student.program,
+                "skill_match_score": entry["score"],
+                "all_skills": student_skills
+            })
         
-        return ranked_students
+        return {
+            "ranked_students": ranked_students,
+            "methodology": parsed["methodology"],
+            "structured": parsed["structured"],
+            "rejected": parsed["rejected"]
+        }
+
+
+def _prompt_budget(response: AIResponse) -> Optional[Dict[str, Any]]:
+    """What the manager trimmed from the prompt to fit the provider, if anything"""
+    return (response.metadata or {}).get("prompt_budget")
+
+
+def _unranked_ids(response: AIResponse) -> List[int]:
+    """Students trimmed from the prompt the model saw, so they could not be ranked"""
+    return list(((_prompt_budget(response) or {}).get("dropped_ids") or {}).get("students", []))
 
 
 # Global flow instance
-student_ranking_flow = StudentRankingFlow()
\ No newline at end of file
+student_ranking_flow = StudentRankingFlow()
+
+
+# Background jobs (see job_queue.AIJobQueue); payloads are plain JSON so a
+# job can be picked up by any API process
+
+def ranking_job_payload(
+    students: List[StudentProfile],
+    project: Optional[ProjectRequirements],
+    criteria: Optional[RankingCriteria],
+    limit: int
+) -> Dict[str, Any]:
+    return {
+        "students": [asdict(student) for student in students],
+        "project": asdict(project) if project else None,
+        "criteria": asdict(criteria or RankingCriteria()),
+        "limit": limit
+    }
+
+
+def skill_ranking_job_payload(
+    students: List[StudentProfile],
+    required_skills: List[str],
+    skill_weights: Optional[Dict[str, float]],
+    limit: int
+) -> Dict[str, Any]:
+    return {
+        "students": [asdict(student) for student in students],
+        "required_skills": required_skills,
+        "skill_weights": skill_weights,
+        "limit": limit
+    }
+
+
+async def _run_ranking_job(payload: Dict[str, Any]) -> Dict[str, Any]:
+    result = await student_ranking_flow.rank_students_for_project(
+        [StudentProfile(**student) for student in payload["students"]],
+        ProjectRequirements(**payload["project"]) if payload["project"] else None,
+        RankingCriteria(**payload["criteria"]),
+        payload["limit"],
+        deadline=time.time() + settings.ai_job_timeout
+    )
+    if not result["success"]:
+        raise RuntimeError(result["error"])
+    return result
+
+
+async def _run_skill_ranking_job(payload: Dict[str, Any]) -> Dict[str, Any]:
+    result = await student_ranking_flow.rank_students_by_skills(
+        [StudentProfile(**student) for student in payload["students"]],
+        payload["required_skills"],
+        payload["skill_weights"],
+        payload["limit"],
+        deadline=time.time() + settings.ai_job_timeout
+    )
+    if not result["success"]:
+        raise RuntimeError(result["error"])
+    return result
+
+
+ai_job_queue.register("rank_students", _run_ranking_job)
+ai_job_queue.register("rank_students_by_skills", _run_skill_ranking_job)
\ No newline at end of file
@@ -0,0 +1,431 @@
+"""
+Local student ranking engine for SMART Connect
+Deterministic, vectorized weighted-score ranking driven by config/student_ranking.json
+"""
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Sequence, Tuple, TYPE_CHECKING
+
+import numpy as np
+
+from ..core.config import settings
+from ..core.skill_dictionary import skill_dictionary
+
+if TYPE_CHECKING:
+    from .rank_students_flow import StudentProfile, ProjectRequirements, RankingCriteria
+
+import logging
+logger = logging.getLogger(__name__)
+
+CONFIG_PATH = Path(__file__).resolve().parent.parent / "config" / "student_ranking.json"
+
+# Columns of the component score matrix, in RankingCriteria weight order
+CRITERIA = ("gpa", "skills_match", "program_relevance", "overall_profile")
+
+DEFAULT_SKILL_LEVEL = 3.0  # Skills listed without a level count as intermediate
+MAX_SKILL_LEVEL = 5.0
+COMPONENT_CACHE_SIZE = 64  # Requirement sets whose component matrices a cohort keeps
+
+
+@lru_cache(maxsize=4)
+def load_ranking_config(path: str = str(CONFIG_PATH)) -> Dict[str, Any]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def normalize_skill(name: str) -> str:
+    """Comparison key of a skill's canonical name, so "JS" and "JavaScript" match"""
+    return skill_dictionary.canonical_key(name)
+
+
+def skill_levels(skills: Any, level_names: Dict[str, float]) -> Dict[str, float]:
+    """Normalized skill name -> level (1-5) from a Student.skills value.
+
+    Accepts ``{"Python": 4}``, ``{"Python": "advanced"}`` and plain lists.
+    """
+    if isinstance(skills, dict):
+        items = skills.items()
+    elif isinstance(skills, (list, tuple)):
+        items = ((skill, None) for skill in skills)
+    else:
+        return {}
+
+    levels = {}
+    for name, level in items:
+        key = normalize_skill(name)
+        if not key:
+            continue
+        if isinstance(level, (int, float)) and not isinstance(level, bool):
+            value = float(level)
+        elif isinstance(level, str) and level.strip().lower() in level_names:
+            value = level_names[level.strip().lower()]
+        else:
+            value = DEFAULT_SKILL_LEVEL
+        levels[key] = min(MAX_SKILL_LEVEL, max(0.0, value))
+    return levels
+
+
+@dataclass
+class Cohort:
+    """Column arrays for a set of students; row ``i`` is ``ids[i]``"""
+    ids: np.ndarray
+    profiles: List["StudentProfile"]
+    gpa: np.ndarray              # 0-1
+    technical: np.ndarray        # 0-1, project-independent skill strength
+    profile: np.ndarray          # 0-1, profile completeness
+    program_codes: np.ndarray    # index into ``programs``, -1 if unknown
+    programs: Dict[str, int]
+    # skill -> (rows holding it, their levels 0-1)
+    skill_postings: Dict[str, Tuple[np.ndarray, np.ndarray]]
+    levels: List[Dict[str, float]]
+    built_at: float = field(default_factory=time.monotonic)
+    # (required skills, program preferences) -> component matrix, least recently used first
+    components: "OrderedDict[Tuple[frozenset, frozenset], np.ndarray]" = field(default_factory=OrderedDict)
+
+    @property
+    def size(self) -> int:
+        return len(self.ids)
+
+    def row_of(self) -> Dict[int, int]:
+        return {int(student_id): row for row, student_id in enumerate(self.ids)}
+
+
+class StudentRankingEngine:
+    """
+    Rank students without a provider call.
+
+    Each student gets four component scores in 0-1 - GPA, skills match,
+    program relevance and overall profile - stored column-wise, so a ranking
+    is one matrix-vector product with the RankingCriteria weights followed by
+    ``argpartition`` for the top k. From student_ranking.json it uses the GPA
+    scale, the skill level names, the technical_skills factors (high-value
+    languages, framework categories, specialized areas, diversity), the
+    minimum data requirements and the ranking tiers.
+
+    Skills match is the mean level of the project's required skills when it
+    lists any, otherwise the student's technical_skills strength. Program
+    relevance is 1 for programs the project prefers and 0 otherwise (1 for
+    everyone when it has no preference).
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        self.config = config or load_ranking_config()
+        criteria = self.config["ranking_criteria"]
+
+        gpa_config = criteria["academic_performance"]["factors"]["gpa"]
+        self.gpa_scale = float(gpa_config.get("scale", 4.0))
+
+        technical = criteria["technical_skills"]["factors"]
+        languages = technical["programming_languages"]
+        self.level_names = {name: float(value) for name, value in languages["scoring"].items()}
+        self.high_value_skills = {normalize_skill(skill) for skill in languages["high_value_skills"]}
+        self.skill_categories = {
+            category: {normalize_skill(skill) for skill in skills}
+            for category, skills in technical["frameworks_technologies"]["categories"].items()
+        }
+        self.high_demand_areas = {
+            normalize_skill(area) for area in technical["specialized_expertise"]["high_demand_areas"]
+        }
+        self.minimum_categories = technical["skill_diversity"].get("minimum_categories", 3)
+        self.technical_weights = np.array([
+            languages["weight"],
+            technical["frameworks_technologies"]["weight"],
+            technical["specialized_expertise"]["weight"],
+            technical["skill_diversity"]["weight"]
+        ], dtype=np.float64)
+        self.technical_weights /= self.technical_weights.sum()
+
+        minimum_skills = self.config.get("validation_rules", {}).get("minimum_data_requirements", {}).get("skills", "minimum_3")
+        self.minimum_skills = int(str(minimum_skills).rsplit("_", 1)[-1]) if str(minimum_skills)[-1:].isdigit() else 3
+
+        tiers = sorted(self.config["ranking_tiers"].items(), key=lambda item: item[1]["range"][0])
+        self.tier_names = [name for name, _ in tiers]
+        self.tier_floors = np.array([tier["range"][0] for _, tier in tiers], dtype=np.float64)
+
+        self._cohort: Optional[Cohort] = None
+
+    # Building
+
+    def build(self, students: Sequence["StudentProfile"]) -> Cohort:
+        """Column arrays for ``students`` (one Python pass; scoring is vectorized)"""
+        n = len(students)
+        gpa = np.zeros(n, dtype=np.float64)
+        technical = np.zeros(n, dtype=np.float64)
+        profile = np.zeros(n, dtype=np.float64)
+        program_codes = np.full(n, -1, dtype=np.int32)
+        programs: Dict[str, int] = {}
+        postings: Dict[str, Tuple[List[int], List[float]]] = {}
+        levels_by_row: List[Dict[str, float]] = []
+
+        for row, student in enumerate(students):
+            levels = skill_levels(student.skills, self.level_names)
+            levels_by_row.append(levels)
+            for skill, level in levels.items():
+                rows, values = postings.setdefault(skill, ([], []))
+                rows.append(row)
+                values.append(level / MAX_SKILL_LEVEL)
+
+            if student.gpa is not None:
+                gpa[row] = min(1.0, max(0.0, float(student.gpa) / self.gpa_scale))
+            technical[row] = self._technical_score(levels)
+            profile[row] = self._profile_score(student, levels)
+            if student.program:
+                program_codes[row] = programs.setdefault(student.program.strip().lower(), len(programs))
+
+        return Cohort(
+            ids=np.array([student.id for student in students], dtype=np.int64),
+            profiles=list(students),
+            gpa=gpa,
+            technical=technical,
+            profile=profile,
+            program_codes=program_codes,
+            programs=programs,
+            skill_postings={
+                skill: (np.array(rows, dtype=np.int64), np.array(values, dtype=np.float64))
+                for skill, (rows, values) in postings.items()
+            },
+            levels=levels_by_row
+        )
+
+    def _technical_score(self, levels: Dict[str, float]) -> float:
+        if not levels:
+            return 0.0
+        # Strongest three high-value languages, by level
+        language_levels = sorted((level for skill, level in levels.items() if skill in self.high_value_skills), reverse=True)
+        languages = sum(language_levels[:3]) / (3 * MAX_SKILL_LEVEL)
+        covered = sum(1 for skills in self.skill_categories.values() if skills & levels.keys())
+        frameworks = covered / len(self.skill_categories) if self.skill_categories else 0.0
+        specialized = min(1.0, len(self.high_demand_areas & levels.keys()) / 2)
+        diversity = min(1.0, covered / self.minimum_categories) if self.minimum_categories else 1.0
+        return float(np.dot(self.technical_weights, (languages, frameworks, specialized, diversity)))
+
+    def _profile_score(self, student: "StudentProfile", levels: Dict[str, float]) -> float:
+        checks = (
+            student.gpa is not None,
+            min(1.0, len(levels) / self.minimum_skills) if self.minimum_skills else 1.0,
+            bool(student.resume_text),
+            bool(student.program)
+        )
+        return float(sum(checks)) / len(checks)
+
+    # Scoring
+
+    def component_scores(
+        self,
+        cohort: Cohort,
+        required_skills: Sequence[str] = (),
+        program_preferences: Sequence[str] = ()
+    ) -> np.ndarray:
+        """(n, 4) matrix of component scores in 0-1, columns as in CRITERIA"""
+        components = np.empty((cohort.size, len(CRITERIA)), dtype=np.float64)
+        components[:, 0] = cohort.gpa
+        components[:, 1] = self.skill_match(cohort, required_skills)
+        components[:, 3] = cohort.profile
+
+        preferred = [cohort.programs[key] for key in {p.strip().lower() for p in program_preferences} if key in cohort.programs]
+        if program_preferences:
+            components[:, 2] = np.isin(cohort.program_codes, preferred)
+        else:
+            components[:, 2] = 1.0
+        return components
+
+    def cached_components(
+        self,
+        cohort: Cohort,
+        required_skills: Sequence[str] = (),
+        program_preferences: Sequence[str] = ()
+    ) -> Tuple[np.ndarray, bool]:
+        """Component matrix for a requirement set, reused while the cohort lives; returns (matrix, was cached)"""
+        key = (
+            frozenset(normalize_skill(skill) for skill in required_skills) - {""},
+            frozenset(program.strip().lower() for program in program_preferences)
+        )
+        components = cohort.components.get(key)
+        if components is not None:
+            cohort.components.move_to_end(key)
+            return components, True
+        components = self.component_scores(cohort, required_skills, program_preferences)
+        components.setflags(write=False)
+        cohort.components[key] = components
+        if len(cohort.components) > COMPONENT_CACHE_SIZE:
+            cohort.components.popitem(last=False)
+        return components, False
+
+    def skill_match(self, cohort: Cohort, required_skills: Sequence[str]) -> np.ndarray:
+        """Mean level of the required skills per student, or technical strength without any"""
+        required = {normalize_skill(skill) for skill in required_skills} - {""}
+        if not required:
+            return cohort.technical
+        match = np.zeros(cohort.size, dtype=np.float64)
+        for skill in required:
+            posting = cohort.skill_postings.get(skill)
+            if posting is not None:
+                rows, values = posting
+                match[rows] += values
+        return match / len(required)
+
+    @staticmethod
+    def criteria_weights(criteria: Optional["RankingCriteria"]) -> np.ndarray:
+        if criteria is None:
+            weights = np.array([0.3, 0.4, 0.2, 0.1], dtype=np.float64)
+        else:
+            weights = np.array([
+                criteria.gpa_weight,
+                criteria.skills_match_weight,
+                criteria.program_relevance_weight,
+                criteria.overall_profile_weight
+            ], dtype=np.float64)
+        weights = np.clip(weights, 0.0, None)
+        total = weights.sum()
+        return weights / total if total > 0 else np.full(len(CRITERIA), 1.0 / len(CRITERIA))
+
+    def weighted_scores(self, components: np.ndarray, criteria: Optional["RankingCriteria"]) -> np.ndarray:
+        """Weighted score per student on the 0-100 scale"""
+        return components @ self.criteria_weights(criteria) * 100.0
+
+    @staticmethod
+    def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+        """Rows of the ``k`` highest scores, best first (ties by row order)"""
+        k = max(0, min(k, len(scores)))
+        if k == 0:
+            return np.empty(0, dtype=np.int64)
+        if k < len(scores):
+            candidates = np.argpartition(-scores, k - 1)[:k]
+        else:
+            candidates = np.arange(len(scores))
+        return candidates[np.lexsort((candidates, -scores[candidates]))]
+
+    @staticmethod
+    def percentiles(cohort_scores: np.ndarray, scores: np.ndarray) -> np.ndarray:
+        """Share (0-100) of the other cohort students scoring strictly below each score"""
+        if len(cohort_scores) <= 1:
+            return np.full(len(scores), 100.0)
+        lower = np.searchsorted(np.sort(cohort_scores), scores, side="left")
+        return 100.0 * lower / (len(cohort_scores) - 1)
+
+    def tiers(self, scores: np.ndarray) -> List[str]:
+        indices = np.searchsorted(self.tier_floors, np.floor(scores), side="right") - 1
+        return [self.tier_names[max(0, index)] for index in indices]
+
+    # Ranking
+
+    def rank(
+        self,
+        cohort: Cohort,
+        project: Optional["ProjectRequirements"] = None,
+        criteria: Optional["RankingCriteria"] = None,
+        limit: int = 10,
+        required_skills: Optional[Sequence[str]] = None
+    ) -> Dict[str, Any]:
+        """Top ``limit`` students with their weighted score, tier and component scores"""
+        start_time = time.perf_counter()
+        if required_skills is None:
+            required_skills = project.required_skills if project else []
+        program_preferences = project.program_preferences if project else []
+
+        components, _ = self.cached_components(cohort, required_skills, program_preferences)
+        scores = self.weighted_scores(components, criteria)
+        rows = self.top_k(scores, limit)
+        tiers = self.tiers(scores[rows])
+        percentiles = self.percentiles(scores, scores[rows])
+        required = [skill for skill in required_skills if normalize_skill(skill)]
+
+        ranked_students = []
+        for rank, (row, tier, percentile) in enumerate(zip(rows, tiers, percentiles), start=1):
+            student = cohort.profiles[row]
+            entry = {
+                "rank": rank,
+                "student_id": student.id,
+                "name": student.name,
+                "email": student.email,
+                "gpa": student.gpa,
+                "program": student.program,
+                "skills": student.skills,
+                "score": round(float(scores[row]), 2),
+                "tier": tier,
+                "percentile": round(float(percentile), 2),
+                "criterion_scores": {
+                    name: round(float(components[row, column]) * 100, 2) for column, name in enumerate(CRITERIA)
+                }
+            }
+            if required:
+                levels = cohort.levels[row]
+                entry["matched_skills"] = [skill for skill in required if normalize_skill(skill) in levels]
+                entry["missing_skills"] = [skill for skill in required if normalize_skill(skill) not in levels]
+            ranked_students.append(entry)
+
+        return {
+            "success": True,
+            "ranked_students": ranked_students,
+            "algorithm": "weighted_score",
+            "weights": dict(zip(CRITERIA, self.criteria_weights(criteria).round(4).tolist())),
+            "candidates": cohort.size,
+            "processing_time": time.perf_counter() - start_time
+        }
+
+    def reweight(
+        self,
+        cohort: Cohort,
+        required_skills: Sequence[str] = (),
+        program_preferences: Sequence[str] = (),
+        criteria: Optional["RankingCriteria"] = None,
+        limit: int = 10
+    ) -> Dict[str, Any]:
+        """Top ``limit`` under new criteria weights from the cached component matrix.
+
+        Only the weighted total (one matrix-vector product) and the top k are
+        recomputed, so weight sliders can re-rank interactively; entries are
+        kept small for the same reason.
+        """
+        start_time = time.perf_counter()
+        components, cached = self.cached_components(cohort, required_skills, program_preferences)
+        scores = self.weighted_scores(components, criteria)
+        rows = self.top_k(scores, limit)
+        tiers = self.tiers(scores[rows])
+
+        ranked_students = [
+            {
+                "rank": rank,
+                "student_id": cohort.profiles[row].id,
+                "name": cohort.profiles[row].name,
+                "score": round(float(scores[row]), 2),
+                "tier": tier
+            }
+            for rank, (row, tier) in enumerate(zip(rows, tiers), start=1)
+        ]
+        return {
+            "success": True,
+            "ranked_students": ranked_students,
+            "algorithm": "weighted_score",
+            "weights": dict(zip(CRITERIA, self.criteria_weights(criteria).round(4).tolist())),
+            "candidates": cohort.size,
+            "components_cached": cached,
+            "processing_time": time.perf_counter() - start_time
+        }
+
+    # Cached cohort of approved students
+
+    def get_cohort(self) -> Optional[Cohort]:
+        """The cached cohort, or None once it is older than ranking_engine_cache_ttl"""
+        if self._cohort is None or time.monotonic() - self._cohort.built_at > settings.ranking_engine_cache_ttl:
+            return None
+        return self._cohort
+
+    def set_cohort(self, students: Sequence["StudentProfile"]) -> Cohort:
+        self._cohort = self.build(students)
+        logger.info(f"Built ranking arrays for {self._cohort.size} students")
+        return self._cohort
+
+    def invalidate(self):
+        """Drop the cached cohort together with its component matrices"""
+        if self._cohort is not None:
+            self._cohort.components.clear()
+        self._cohort = None
+
+
+# Global engine instance
+ranking_engine = StudentRankingEngine()
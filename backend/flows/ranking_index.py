@@ -0,0 +1,328 @@
+"""
+Ranking index for SMART Connect
+Sorted score indexes per ranking context, kept current one student at a time
+"""
+import threading
+import time
+from datetime import date
+from bisect import bisect_left, bisect_right, insort
+from typing import Dict, Any, List, Optional, Iterable, Tuple
+
+from sqlalchemy.orm import Session, joinedload
+
+from ..models.project import Project
+from ..models.student import Student
+from .rank_students_flow import StudentProfile, ProjectRequirements
+from .ranking_engine import ranking_engine
+from ..core.config import settings
+
+import logging
+logger = logging.getLogger(__name__)
+
+GLOBAL_CONTEXT = "global"
+
+
+def program_context(program: str) -> str:
+    return f"program:{program.strip().lower()}"
+
+
+def semester_context(semester: str) -> str:
+    return f"semester:{semester.strip().lower()}"
+
+
+def project_context(project_id: int) -> str:
+    return f"project:{project_id}"
+
+
+def semester_of(registered: date) -> str:
+    """Academic term of a registration date, e.g. "Fall 2024" """
+    season = "Spring" if registered.month <= 5 else "Summer" if registered.month <= 7 else "Fall"
+    return f"{season} {registered.year}"
+
+
+def _cohort_contexts(student: Student) -> List[str]:
+    """Program and semester contexts a student is ranked in besides the global one"""
+    contexts = []
+    if student.program:
+        contexts.append(program_context(student.program))
+    if student.registration_date:
+        contexts.append(semester_context(semester_of(student.registration_date)))
+    return contexts
+
+
+def _student_profile(student: Student) -> StudentProfile:
+    return StudentProfile(
+        id=student.user_id,
+        name=student.user.full_name or "N/A",
+        email=student.user.email,
+        gpa=float(student.gpa) if student.gpa else None,
+        program=student.program,
+        skills=student.skills or {},
+        resume_text=student.resume_text,
+        student_id_number=student.student_id_number
+    )
+
+
+class SortedScoreIndex:
+    """
+    Students of one context ordered best first.
+
+    Keys are ``(-score, student_id)`` in a list kept sorted with ``bisect``,
+    so rank-of-student, percentile and the start of a top-N page are binary
+    searches, and moving one student is a delete and an ``insort``.
+    """
+
+    def __init__(self, items: Iterable[Tuple[int, float]] = ()):
+        self.scores: Dict[int, float] = {int(student_id): float(score) for student_id, score in items}
+        self._keys: List[Tuple[float, int]] = sorted((-score, student_id) for student_id, score in self.scores.items())
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, student_id: int) -> bool:
+        return student_id in self.scores
+
+    def upsert(self, student_id: int, score: float):
+        self.remove(student_id)
+        self.scores[student_id] = score
+        insort(self._keys, (-score, student_id))
+
+    def remove(self, student_id: int):
+        score = self.scores.pop(student_id, None)
+        if score is not None:
+            del self._keys[bisect_left(self._keys, (-score, student_id))]
+
+    def rank_of(self, student_id: int) -> Optional[int]:
+        """1-based rank, ties broken by student id"""
+        score = self.scores.get(student_id)
+        if score is None:
+            return None
+        return bisect_left(self._keys, (-score, student_id)) + 1
+
+    def percentile(self, student_id: int) -> Optional[float]:
+        """Share (0-100) of the other students scoring strictly lower"""
+        score = self.scores.get(student_id)
+        if score is None:
+            return None
+        if len(self._keys) == 1:
+            return 100.0
+        lower = len(self._keys) - bisect_right(self._keys, (-score, float("inf")))
+        return 100.0 * lower / (len(self._keys) - 1)
+
+    def top(self, limit: int, offset: int = 0) -> List[Tuple[int, float]]:
+        return [(student_id, -negative) for negative, student_id in self._keys[offset:offset + limit]]
+
+
+class RankingIndexService:
+    """
+    Maintained rankings of approved students, so standings are read from an
+    index instead of re-running a ranking.
+
+    Contexts are the global ranking (default RankingCriteria weights, no
+    project), one per cohort - program and registration semester - holding
+    the same scores within the cohort, and one per project (scored against
+    its required skills). Scores come from the local ranking engine. The
+    global and cohort contexts are built on first use from the database, a
+    project's context on its first query. Standings carry the rank, the
+    percentile within the context and the score's ranking_tiers tier, for
+    one student or a whole page at once.
+
+    ``update_student`` rescores just the saved student in every loaded
+    context and moves them within each index; updates that arrive while a
+    context is being built are replayed onto it. Those updates only cover
+    writes made in this process, so the global (with its cohorts) and each
+    project context are rebuilt from the database once older than
+    ``ranking_index_ttl``, picking up what other workers saved.
+    """
+
+    def __init__(self):
+        self.contexts: Dict[str, SortedScoreIndex] = {}
+        self._projects: Dict[int, ProjectRequirements] = {}
+        self._cohorts: Dict[int, List[str]] = {}      # student -> program/semester contexts
+        self._built_at: Dict[str, float] = {}          # global/project context -> time.monotonic() of its build
+        self._lock = threading.RLock()
+        self._building = 0
+        self._replay: Dict[int, Optional[Tuple[StudentProfile, List[str]]]] = {}
+        self.updates = 0
+
+    # Scoring
+
+    @staticmethod
+    def _scores(profiles: List[StudentProfile], project: Optional[ProjectRequirements]) -> List[float]:
+        cohort = ranking_engine.build(profiles)
+        components = ranking_engine.component_scores(
+            cohort,
+            project.required_skills if project else (),
+            project.program_preferences if project else ()
+        )
+        return ranking_engine.weighted_scores(components, None).tolist()
+
+    # Building (worker threads)
+
+    def _fresh(self, context: str) -> bool:
+        with self._lock:
+            built_at = self._built_at.get(context)
+            return (
+                context in self.contexts and built_at is not None
+                and time.monotonic() - built_at <= settings.ranking_index_ttl
+            )
+
+    def ensure_global(self, db: Session):
+        """Build the global and cohort contexts if missing or expired"""
+        if self._fresh(GLOBAL_CONTEXT):
+            return
+        self._build(db, None)
+
+    def ensure_project(self, db: Session, project_id: int) -> bool:
+        """Build a project's context if missing or expired; False if the project does not exist"""
+        if self._fresh(project_context(project_id)):
+            return True
+        project = db.get(Project, project_id)
+        if project is None:
+            return False
+        self._build(db, ProjectRequirements(
+            id=project.id,
+            name=project.name,
+            description=project.description,
+            required_skills=list(project.required_skills or []),
+            preferred_gpa=None,
+            program_preferences=[]
+        ))
+        return True
+
+    def _build(self, db: Session, project: Optional[ProjectRequirements]):
+        start_time = time.perf_counter()
+        built_at = time.monotonic()
+        with self._lock:
+            self._building += 1
+        try:
+            students = db.query(Student).options(joinedload(Student.user)).filter(Student.status == "Approved").all()
+            profiles = [_student_profile(student) for student in students]
+            scores = self._scores(profiles, project) if profiles else []
+            items = [(profile.id, score) for profile, score in zip(profiles, scores)]
+
+            with self._lock:
+                if project is None:
+                    # Cohorts left empty since the last build must not linger
+                    for context in {context for contexts in self._cohorts.values() for context in contexts}:
+                        self.contexts.pop(context, None)
+                    self.contexts[GLOBAL_CONTEXT] = SortedScoreIndex(items)
+                    self._built_at[GLOBAL_CONTEXT] = built_at
+                    by_cohort: Dict[str, List[Tuple[int, float]]] = {}
+                    self._cohorts = {}
+                    for student, item in zip(students, items):
+                        self._cohorts[student.user_id] = _cohort_contexts(student)
+                        for context in self._cohorts[student.user_id]:
+                            by_cohort.setdefault(context, []).append(item)
+                    self.contexts.update({context: SortedScoreIndex(entries) for context, entries in by_cohort.items()})
+                else:
+                    self._projects[project.id] = project
+                    self.contexts[project_context(project.id)] = SortedScoreIndex(items)
+                    self._built_at[project_context(project.id)] = built_at
+                for student_id, entry in list(self._replay.items()):
+                    self._apply(student_id, entry)
+        finally:
+            with self._lock:
+                self._building -= 1
+                if not self._building:
+                    self._replay.clear()
+        logger.info(f"Built ranking index {project_context(project.id) if project else GLOBAL_CONTEXT} "
+                    f"({len(items)} students) in {time.perf_counter() - start_time:.3f}s")
+
+    # Incremental updates (request thread, after the commit)
+
+    def update_student(self, student: Student):
+        """Rescore a saved student in every loaded context"""
+        if not self.contexts and not self._building:
+            return
+        entry = (_student_profile(student), _cohort_contexts(student)) if student.status == "Approved" else None
+        with self._lock:
+            if self._building:
+                self._replay[student.user_id] = entry
+            self._apply(student.user_id, entry)
+            self.updates += 1
+
+    def remove_student(self, student_id: int):
+        with self._lock:
+            if self._building:
+                self._replay[student_id] = None
+            self._apply(student_id, None)
+
+    def _apply(self, student_id: int, entry: Optional[Tuple[StudentProfile, List[str]]]):
+        """Move (or drop, without an entry) one student in every loaded context; caller holds the lock"""
+        for context in self._cohorts.pop(student_id, []):
+            if context in self.contexts:
+                self.contexts[context].remove(student_id)
+                if not self.contexts[context]:
+                    del self.contexts[context]
+        if entry is None:
+            for index in self.contexts.values():
+                index.remove(student_id)
+            return
+
+        profile, cohorts = entry
+        if GLOBAL_CONTEXT in self.contexts:
+            score = self._scores([profile], None)[0]
+            self.contexts[GLOBAL_CONTEXT].upsert(student_id, score)
+            self._cohorts[student_id] = cohorts
+            for context in cohorts:
+                self.contexts.setdefault(context, SortedScoreIndex()).upsert(student_id, score)
+        for project_id, project in self._projects.items():
+            index = self.contexts.get(project_context(project_id))
+            if index is not None:
+                index.upsert(student_id, self._scores([profile], project)[0])
+
+    def invalidate_project(self, project_id: int):
+        """Drop a project's context after its requirements changed"""
+        with self._lock:
+            self._projects.pop(project_id, None)
+            self.contexts.pop(project_context(project_id), None)
+            self._built_at.pop(project_context(project_id), None)
+
+    # Queries
+
+    def top(self, context: str, limit: int = 10, offset: int = 0) -> List[Tuple[int, float]]:
+        with self._lock:
+            index = self.contexts.get(context)
+            return index.top(limit, offset) if index is not None else []
+
+    def standing(self, context: str, student_id: int) -> Optional[Dict[str, Any]]:
+        """Rank, score, percentile and tier of a student in a context; None if not ranked there"""
+        return self.standings(context, [student_id]).get(student_id)
+
+    def standings(self, context: str, student_ids: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+        """Standings of a page of students in one pass; students not ranked in the context are left out"""
+        with self._lock:
+            index = self.contexts.get(context)
+            if index is None:
+                return {}
+            ranked = [student_id for student_id in dict.fromkeys(student_ids) if student_id in index]
+            scores = [index.scores[student_id] for student_id in ranked]
+            total = len(index)
+            return {
+                student_id: {
+                    "student_id": student_id,
+                    "context": context,
+                    "rank": index.rank_of(student_id),
+                    "total": total,
+                    "score": round(score, 2),
+                    "percentile": round(index.percentile(student_id), 2),
+                    "tier": tier
+                }
+                for student_id, score, tier in zip(ranked, scores, ranking_engine.tiers(scores))
+            }
+
+    def cohorts_of(self, student_id: int) -> List[str]:
+        with self._lock:
+            return list(self._cohorts.get(student_id, []))
+
+    def get_status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "contexts": {context: len(index) for context, index in self.contexts.items()},
+                "updates": self.updates
+            }
+
+
+# Global ranking index instance
+ranking_index = RankingIndexService()
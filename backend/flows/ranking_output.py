@@ -0,0 +1,152 @@
+"""
+Structured ranking output for SMART Connect
+JSON schema for AI rankings and validation of parsed entries against the candidate set
+"""
+import json
+from typing import Any, Dict, Iterable, List, Optional
+
+from ..ai_adapters.structured_output import IncrementalJSONParser, parse_json_tolerant
+
+import logging
+logger = logging.getLogger(__name__)
+
+RANKING_JSON_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "rankings": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "rank": {"type": "integer"},
+                    "student_id": {"type": "integer"},
+                    "score": {"type": "number", "minimum": 0, "maximum": 100},
+                    "reasoning": {"type": "string"},
+                    "strengths": {"type": "array", "items": {"type": "string"}},
+                    "areas_for_improvement": {"type": "array", "items": {"type": "string"}},
+                    "matched_skills": {"type": "array", "items": {"type": "string"}},
+                    "missing_skills": {"type": "array", "items": {"type": "string"}}
+                },
+                "required": ["rank", "student_id", "score", "reasoning"]
+            }
+        },
+        "methodology": {"type": "string"}
+    },
+    "required": ["rankings"]
+}
+
+
+def ranking_format_instructions(limit: int, skill_fields: bool = False) -> str:
+    """Prompt text asking for JSON that matches RANKING_JSON_SCHEMA"""
+    extra = ', "matched_skills": ["..."], "missing_skills": ["..."]' if skill_fields else ""
+    return (
+        f"Respond with JSON only, no prose or code fences. Use this shape, listing the top {limit} "
+        "students best first and using the exact student IDs given above:\n"
+        '{"rankings": [{"rank": 1, "student_id": 123, "score": 87, "reasoning": "...", '
+        f'"strengths": ["..."], "areas_for_improvement": ["..."]{extra}}}], "methodology": "..."}}'
+    )
+
+
+def _string_list(value: Any) -> List[str]:
+    if isinstance(value, list):
+        return [str(item) for item in value if item is not None]
+    if isinstance(value, str) and value:
+        return [value]
+    return []
+
+
+class RankingValidator:
+    """Validate parsed ranking entries against the students that were actually ranked.
+
+    Entries for unknown or repeated student ids are discarded, scores are
+    clamped to 0-100 and ranks are renumbered in the order accepted. Feed it
+    entries incrementally (streaming) or all at once.
+    """
+
+    def __init__(self, candidate_ids: Iterable[int], limit: Optional[int] = None):
+        self.candidate_ids = set(candidate_ids)
+        self.limit = limit
+        self.accepted: List[Dict[str, Any]] = []
+        self.rejected = 0
+        self._seen = set()
+
+    @property
+    def full(self) -> bool:
+        return self.limit is not None and len(self.accepted) >= self.limit
+
+    def add(self, entry: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Validate one entry; returns the normalized entry or None if rejected"""
+        if self.full:
+            return None
+        try:
+            student_id = int(entry.get("student_id", entry.get("id")))
+        except (TypeError, ValueError):
+            self.rejected += 1
+            return None
+        if student_id not in self.candidate_ids or student_id in self._seen:
+            self.rejected += 1
+            return None
+
+        try:
+            score = min(100.0, max(0.0, float(entry.get("score"))))
+        except (TypeError, ValueError):
+            score = None
+
+        normalized = {
+            "rank": len(self.accepted) + 1,
+            "student_id": student_id,
+            "score": score,
+            "reasoning": str(entry.get("reasoning") or ""),
+            "strengths": _string_list(entry.get("strengths")),
+            "areas_for_improvement": _string_list(entry.get("areas_for_improvement")),
+        }
+        for key in ("matched_skills", "missing_skills"):
+            if key in entry:
+                normalized[key] = _string_list(entry[key])
+
+        self._seen.add(student_id)
+        self.accepted.append(normalized)
+        return normalized
+
+    def add_all(self, entries: Iterable[Any]) -> List[Dict[str, Any]]:
+        return [accepted for accepted in (self.add(entry) for entry in entries if isinstance(entry, dict)) if accepted]
+
+
+def extract_entries(value: Any) -> List[Any]:
+    """The list of ranking entries in a parsed response (object with "rankings" or a bare list)"""
+    if isinstance(value, dict):
+        for key in ("rankings", "ranked_students", "students", "results"):
+            if isinstance(value.get(key), list):
+                return value[key]
+        return []
+    if isinstance(value, list):
+        return value
+    return []
+
+
+def parse_ranking(content: str, candidate_ids: Iterable[int], limit: Optional[int] = None) -> Dict[str, Any]:
+    """Parse a complete ranking response into validated entries and the stated methodology"""
+    value = parse_json_tolerant(content)
+    validator = RankingValidator(candidate_ids, limit)
+    validator.add_all(extract_entries(value))
+    return {
+        "rankings": validator.accepted,
+        "methodology": value.get("methodology") if isinstance(value, dict) else None,
+        "rejected": validator.rejected,
+        "structured": value is not None
+    }
+
+
+class RankingStreamParser:
+    """Incrementally parse a streamed ranking; each validated entry is returned as soon as it closes"""
+
+    def __init__(self, candidate_ids: Iterable[int], limit: Optional[int] = None):
+        self.parser = IncrementalJSONParser()
+        self.validator = RankingValidator(candidate_ids, limit)
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        return self.validator.add_all(self.parser.feed(chunk))
+
+    @property
+    def rankings(self) -> List[Dict[str, Any]]:
+        return self.validator.accepted
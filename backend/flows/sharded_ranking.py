@@ -0,0 +1,176 @@
+"""
+Sharded student ranking for SMART Connect
+Map-reduce ranking for large candidate pools: shards are ranked concurrently and only their winners advance
+"""
+import asyncio
+import re
+import time
+from typing import Callable, Dict, Any, List, Optional, Tuple, TYPE_CHECKING
+
+from ..ai_adapters.base import AIRequest, AITask
+from ..ai_adapters.token_budget import PromptSection, render_sections
+from .ranking_output import RANKING_JSON_SCHEMA, parse_ranking
+from ..core.config import settings
+
+if TYPE_CHECKING:
+    from .rank_students_flow import StudentRankingFlow, StudentProfile, ProjectRequirements, RankingCriteria
+
+import logging
+logger = logging.getLogger(__name__)
+
+# "ID: 12", "Student ID 12", "ID #12" ...
+ID_PATTERN = re.compile(r"\bID\b\D{0,12}?(\d+)", re.IGNORECASE)
+
+
+def extract_ranked_ids(content: str, candidate_ids: List[int]) -> List[int]:
+    """Candidate ids in the order the model first mentions them"""
+    candidates = set(candidate_ids)
+    ranked: List[int] = []
+    for match in ID_PATTERN.finditer(content):
+        student_id = int(match.group(1))
+        if student_id in candidates and student_id not in ranked:
+            ranked.append(student_id)
+    return ranked
+
+
+class ShardedRanker:
+    """
+    Tournament reduction of a large candidate pool.
+
+    The pool is split into shards of ``shard_size`` students that are ranked
+    concurrently (spread across providers); each shard's top students advance
+    to the next round until the pool fits a single prompt. Latency grows with
+    shard size and the number of rounds (logarithmic in cohort size), not with
+    the cohort itself.
+    """
+
+    def __init__(
+        self,
+        flow: "StudentRankingFlow",
+        shard_size: Optional[int] = None,
+        max_parallel_shards: Optional[int] = None
+    ):
+        self.flow = flow
+        self.shard_size = max(2, shard_size or settings.ranking_shard_size)
+        self.max_parallel_shards = max(1, max_parallel_shards or settings.ranking_max_parallel_shards)
+
+    def needs_sharding(self, students: List["StudentProfile"], shard_size: Optional[int] = None) -> bool:
+        return len(students) > self._shard_size(shard_size)
+
+    def _shard_size(self, shard_size: Optional[int]) -> int:
+        """The configured shard size, lowered to ``shard_size`` when a prompt cannot hold more"""
+        return self.shard_size if shard_size is None else max(2, min(self.shard_size, shard_size))
+
+    async def select_finalists(
+        self,
+        students: List["StudentProfile"],
+        project: Optional["ProjectRequirements"],
+        criteria: "RankingCriteria",
+        limit: int,
+        deadline: Optional[float] = None,
+        shard_size: Optional[int] = None,
+        build_sections: Optional[Callable[[List["StudentProfile"], int], List[PromptSection]]] = None,
+        task: AITask = AITask.STUDENT_RANKING
+    ) -> Tuple[List["StudentProfile"], Dict[str, Any]]:
+        """Reduce the pool to at most ``shard_size`` finalists (or ``limit`` if larger).
+
+        ``shard_size`` lowers the configured size (e.g. to what fits the prompt
+        budget); ``build_sections(shard, advance)`` and ``task`` replace the
+        project ranking prompt for other kinds of ranking.
+        Raises RuntimeError if a shard cannot be ranked by any provider.
+        """
+        start_time = time.time()
+        semaphore = asyncio.Semaphore(self.max_parallel_shards)
+        size = self._shard_size(shard_size)
+        if build_sections is None:
+            def build_sections(shard, advance):
+                return self.flow._build_ranking_sections(shard, project, criteria, advance)
+        pool = list(students)
+        stats = {"rounds": 0, "shards": 0, "cost": 0.0, "providers": {}, "shard_size": size}
+
+        while len(pool) > max(size, limit):
+            shards = [pool[i:i + size] for i in range(0, len(pool), size)]
+            # Each shard advances half its students, or its share of ``limit`` (rounded
+            # up) when that is more, so the next round never holds fewer than ``limit``
+            quotas = [
+                min(len(shard), max(1, len(shard) // 2, -(-limit * len(shard) // len(pool))))
+                for shard in shards
+            ]
+            # Rounding up can leave a round with nothing to cut; take one more from
+            # the largest quotas so every round shrinks the pool (never below ``limit``,
+            # as the pool is larger than that)
+            while sum(quotas) >= len(pool):
+                largest = max(range(len(quotas)), key=lambda i: quotas[i])
+                quotas[largest] -= 1
+
+            async def rank_shard(index: int, shard: List["StudentProfile"]):
+                async with semaphore:
+                    return await self._rank_shard(index, shard, build_sections, task, quotas[index], deadline)
+
+            tasks = [asyncio.create_task(rank_shard(i, shard)) for i, shard in enumerate(shards)]
+            try:
+                results = await asyncio.gather(*tasks)
+            except BaseException:
+                # Do not leave sibling shards calling providers after one failed
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                raise
+
+            # Interleave winners by shard rank so the strongest candidates lead the
+            # next round's prompts (and are the last to be trimmed from them)
+            winners = [shard_winners for shard_winners, _ in results]
+            pool = [
+                shard_winners[rank]
+                for rank in range(max(quotas))
+                for shard_winners in winners
+                if rank < len(shard_winners)
+            ]
+
+            stats["rounds"] += 1
+            stats["shards"] += len(shards)
+            for _, response in results:
+                stats["cost"] += response.cost
+                stats["providers"][response.provider] = stats["providers"].get(response.provider, 0) + 1
+
+        stats["candidates"] = len(students)
+        stats["finalists"] = len(pool)
+        stats["processing_time"] = time.time() - start_time
+        logger.info(
+            f"Sharded ranking reduced {len(students)} students to {len(pool)} finalists "
+            f"in {stats['rounds']} rounds ({stats['shards']} shards)"
+        )
+        return pool, stats
+
+    async def _rank_shard(
+        self,
+        index: int,
+        shard: List["StudentProfile"],
+        build_sections: Callable[[List["StudentProfile"], int], List[PromptSection]],
+        task: AITask,
+        advance: int,
+        deadline: Optional[float] = None
+    ):
+        sections = build_sections(shard, advance)
+        ai_request = AIRequest(
+            task=task,
+            prompt=render_sections(sections),
+            sections=sections,
+            context={"shard": index, "student_count": len(shard), "limit": advance},
+            max_tokens=min(3000, 150 * advance + 300),
+            temperature=0.3,
+            metadata={"spread_index": index},
+            json_schema=RANKING_JSON_SCHEMA,
+            deadline=deadline
+        )
+        response = await self.flow.ai_manager.generate_response(ai_request)
+        if response.error:
+            raise RuntimeError(f"Ranking shard {index} failed: {response.error}")
+
+        by_id = {student.id: student for student in shard}
+        ranked_ids = [entry["student_id"] for entry in parse_ranking(response.content, list(by_id), advance)["rankings"]]
+        if not ranked_ids:
+            ranked_ids = extract_ranked_ids(response.content, list(by_id))
+        # Students the model did not mention keep their input order behind the ranked ones
+        ranked_ids += [student.id for student in shard if student.id not in ranked_ids]
+        return [by_id[student_id] for student_id in ranked_ids[:advance]], response
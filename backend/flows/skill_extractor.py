@@ -0,0 +1,389 @@
+"""
+Local skill extraction for SMART Connect
+One-pass resume scanning with a combined regex compiled from config/skill_extraction.json, batched over a process pool
+"""
+import asyncio
+import json
+import re
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Iterable, Tuple
+
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..core.database import SessionLocal
+from ..models.student import Student
+from .job_queue import ai_job_queue
+from .ranking_engine import load_ranking_config, normalize_skill, ranking_engine
+from .ranking_index import ranking_index
+from .skill_match_cache import skill_match_cache
+from .skill_matrix import skill_matrix
+
+import logging
+logger = logging.getLogger(__name__)
+
+CONFIG_PATH = Path(__file__).resolve().parent.parent / "config" / "skill_extraction.json"
+
+CONTEXT_WINDOW = 80    # Characters before a skill (in the same sentence) searched for indicators, context keywords and levels
+SNIPPET_RADIUS = 40    # Characters either side of a mention kept as context
+MAX_SNIPPETS = 3
+AMBIGUOUS_PENALTY = 0.6  # Confidence factor for one- and two-letter skills ("C", "R", "Go") outside a skills section
+
+EXPERIENCE_LEVELS = ("beginner", "intermediate", "advanced", "expert")
+LEVEL_WORDS = {
+    "beginner": "beginner", "basic": "beginner", "novice": "beginner",
+    "intermediate": "intermediate",
+    "advanced": "advanced", "proficient": "advanced",
+    "expert": "expert"
+}
+# Indicator phrases that also say how well the skill is known
+INDICATOR_LEVELS = {
+    "familiar with": "beginner",
+    "knowledge of": "intermediate",
+    "proficient in": "advanced",
+    "skilled in": "advanced",
+    "competent in": "advanced",
+    "expertise in": "expert"
+}
+
+
+@lru_cache(maxsize=4)
+def load_extraction_config(path: str = str(CONFIG_PATH)) -> Dict[str, Any]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """Regex alternation for ``words`` factored into a trie, so the engine
+    follows shared prefixes once instead of trying every word in turn."""
+    trie: Dict[str, Any] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: Dict[str, Any]) -> str:
+        ends = "" in node
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if ends:
+            return "(?:" + body + ")?"
+        return body
+
+    return build(trie)
+
+
+def _years_level(years: int) -> str:
+    if years < 1:
+        return "beginner"
+    if years < 3:
+        return "intermediate"
+    if years < 5:
+        return "advanced"
+    return "expert"
+
+
+class SkillExtractor:
+    """
+    Extract skills from resume text without a provider call.
+
+    The categories' skills, section headers, indicator phrases, context
+    keywords and experience-level cues are compiled into one regex with a
+    named group per kind, so a resume is scanned in a single ``finditer``
+    pass. Skill names are matched case-insensitively, except one- and
+    two-letter names, which must match their listed case.
+
+    Confidence follows ``scoring_algorithm``: the base weight plus
+    frequency, context and section bonuses, scaled so a mention inside a
+    skills section with a context keyword scores 1.0. ``weight`` applies the
+    experience multiplier. Skills under ``confidence_thresholds.minimum``
+    are dropped.
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        self.config = config or load_extraction_config()
+        scoring = self.config["scoring_algorithm"]
+        self.base_weight = scoring["base_weight"]
+        self.frequency_multiplier = scoring["frequency_multiplier"]
+        self.context_bonus = scoring["context_bonus"]
+        self.section_bonus = scoring["section_bonus"]
+        self.experience_multiplier = scoring["experience_multiplier"]
+        self.thresholds = self.config["confidence_thresholds"]
+        validation = self.config.get("validation_rules", {})
+        self.minimum_confidence = max(self.thresholds["minimum"], validation.get("minimum_confidence", 0.0))
+        self.max_skills = validation.get("maximum_skills_per_resume", 100)
+        self.required_categories = validation.get("required_categories", [])
+
+        self.category_weights = {name: category["weight"] for name, category in self.config["categories"].items()}
+        self.skills: Dict[str, Tuple[str, str]] = {}   # lowercase -> (canonical name, category)
+        for category, definition in self.config["categories"].items():
+            for skill in definition["skills"]:
+                self.skills.setdefault(skill.lower(), (skill, category))
+
+        self.pattern = self._compile()
+
+    def _compile(self) -> "re.Pattern":
+        patterns = self.config["extraction_patterns"]
+        ambiguous = [name for name, _ in self.skills.values() if len(name) <= 2 and name.isalpha()]
+        regular = [key for key, (name, _) in self.skills.items() if name not in ambiguous]
+        indicators = set(patterns["skill_indicators"]) | set(INDICATOR_LEVELS)
+
+        skill_alternatives = [_trie_pattern(regular)]
+        if ambiguous:
+            skill_alternatives.append("(?-i:" + _trie_pattern(ambiguous) + ")")
+
+        return re.compile(
+            "|".join([
+                r"(?P<header>^[ \t]*[#*\-•]*[ \t]*(?:" + _trie_pattern(h.lower() for h in patterns["section_headers"]) + r")[ \t]*(?::|$))",
+                r"(?P<paragraph>\n[ \t]*\n)",
+                r"(?P<sentence>\n|[.;!?](?=\s))",
+                r"(?P<years>\b\d{1,2})\+?[ \t]*(?:years?|yrs?)\b",
+                r"\b(?P<level>" + _trie_pattern(LEVEL_WORDS) + r")\b",
+                r"\b(?P<indicator>" + _trie_pattern(i.lower() for i in indicators) + r")\b",
+                r"\b(?P<context>" + _trie_pattern(c.lower() for c in patterns["context_keywords"]) + r")\b",
+                r"(?<![\w.#+/-])(?P<skill>" + "|".join(skill_alternatives) + r")(?![\w#+])"
+            ]),
+            re.IGNORECASE | re.MULTILINE
+        )
+
+    def extract(self, text: str) -> Dict[str, Any]:
+        """Skills and summary in the config's ``output_format``"""
+        text = text or ""
+        found: Dict[str, Dict[str, Any]] = {}
+        in_section = False
+        last_cue = -CONTEXT_WINDOW - 1       # End of the last indicator or context keyword
+        last_level: Tuple[int, Optional[str]] = (-CONTEXT_WINDOW - 1, None)
+
+        for match in self.pattern.finditer(text):
+            kind = match.lastgroup
+            if kind == "header":
+                in_section = True
+            elif kind == "paragraph":
+                in_section = False
+                last_cue, last_level = -CONTEXT_WINDOW - 1, (-CONTEXT_WINDOW - 1, None)
+            elif kind == "sentence":
+                # Cues and levels describe skills in their own line or sentence only
+                last_cue, last_level = -CONTEXT_WINDOW - 1, (-CONTEXT_WINDOW - 1, None)
+            elif kind == "years":
+                last_level = (match.end(), _years_level(int(match.group("years"))))
+            elif kind == "level":
+                last_level = (match.end(), LEVEL_WORDS[match.group("level").lower()])
+            elif kind in ("indicator", "context"):
+                last_cue = match.end()
+                implied = INDICATOR_LEVELS.get(match.group(kind).lower())
+                if implied:
+                    last_level = (match.end(), implied)
+            elif kind == "skill":
+                name, category = self.skills[match.group("skill").lower()]
+                start = match.start()
+                entry = found.get(name)
+                if entry is None:
+                    entry = found[name] = {
+                        "name": name, "category": category, "frequency": 0,
+                        "in_section": False, "has_context": False, "level": None, "context": []
+                    }
+                entry["frequency"] += 1
+                entry["in_section"] |= in_section
+                entry["has_context"] |= start - last_cue <= CONTEXT_WINDOW
+                if start - last_level[0] <= CONTEXT_WINDOW and last_level[1]:
+                    if entry["level"] is None or EXPERIENCE_LEVELS.index(last_level[1]) > EXPERIENCE_LEVELS.index(entry["level"]):
+                        entry["level"] = last_level[1]
+                if len(entry["context"]) < MAX_SNIPPETS:
+                    snippet = " ".join(text[max(0, start - SNIPPET_RADIUS):match.end() + SNIPPET_RADIUS].split())
+                    entry["context"].append(snippet)
+
+        return self._score(found)
+
+    def _score(self, found: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        full_score = self.base_weight + self.context_bonus + self.section_bonus
+        skills = []
+        for entry in found.values():
+            score = (
+                self.base_weight
+                + self.frequency_multiplier * (entry["frequency"] - 1)
+                + (self.context_bonus if entry["has_context"] else 0.0)
+                + (self.section_bonus if entry["in_section"] else 0.0)
+            )
+            confidence = min(1.0, score / full_score)
+            if len(entry["name"]) <= 2 and not entry["in_section"]:
+                confidence *= AMBIGUOUS_PENALTY
+            if confidence < self.minimum_confidence:
+                continue
+            level = entry["level"] or "intermediate"
+            skills.append({
+                "name": entry["name"],
+                "category": entry["category"],
+                "confidence": round(confidence, 2),
+                "confidence_level": self.confidence_level(confidence),
+                "experience_level": level.capitalize(),
+                "context": entry["context"],
+                "frequency": entry["frequency"],
+                "weight": round(score * self.experience_multiplier.get(level, 1.0), 3)
+            })
+
+        skills.sort(key=lambda skill: (-skill["confidence"], -skill["weight"], skill["name"]))
+        skills = skills[:self.max_skills]
+        return {"skills": skills, "summary": self._summary(skills)}
+
+    def confidence_level(self, confidence: float) -> str:
+        for level in ("high", "medium", "low"):
+            if confidence >= self.thresholds[level]:
+                return level
+        return "minimum"
+
+    def _summary(self, skills: List[Dict[str, Any]]) -> Dict[str, Any]:
+        best_by_category: Dict[str, float] = defaultdict(float)
+        for skill in skills:
+            best_by_category[skill["category"]] = max(best_by_category[skill["category"]], skill["confidence"])
+        total_weight = sum(self.category_weights.values()) or 1.0
+        overall = sum(self.category_weights.get(category, 0.0) * confidence for category, confidence in best_by_category.items())
+
+        recommendations = [
+            f"Add {category.replace('_', ' ')} to the resume"
+            for category in self.required_categories if category not in best_by_category
+        ]
+        if skills and not any(skill["confidence_level"] == "high" for skill in skills):
+            recommendations.append("List key skills in a dedicated Skills section")
+
+        return {
+            "total_skills": len(skills),
+            "high_confidence_skills": sum(1 for skill in skills if skill["confidence_level"] == "high"),
+            "top_categories": sorted(best_by_category, key=lambda category: -sum(
+                skill["weight"] for skill in skills if skill["category"] == category
+            ))[:3],
+            "overall_score": round(100 * overall / total_weight, 1),
+            "recommendations": recommendations
+        }
+
+
+def skills_profile(result: Dict[str, Any], min_confidence: Optional[float] = None) -> Dict[str, int]:
+    """Extracted skills as a Student.skills dict (name -> level 1-5)"""
+    level_scores = load_ranking_config()["ranking_criteria"]["technical_skills"]["factors"]["programming_languages"]["scoring"]
+    threshold = min_confidence if min_confidence is not None else load_extraction_config()["confidence_thresholds"]["medium"]
+    return {
+        skill["name"]: int(level_scores.get(skill["experience_level"].lower(), 3))
+        for skill in result["skills"]
+        if skill["confidence"] >= threshold
+    }
+
+
+# Process pool batches: each worker process compiles the extractor once
+
+_worker_extractor: Optional[SkillExtractor] = None
+
+
+def _extract_chunk(texts: List[str]) -> List[Dict[str, Any]]:
+    global _worker_extractor
+    if _worker_extractor is None:
+        _worker_extractor = SkillExtractor()
+    return [_worker_extractor.extract(text) for text in texts]
+
+
+async def extract_batch(texts: List[str], executor: Optional[ProcessPoolExecutor] = None) -> List[Dict[str, Any]]:
+    """Extract skills from many texts across a process pool, preserving order"""
+    if not texts:
+        return []
+    chunk_size = settings.skill_extraction_chunk_size
+    chunks = [texts[start:start + chunk_size] for start in range(0, len(texts), chunk_size)]
+    if executor is None and len(chunks) == 1:
+        return await asyncio.to_thread(_extract_chunk, texts)
+
+    loop = asyncio.get_running_loop()
+    owned = executor is None
+    executor = executor or ProcessPoolExecutor(max_workers=settings.skill_extraction_workers or None)
+    try:
+        results = await asyncio.gather(*(loop.run_in_executor(executor, _extract_chunk, chunk) for chunk in chunks))
+    finally:
+        if owned:
+            executor.shutdown(wait=False, cancel_futures=True)
+    return [result for chunk in results for result in chunk]
+
+
+# Global extractor instance for single requests
+skill_extractor = SkillExtractor()
+
+
+# Background job: re-extract skills from stored resumes (see job_queue.AIJobQueue)
+
+def skill_extraction_job_payload(student_ids: Optional[List[int]], update_profiles: bool) -> Dict[str, Any]:
+    return {"student_ids": student_ids, "update_profiles": update_profiles}
+
+
+async def _run_skill_extraction_job(payload: Dict[str, Any]) -> Dict[str, Any]:
+    student_ids = payload.get("student_ids")
+    page_size = settings.skill_extraction_chunk_size * max(1, settings.skill_extraction_workers or 4)
+    processed = updated = 0
+    skills_found = 0
+    last_id = 0
+
+    executor = ProcessPoolExecutor(max_workers=settings.skill_extraction_workers or None)
+    db = SessionLocal()
+    try:
+        while True:
+            query = db.query(Student).filter(Student.resume_text.isnot(None), Student.user_id > last_id)
+            if student_ids:
+                query = query.filter(Student.user_id.in_(student_ids))
+            students = await asyncio.to_thread(lambda: query.order_by(Student.user_id).limit(page_size).all())
+            if not students:
+                break
+            last_id = students[-1].user_id
+
+            results = await extract_batch([student.resume_text for student in students], executor)
+            changed = []
+            for student, result in zip(students, results):
+                processed += 1
+                skills_found += len(result["skills"])
+                if not payload.get("update_profiles"):
+                    continue
+                merged = _merge_skills(student.skills, skills_profile(result))
+                if merged is not None:
+                    student.skills = merged
+                    changed.append(student)
+            if changed:
+                await asyncio.to_thread(db.commit)
+                updated += len(changed)
+                await asyncio.to_thread(_sync_students, db, changed)
+    finally:
+        db.close()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return {
+        "success": True,
+        "students_processed": processed,
+        "profiles_updated": updated,
+        "skills_found": skills_found
+    }
+
+
+def _sync_students(db: Session, students: List[Student]):
+    """Bring the in-memory skill and ranking indexes in step with committed profiles"""
+    for student in students:
+        approved = student.status == "Approved"
+        skill_matrix.sync_student(student.user_id, student.skills, approved)
+        skill_match_cache.invalidate_student(db, student.user_id, active=approved and bool(student.skills))
+        ranking_index.update_student(student)
+    ranking_engine.invalidate()
+
+
+def _merge_skills(current: Any, extracted: Dict[str, int]) -> Optional[Any]:
+    """Student.skills with extracted skills added (listed skills keep their level); None if unchanged"""
+    if isinstance(current, list):
+        present = {normalize_skill(skill) for skill in current}
+        additions = [name for name in extracted if normalize_skill(name) not in present]
+        return current + additions if additions else None
+    current = dict(current or {})
+    present = {normalize_skill(skill) for skill in current}
+    additions = {name: level for name, level in extracted.items() if normalize_skill(name) not in present}
+    if not additions:
+        return None
+    current.update(additions)
+    return current
+
+
+ai_job_queue.register("extract_skills", _run_skill_extraction_job)
@@ -0,0 +1,288 @@
+"""
+Skill matching cache for SMART Connect
+Batch-computed student/project match scores in skill_matching_cache, invalidated on change and recomputed lazily or by a sweep
+"""
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+
+from sqlalchemy import select, update, delete, or_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session, joinedload
+
+from ..core.config import settings
+from ..core.database import SessionLocal
+from ..models.project import Project
+from ..models.skill_match import SkillMatchCache
+from ..models.student import Student
+from .ranking_engine import normalize_skill, skill_levels
+from .skill_matrix import StudentSkillMatrix
+
+import logging
+logger = logging.getLogger(__name__)
+
+PREFERRED_SKILL_WEIGHT = 0.5   # Preferred skills count half as much as required ones
+MINIMUM_SKILLS = 3             # Skills a profile needs for full confidence (validation_rules)
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _skill_list(value: Any) -> List[str]:
+    if isinstance(value, list):
+        return [str(skill) for skill in value if skill]
+    return []
+
+
+class SkillMatchCacheService:
+    """
+    Student/project skill matches kept in skill_matching_cache.
+
+    A project's rows are computed in one batch on first use: the approved
+    students' skills go into a StudentSkillMatrix and every score comes out
+    of one cosine-similarity product against the project's required (and,
+    at half weight, preferred) skills. Later rankings read the
+    (project_id, is_valid, matching_score) index.
+
+    Saving a student marks their rows invalid (adding invalid rows for
+    projects they were never scored against); changing a project's skills
+    marks the project's rows invalid. Invalid rows, and rows older than
+    ``skill_match_cache_ttl``, are recomputed before a project is read and
+    by a periodic background sweep.
+    """
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self.computed = 0
+        self.sweeps = 0
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._sweep_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def rank_project(self, project_id: int, limit: int = 10, offset: int = 0) -> Optional[List[Dict[str, Any]]]:
+        """Students best matching a project, best first; None if the project does not exist"""
+        return await asyncio.to_thread(self._rank_project, project_id, limit, offset)
+
+    # Invalidation (called with the request's session, after its commit)
+
+    def invalidate_student(self, db: Session, student_id: int, active: bool):
+        """Mark a saved student's matches for recomputation, or drop them once inactive"""
+        try:
+            self.mark_students(db, {student_id: active})
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"Could not invalidate skill matches for student {student_id}: {e}")
+
+    def invalidate_project(self, db: Session, project_id: int):
+        """Mark a project's matches for recomputation after its skills changed"""
+        try:
+            self.mark_projects(db, [project_id])
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"Could not invalidate skill matches for project {project_id}: {e}")
+
+    def mark_students(self, db: Session, students: Dict[int, bool]):
+        """Invalidate the matches of active students and drop those of inactive ones
+        (``students`` maps id -> active); the caller commits"""
+        active = [student_id for student_id, is_active in students.items() if is_active]
+        inactive = [student_id for student_id, is_active in students.items() if not is_active]
+        if active:
+            project_ids = db.execute(select(SkillMatchCache.project_id).distinct()).scalars().all()
+            if project_ids:
+                statement = insert(SkillMatchCache).values([
+                    {"id": uuid.uuid4(), "student_id": student_id, "project_id": project_id, "matching_score": 0, "is_valid": False}
+                    for student_id in active
+                    for project_id in project_ids
+                ])
+                db.execute(statement.on_conflict_do_update(
+                    index_elements=["student_id", "project_id"],
+                    set_={"is_valid": False}
+                ))
+        if inactive:
+            db.execute(delete(SkillMatchCache).where(SkillMatchCache.student_id.in_(inactive)))
+
+    def mark_projects(self, db: Session, project_ids: Sequence[int]):
+        """Invalidate the matches of projects whose skills changed; the caller commits"""
+        if project_ids:
+            db.execute(update(SkillMatchCache).where(SkillMatchCache.project_id.in_(list(project_ids))).values(is_valid=False))
+
+    # Computation (worker threads)
+
+    def _rank_project(self, project_id: int, limit: int, offset: int) -> Optional[List[Dict[str, Any]]]:
+        db = SessionLocal()
+        try:
+            project = db.get(Project, project_id)
+            if project is None:
+                return None
+            self._refresh_project(db, project)
+
+            rows = db.execute(
+                select(SkillMatchCache, Student)
+                .join(Student, Student.user_id == SkillMatchCache.student_id)
+                .options(joinedload(Student.user))
+                .where(SkillMatchCache.project_id == project_id, SkillMatchCache.is_valid.is_(True))
+                .order_by(SkillMatchCache.matching_score.desc(), SkillMatchCache.student_id)
+                .offset(offset)
+                .limit(limit)
+            ).all()
+            return [
+                {
+                    "rank": offset + rank,
+                    "student_id": match.student_id,
+                    "name": student.user.full_name or "N/A",
+                    "email": student.user.email,
+                    "gpa": float(student.gpa) if student.gpa else None,
+                    "program": student.program,
+                    "score": float(match.matching_score),
+                    "matched_skills": match.skill_matches or [],
+                    "missing_skills": match.skill_gaps or [],
+                    "confidence": float(match.confidence_level or 0),
+                    "last_calculated": match.last_calculated
+                }
+                for rank, (match, student) in enumerate(rows, start=1)
+            ]
+        finally:
+            db.close()
+
+    def _refresh_project(self, db: Session, project: Project) -> int:
+        """Compute missing, invalid and expired rows of one project; returns rows written.
+
+        Pending rows are recomputed page by page (skill_match_batch_size * 10
+        students, committed per page) until none are left, so a read after a
+        project edit or a normalization pass sees every student.
+        """
+        has_rows = db.execute(
+            select(SkillMatchCache.id).where(SkillMatchCache.project_id == project.id).limit(1)
+        ).first() is not None
+
+        students = select(Student.user_id, Student.skills).where(Student.status == "Approved", Student.skills.isnot(None))
+        if not has_rows:
+            written = self._store(db, project, db.execute(students).all())
+            db.commit()
+            return written
+
+        stale = _now() - timedelta(seconds=settings.skill_match_cache_ttl)
+        pending = select(SkillMatchCache.student_id).where(
+            SkillMatchCache.project_id == project.id,
+            or_(SkillMatchCache.is_valid.is_(False), SkillMatchCache.last_calculated < stale)
+        ).order_by(SkillMatchCache.student_id)
+        written = 0
+        last_id = None
+        while True:
+            page = pending if last_id is None else pending.where(SkillMatchCache.student_id > last_id)
+            pending_ids = db.execute(page.limit(settings.skill_match_batch_size * 10)).scalars().all()
+            if not pending_ids:
+                return written
+            last_id = pending_ids[-1]
+            rows = db.execute(students.where(Student.user_id.in_(pending_ids))).all()
+            # Students no longer approved or without skills
+            gone = set(pending_ids) - {row.user_id for row in rows}
+            if gone:
+                db.execute(delete(SkillMatchCache).where(
+                    SkillMatchCache.project_id == project.id, SkillMatchCache.student_id.in_(list(gone))
+                ))
+            written += self._store(db, project, rows)
+            db.commit()
+
+    def _store(self, db: Session, project: Project, rows: Sequence[Tuple[int, Any]]) -> int:
+        required = _skill_list(project.required_skills)
+        preferred = _skill_list(project.preferred_skills)
+        results = self.compute_matches(rows, required, preferred)
+        now = _now()
+
+        for start in range(0, len(results), settings.skill_match_batch_size):
+            batch = [
+                {**result, "id": uuid.uuid4(), "project_id": project.id, "last_calculated": now, "is_valid": True}
+                for result in results[start:start + settings.skill_match_batch_size]
+            ]
+            statement = insert(SkillMatchCache).values(batch)
+            db.execute(statement.on_conflict_do_update(
+                index_elements=["student_id", "project_id"],
+                set_={
+                    column: statement.excluded[column]
+                    for column in ("matching_score", "skill_gaps", "skill_matches", "confidence_level", "last_calculated", "is_valid")
+                }
+            ))
+        self.computed += len(results)
+        return len(results)
+
+    @staticmethod
+    def compute_matches(rows: Sequence[Tuple[int, Any]], required: List[str], preferred: List[str]) -> List[Dict[str, Any]]:
+        """Match results for ``(student_id, skills)`` rows against a project's skills"""
+        if not rows:
+            return []
+        matrix = StudentSkillMatrix()
+        matrix.build(rows)
+        weights = {skill: PREFERRED_SKILL_WEIGHT for skill in preferred}
+        weights.update({skill: 1.0 for skill in required})
+        student_ids, scores = matrix.similarity(list(weights), weights)
+        score_of = dict(zip(student_ids.tolist(), scores.tolist()))
+
+        results = []
+        for student_id, skills in rows:
+            levels = skill_levels(skills, matrix.level_names)
+            matches = [skill for skill in required + preferred if normalize_skill(skill) in levels]
+            results.append({
+                "student_id": student_id,
+                "matching_score": round(min(1.0, score_of.get(student_id, 0.0)) * 100, 2),
+                "skill_matches": matches,
+                "skill_gaps": [skill for skill in required if normalize_skill(skill) not in levels],
+                "confidence_level": round(min(1.0, len(levels) / MINIMUM_SKILLS), 2)
+            })
+        return results
+
+    # Background sweep
+
+    async def _sweep_loop(self):
+        while True:
+            await asyncio.sleep(settings.skill_match_sweep_interval)
+            try:
+                written = await asyncio.to_thread(self.sweep)
+                if written:
+                    logger.info(f"Skill match sweep recomputed {written} rows")
+            except Exception as e:
+                logger.warning(f"Skill match sweep failed: {e}")
+
+    def sweep(self) -> int:
+        """Recompute invalid and expired rows of every cached project"""
+        stale = _now() - timedelta(seconds=settings.skill_match_cache_ttl)
+        db = SessionLocal()
+        try:
+            project_ids = db.execute(
+                select(SkillMatchCache.project_id).distinct()
+                .where(or_(SkillMatchCache.is_valid.is_(False), SkillMatchCache.last_calculated < stale))
+            ).scalars().all()
+            written = 0
+            for project_id in project_ids:
+                project = db.get(Project, project_id)
+                if project is not None:
+                    written += self._refresh_project(db, project)
+            self.sweeps += 1
+            return written
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "sweep_running": self._task is not None and not self._task.done(),
+            "computed": self.computed,
+            "sweeps": self.sweeps
+        }
+
+
+# Global cache service instance
+skill_match_cache = SkillMatchCacheService()
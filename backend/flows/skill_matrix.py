@@ -0,0 +1,253 @@
+"""
+Student skill matrix for SMART Connect
+Sparse (CSR) student x skill matrix for cosine-similarity skill matching, updated incrementally
+"""
+import threading
+import time
+from typing import Dict, Any, List, Optional, Iterable, Tuple
+
+import numpy as np
+
+from .ranking_engine import load_ranking_config, normalize_skill, skill_levels, MAX_SKILL_LEVEL
+from ..core.config import settings
+
+import logging
+logger = logging.getLogger(__name__)
+
+COMPACT_RATIO = 0.25   # Rebuild once this share of rows belongs to removed or replaced students
+COMPACT_MIN_ROWS = 256
+
+
+class StudentSkillMatrix:
+    """
+    Approved students' skills as an L2-normalized sparse matrix.
+
+    Rows are students and columns come from a skill vocabulary built from
+    Student.skills (names normalized, levels scaled to 0-1). The CSR arrays
+    (``indptr``, ``indices``, ``data``) are plain NumPy, so matching a
+    project is one sparse matrix-vector product: cosine similarity is the
+    dot product of each normalized row with the normalized requirement
+    vector.
+
+    Updates are incremental: a changed student's old row is retired and the
+    new row is appended on the next read, and the arrays are compacted once
+    retired rows pass ``COMPACT_RATIO``. They only cover writes made in this
+    process, so the matrix counts as expired ``skill_matrix_ttl`` seconds
+    after a build and is then rebuilt from the database, picking up what
+    other workers saved.
+    """
+
+    def __init__(self):
+        self.level_names = {
+            name: float(value)
+            for name, value in load_ranking_config()["ranking_criteria"]["technical_skills"]["factors"]
+            ["programming_languages"]["scoring"].items()
+        }
+        self.vocabulary: Dict[str, int] = {}
+        self.skill_keys: List[str] = []    # Normalized name per column
+        self.skill_names: List[str] = []   # Display name per column, as first seen
+        self.loaded = False
+        self.built_at = 0.0
+
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._indptr = np.zeros(1, dtype=np.int64)
+        self._indices = np.empty(0, dtype=np.int32)
+        self._data = np.empty(0, dtype=np.float64)
+        self._nnz_rows = np.empty(0, dtype=np.int64)  # Row of each stored value, for the product
+        self._row_ids = np.empty(0, dtype=np.int64)
+        self._active = np.empty(0, dtype=bool)
+        self._row_of: Dict[int, int] = {}
+        self._pending: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+        self._retired = 0
+
+    # Building and updates
+
+    def build(self, students: Iterable[Tuple[int, Any]]):
+        """Replace the matrix with ``(student_id, skills)`` pairs"""
+        with self._lock:
+            self._reset()
+            for student_id, skills in students:
+                self._stage(student_id, skills)
+            self._flush()
+            self.loaded = True
+            self.built_at = time.monotonic()
+        logger.info(f"Built skill matrix: {self.size} students x {len(self.vocabulary)} skills")
+
+    @property
+    def expired(self) -> bool:
+        """Not built yet, or built more than skill_matrix_ttl seconds ago"""
+        return not self.loaded or time.monotonic() - self.built_at > settings.skill_matrix_ttl
+
+    def upsert(self, student_id: int, skills: Any):
+        """Add or replace one student's row"""
+        with self._lock:
+            self._retire(student_id)
+            self._stage(student_id, skills)
+
+    def remove(self, student_id: int):
+        with self._lock:
+            self._retire(student_id)
+
+    def sync_student(self, student_id: int, skills: Any, approved: bool):
+        """Keep the matrix in step with a saved Student row (only approved students with skills are matched)"""
+        if not self.loaded:
+            return
+        if approved and skills:
+            self.upsert(student_id, skills)
+        else:
+            self.remove(student_id)
+
+    def _stage(self, student_id: int, skills: Any):
+        levels = skill_levels(skills, self.level_names)
+        if not levels:
+            return
+        display = dict(zip((normalize_skill(name) for name in skills), skills)) if isinstance(skills, (dict, list, tuple)) else {}
+        columns = np.fromiter((self._column(skill, display.get(skill, skill)) for skill in levels), dtype=np.int32, count=len(levels))
+        values = np.fromiter(levels.values(), dtype=np.float64, count=len(levels)) / MAX_SKILL_LEVEL
+        norm = np.linalg.norm(values)
+        if norm == 0:
+            return
+        order = np.argsort(columns)
+        self._pending[int(student_id)] = (columns[order], values[order] / norm)
+
+    def _column(self, skill: str, display_name: str) -> int:
+        column = self.vocabulary.get(skill)
+        if column is None:
+            column = self.vocabulary[skill] = len(self.skill_keys)
+            self.skill_keys.append(skill)
+            self.skill_names.append(str(display_name))
+        return column
+
+    def _retire(self, student_id: int):
+        student_id = int(student_id)
+        self._pending.pop(student_id, None)
+        row = self._row_of.pop(student_id, None)
+        if row is not None:
+            self._active[row] = False
+            self._retired += 1
+
+    def _flush(self):
+        """Append staged rows to the CSR arrays (and compact if needed); caller holds the lock"""
+        if self._pending:
+            pending = self._pending
+            self._pending = {}
+            first_row = len(self._row_ids)
+            lengths = np.fromiter((len(columns) for columns, _ in pending.values()), dtype=np.int64, count=len(pending))
+            self._indptr = np.concatenate([self._indptr, self._indptr[-1] + np.cumsum(lengths)])
+            self._indices = np.concatenate([self._indices, *(columns for columns, _ in pending.values())])
+            self._data = np.concatenate([self._data, *(values for _, values in pending.values())])
+            self._nnz_rows = np.concatenate([self._nnz_rows, np.repeat(np.arange(first_row, first_row + len(pending)), lengths)])
+            self._row_ids = np.concatenate([self._row_ids, np.fromiter(pending.keys(), dtype=np.int64, count=len(pending))])
+            self._active = np.concatenate([self._active, np.ones(len(pending), dtype=bool)])
+            for offset, student_id in enumerate(pending):
+                self._row_of[student_id] = first_row + offset
+
+        rows = len(self._row_ids)
+        if self._retired and rows >= COMPACT_MIN_ROWS and self._retired > COMPACT_RATIO * rows:
+            self._compact()
+
+    def _compact(self):
+        keep = np.flatnonzero(self._active)
+        lengths = np.diff(self._indptr)[keep]
+        value_mask = self._active[self._nnz_rows]
+        self._indices = self._indices[value_mask]
+        self._data = self._data[value_mask]
+        self._indptr = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+        self._nnz_rows = np.repeat(np.arange(len(keep)), lengths)
+        self._row_ids = self._row_ids[keep]
+        self._active = np.ones(len(keep), dtype=bool)
+        self._row_of = {int(student_id): row for row, student_id in enumerate(self._row_ids)}
+        self._retired = 0
+
+    @property
+    def size(self) -> int:
+        return len(self._row_of) + len(self._pending)
+
+    # Matching
+
+    def query_vector(self, required_skills: Iterable[str], skill_weights: Optional[Dict[str, float]] = None) -> Tuple[np.ndarray, float]:
+        """Dense requirement vector over the vocabulary and its full norm.
+
+        Required skills no student has are left out of the vector but kept in
+        the norm, so they still lower every student's similarity.
+        """
+        weights = {normalize_skill(skill): float(weight) for skill, weight in (skill_weights or {}).items()}
+        vector = np.zeros(len(self.skill_keys), dtype=np.float64)
+        norm_squared = 0.0
+        for skill in {normalize_skill(skill) for skill in required_skills} - {""}:
+            weight = max(0.0, weights.get(skill, 1.0))
+            norm_squared += weight * weight
+            column = self.vocabulary.get(skill)
+            if column is not None:
+                vector[column] = weight
+        return vector, float(np.sqrt(norm_squared))
+
+    def similarity(
+        self,
+        required_skills: Iterable[str],
+        skill_weights: Optional[Dict[str, float]] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Cosine similarity (0-1) of every student to the requirements, as (student_ids, scores)"""
+        with self._lock:
+            self._flush()
+            vector, norm = self.query_vector(required_skills, skill_weights)
+            if norm == 0:
+                return self._row_ids[self._active], np.zeros(int(self._active.sum()))
+            # Sparse matrix-vector product: each stored value times its column's weight, summed per row
+            scores = np.bincount(self._nnz_rows, weights=self._data * vector[self._indices], minlength=len(self._row_ids)) / norm
+            return self._row_ids[self._active], scores[self._active]
+
+    def top_matches(
+        self,
+        required_skills: List[str],
+        skill_weights: Optional[Dict[str, float]] = None,
+        limit: int = 10
+    ) -> List[Dict[str, Any]]:
+        """Best ``limit`` students by cosine similarity, with their matched and missing skills"""
+        student_ids, scores = self.similarity(required_skills, skill_weights)
+        limit = max(0, min(limit, len(scores)))
+        if limit == 0:
+            return []
+        rows = np.argpartition(-scores, limit - 1)[:limit] if limit < len(scores) else np.arange(len(scores))
+        rows = rows[np.lexsort((student_ids[rows], -scores[rows]))]
+
+        matches = []
+        for rank, row in enumerate(rows, start=1):
+            student_id = int(student_ids[row])
+            skills = self.student_skills(student_id)
+            matched = [skill for skill in required_skills if normalize_skill(skill) in skills]
+            matches.append({
+                "rank": rank,
+                "student_id": student_id,
+                "score": round(float(scores[row]) * 100, 2),
+                "matched_skills": matched,
+                "missing_skills": [skill for skill in required_skills if skill not in matched]
+            })
+        return matches
+
+    def student_skills(self, student_id: int) -> Dict[str, str]:
+        """Normalized -> display name of the skills in a student's row"""
+        with self._lock:
+            self._flush()
+            row = self._row_of.get(int(student_id))
+            if row is None:
+                return {}
+            columns = self._indices[self._indptr[row]:self._indptr[row + 1]]
+            return {self.skill_keys[column]: self.skill_names[column] for column in columns}
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "loaded": self.loaded,
+            "age": time.monotonic() - self.built_at if self.loaded else None,
+            "students": self.size,
+            "skills": len(self.vocabulary),
+            "stored_values": int(len(self._data)),
+            "retired_rows": self._retired
+        }
+
+
+# Global skill matrix instance
+skill_matrix = StudentSkillMatrix()
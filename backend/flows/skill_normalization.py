@@ -0,0 +1,128 @@
+"""
+Bulk skill normalization for SMART Connect
+Background job rewriting stored skills under the canonical names of core.skill_dictionary
+"""
+import asyncio
+from typing import Callable, Dict, Any, List, Optional
+
+from sqlalchemy.orm import Session, joinedload
+
+from ..core.database import SessionLocal
+from ..core.skill_dictionary import skill_dictionary
+from ..models.mentor import Mentor
+from ..models.project import Project
+from ..models.student import Student
+from .job_queue import ai_job_queue
+from .ranking_engine import ranking_engine
+from .ranking_index import ranking_index
+from .skill_match_cache import skill_match_cache
+from .skill_matrix import skill_matrix
+
+import logging
+logger = logging.getLogger(__name__)
+
+PAGE_SIZE = 500   # Rows loaded and committed at a time
+
+
+def skill_normalization_job_payload(dry_run: bool) -> Dict[str, Any]:
+    return {"dry_run": dry_run}
+
+
+def _sync_students(db: Session, students: List[Student]):
+    """Bring the in-memory indexes and the match cache in step with a page of rewritten students"""
+    active = {}
+    for student in students:
+        approved = student.status == "Approved"
+        skill_matrix.sync_student(student.user_id, student.skills, approved)
+        ranking_index.update_student(student)
+        active[student.user_id] = approved and bool(student.skills)
+    skill_match_cache.mark_students(db, active)
+    ranking_engine.invalidate()
+
+
+def _sync_projects(db: Session, projects: List[Project]):
+    """Invalidate matches and ranking contexts of a page of rewritten projects"""
+    project_ids = [project.id for project in projects]
+    skill_match_cache.mark_projects(db, project_ids)
+    for project_id in project_ids:
+        ranking_index.invalidate_project(project_id)
+
+
+# Model, primary key column, its skill columns, relationships the sync reads and the sync for changed rows
+SKILL_COLUMNS = (
+    (Student, Student.user_id, ("skills",), (Student.user,), _sync_students),
+    (Mentor, Mentor.user_id, ("skills",), (), None),
+    (Project, Project.id, ("required_skills", "preferred_skills"), (), _sync_projects)
+)
+
+
+def _normalize_table(
+    db: Session,
+    model,
+    key,
+    columns,
+    dry_run: bool,
+    eager=(),
+    sync: Optional[Callable[[Session, List[Any]], None]] = None
+) -> int:
+    """Rewrite one table's skill columns page by page; returns the number of changed rows.
+
+    ``sync`` runs on each page's changed rows before the page is committed,
+    in the same transaction, and the session is emptied between pages so
+    memory and identity-map size stay bounded by PAGE_SIZE.
+    """
+    changed = 0
+    last_key = None
+    while True:
+        query = db.query(model).options(*(joinedload(relationship) for relationship in eager)).order_by(key)
+        if last_key is not None:
+            query = query.filter(key > last_key)
+        rows = query.limit(PAGE_SIZE).all()
+        if not rows:
+            return changed
+        last_key = getattr(rows[-1], key.key)
+
+        page_changed = []
+        for row in rows:
+            updates = {}
+            for column in columns:
+                value = getattr(row, column)
+                if value:
+                    normalized = skill_dictionary.normalize_skills(value)
+                    if normalized != value:
+                        updates[column] = normalized
+            if updates:
+                page_changed.append(row)
+                if not dry_run:
+                    for column, normalized in updates.items():
+                        setattr(row, column, normalized)
+        if page_changed and not dry_run:
+            if sync is not None:
+                sync(db, page_changed)
+            db.commit()
+        changed += len(page_changed)
+        db.expunge_all()
+
+
+def normalize_stored_skills(dry_run: bool = False) -> Dict[str, Any]:
+    """Normalize every stored skill list; keeps the skill matrix and match cache in step"""
+    db = SessionLocal()
+    try:
+        counts = {}
+        for model, key, columns, eager, sync in SKILL_COLUMNS:
+            counts[model.__tablename__] = _normalize_table(db, model, key, columns, dry_run, eager, sync)
+        return {"success": True, "dry_run": dry_run, "rows_changed": counts}
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+async def _run_skill_normalization_job(payload: Dict[str, Any]) -> Dict[str, Any]:
+    result = await asyncio.to_thread(normalize_stored_skills, bool(payload.get("dry_run")))
+    logger.info(f"Skill normalization changed {result['rows_changed']}")
+    return result
+
+
+ai_job_queue.register("normalize_skills", _run_skill_normalization_job)
@@ -16,6 +16,8 @@ from backend.core.config import settings
 from backend.core.database import create_tables, check_db_connection
 
 from backend.ai_adapters.manager import ai_manager
+from backend.flows.job_queue import ai_job_queue
+from backend.flows.skill_match_cache import skill_match_cache
 
 # Import routers
 from backend.api.v1.endpoints.auth import router as auth_router
@@ -23,6 +25,8 @@ from backend.api.v1.endpoints.students import router as students_router
 from backend.api.v1.endpoints.rank_students import router as ranking_router
 from backend.api.v1.endpoints.search import router as search_router
 from backend.api.v1.endpoints.filters import router as filters_router
+from backend.api.v1.endpoints.skills import router as skills_router
+from backend.api.v1.endpoints.jobs import router as jobs_router
 
 # Configure logging
 logging.basicConfig(
@@ -52,7 +56,8 @@ async def lifespan(app: FastAPI):
         logger.error(f"Error creating database tables: {e}")
         raise
     
-    # Check AI providers
+    # Probe AI providers and keep their status fresh in the background
+    await ai_manager.start()
     provider_status = ai_manager.get_provider_status()
     available_providers = [name for name, status in provider_status.items() if status["available"]]
     logger.info(f"Available AI providers: {available_providers}")
@@ -60,12 +65,21 @@ async def lifespan(app: FastAPI):
     if not available_providers:
         logger.warning("No AI providers available! Some features may not work.")
     
+    # Background workers for queued AI jobs
+    await ai_job_queue.start()
+    
+    # Background recompute of invalidated skill matches
+    await skill_match_cache.start()
+    
     logger.info("SMART Connect API started successfully")
     
     yield
     
     # Shutdown
     logger.info("Shutting down SMART Connect API...")
+    await skill_match_cache.stop()
+    await ai_job_queue.stop()
+    await ai_manager.shutdown()
 
 
 # Create FastAPI application
@@ -138,7 +152,7 @@ async def global_exception_handler(request: Request, exc: Exception):
     )
 
 
-# Health check endpoint
+# Health check endpoint (liveness)
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
@@ -171,6 +185,27 @@ async def health_check():
     }
 
 
+# Readiness endpoint
+@app.get("/ready")
+async def readiness_check():
+    """Readiness check: database reachable and AI providers warmed up"""
+    
+    db_status = check_db_connection()
+    ai_readiness = ai_manager.get_readiness()
+    warming_up = [name for name, state in ai_readiness.items() if state["warming_up"]]
+    is_ready = db_status and not warming_up and any(state["available"] for state in ai_readiness.values())
+    
+    return JSONResponse(
+        status_code=200 if is_ready else 503,
+        content={
+            "ready": is_ready,
+            "database": db_status,
+            "ai_providers": ai_readiness,
+            "warming_up": warming_up
+        }
+    )
+
+
 # Root endpoint
 @app.get("/")
 async def root():
@@ -189,6 +224,8 @@ app.include_router(students_router, prefix="/api/v1")
 app.include_router(ranking_router, prefix="/api/v1")
 app.include_router(search_router, prefix="/api/v1")
 app.include_router(filters_router, prefix="/api/v1")
+app.include_router(skills_router, prefix="/api/v1")
+app.include_router(jobs_router, prefix="/api/v1")
 
 
 # Additional API endpoints for other entities
@@ -236,11 +273,22 @@ async def get_ai_costs():
     return ai_manager.get_cost_summary()
 
 
+# AI admission queue metrics endpoint
+@app.get("/api/v1/ai/queues")
+async def get_ai_queues():
+    """Get per-provider queue depth, in-flight requests and wait times"""
+    return ai_manager.get_admission_metrics()
+
+
 # AI provider status endpoint
 @app.get("/api/v1/ai/providers")
 async def get_ai_providers():
-    """Get AI provider status and capabilities"""
-    return ai_manager.get_provider_status()
+    """Get AI provider status, the live routing table and background job counters"""
+    return {
+        "providers": ai_manager.get_provider_status(),
+        "routing": ai_manager.get_routing_table(),
+        "jobs": ai_job_queue.get_status()
+    }
 
 
 if __name__ == "__main__":
@@ -0,0 +1,30 @@
+"""
+AI cost tracking model for SMART Connect
+Aggregated AI usage and cost per day, provider, model and operation
+"""
+import uuid
+
+from sqlalchemy import Column, Integer, String, Date, Numeric, DateTime, func
+from sqlalchemy.dialects.postgresql import UUID
+
+from ..core.database import Base
+
+
+class AICostRecord(Base):
+    __tablename__ = "ai_cost_tracking"
+    __table_args__ = {"schema": "capstone"}
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    date = Column(Date, nullable=False, index=True)
+    provider = Column(String(50), nullable=False, index=True)
+    model = Column(String(100), nullable=False)
+    operation_type = Column(String(100), nullable=False, index=True)
+    tokens_used = Column(Integer, default=0)
+    cost_usd = Column(Numeric(10, 6), default=0.0)
+    request_count = Column(Integer, default=1)
+    average_response_time_ms = Column(Integer, default=0)
+    success_rate = Column(Numeric(5, 2), default=100.0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    def __repr__(self):
+        return f"<AICostRecord(date={self.date}, provider='{self.provider}', cost_usd={self.cost_usd})>"
@@ -0,0 +1,32 @@
+"""
+AI job model for SMART Connect
+Background AI tasks (rankings, reports) with their payload, status and result
+"""
+import uuid
+
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, func
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+
+from ..core.database import Base
+
+
+class AIJob(Base):
+    __tablename__ = "ai_jobs"
+    __table_args__ = {"schema": "capstone"}
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    job_type = Column(String(50), nullable=False)
+    status = Column(String(20), nullable=False, default="queued", index=True)  # queued, running, succeeded, failed
+    payload = Column(JSONB, nullable=False)
+    result = Column(JSONB)
+    error = Column(Text)
+    attempts = Column(Integer, default=0)
+    next_attempt_at = Column(DateTime(timezone=True))  # Retry backoff: not claimed before this
+    created_by = Column(Integer, ForeignKey("capstone.users.id", ondelete="SET NULL"))
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True))
+    finished_at = Column(DateTime(timezone=True))
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<AIJob(id={self.id}, job_type='{self.job_type}', status='{self.status}')>"
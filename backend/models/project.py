@@ -3,6 +3,7 @@ Project model for SMART Connect
 Project information and student/mentor assignments
 """
 from sqlalchemy import Column, Integer, String, Text, Date, ForeignKey
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 
 from ..core.database import Base
@@ -19,6 +20,9 @@ class Project(Base):
     status = Column(String(20), default="Not Assigned")  # Not Assigned, Ongoing, Completed
     start_date = Column(Date)
     completion_date = Column(Date)
+    required_skills = Column(JSONB, default=list)   # ["Python", "Machine Learning", ...]
+    preferred_skills = Column(JSONB, default=list)
+    max_students = Column(Integer, default=1, nullable=False)   # Team size for student assignment
 
     # Relationships
     company = relationship("Company", back_populates="projects")
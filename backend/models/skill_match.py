@@ -0,0 +1,33 @@
+"""
+Skill matching cache model for SMART Connect
+Precomputed student/project skill match scores, gaps and matches
+"""
+import uuid
+
+from sqlalchemy import Column, Integer, Numeric, Boolean, DateTime, ForeignKey, Index, UniqueConstraint, func
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+
+from ..core.database import Base
+
+
+class SkillMatchCache(Base):
+    __tablename__ = "skill_matching_cache"
+    __table_args__ = (
+        UniqueConstraint("student_id", "project_id"),
+        # Project rankings are reads of this index in score order
+        Index("idx_skill_cache_project_score", "project_id", "is_valid", "matching_score"),
+        {"schema": "capstone"}
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    student_id = Column(Integer, ForeignKey("capstone.users.id", ondelete="CASCADE"), nullable=False, index=True)
+    project_id = Column(Integer, ForeignKey("capstone.projects.id", ondelete="CASCADE"), nullable=False)
+    matching_score = Column(Numeric(5, 2), nullable=False)  # 0-100
+    skill_gaps = Column(JSONB, default=list)      # Required skills the student lacks
+    skill_matches = Column(JSONB, default=list)   # Required and preferred skills the student has
+    confidence_level = Column(Numeric(3, 2), default=0.0)
+    last_calculated = Column(DateTime(timezone=True), server_default=func.now())
+    is_valid = Column(Boolean, default=True, index=True)
+
+    def __repr__(self):
+        return f"<SkillMatchCache(student_id={self.student_id}, project_id={self.project_id}, matching_score={self.matching_score})>"
@@ -0,0 +1,88 @@
+-- Database Migration: Project Skill Requirements, Team Size and Skill Matching Cache Keys
+-- Version: 1.2.0
+-- Date: 2026-10-19
+
+SET search_path TO capstone;
+
+-- Skill requirements read by the ranking, matching and assignment endpoints
+ALTER TABLE projects ADD COLUMN IF NOT EXISTS required_skills JSONB DEFAULT '[]';
+ALTER TABLE projects ADD COLUMN IF NOT EXISTS preferred_skills JSONB DEFAULT '[]';
+UPDATE projects SET required_skills = '[]' WHERE required_skills IS NULL;
+UPDATE projects SET preferred_skills = '[]' WHERE preferred_skills IS NULL;
+
+-- Team size used as the project's capacity by student-project assignment
+ALTER TABLE projects ADD COLUMN IF NOT EXISTS max_students INTEGER DEFAULT 1 NOT NULL;
+
+-- Recreate the skill matching cache keyed like the application models:
+-- integer student (users.id) and project ids instead of UUIDs. The table only
+-- holds derived scores, which are recomputed on first use. CASCADE drops the
+-- project_recommendations view built on the old UUID keys; it is recreated below.
+DROP TABLE IF EXISTS skill_matching_cache CASCADE;
+
+CREATE TABLE skill_matching_cache (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    student_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    project_id INTEGER NOT NULL REFERENCES projects(id) ON DELETE CASCADE,
+    matching_score NUMERIC(5,2) NOT NULL,
+    skill_gaps JSONB DEFAULT '[]',
+    skill_matches JSONB DEFAULT '[]',
+    confidence_level NUMERIC(3,2) DEFAULT 0.0,
+    last_calculated TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    is_valid BOOLEAN DEFAULT true,
+    UNIQUE(student_id, project_id)
+);
+
+CREATE INDEX IF NOT EXISTS ix_capstone_skill_matching_cache_student_id ON skill_matching_cache(student_id);
+CREATE INDEX IF NOT EXISTS ix_capstone_skill_matching_cache_is_valid ON skill_matching_cache(is_valid);
+CREATE INDEX IF NOT EXISTS idx_skill_cache_project_score ON skill_matching_cache(project_id, is_valid, matching_score);
+
+-- Project matching recommendations (as in 001_ai_optimization.sql), on the new keys
+CREATE OR REPLACE VIEW project_recommendations AS
+SELECT 
+    p.id as project_id,
+    p.title,
+    p.company_id,
+    c.name as company_name,
+    p.difficulty_level,
+    p.max_students,
+    p.current_students,
+    p.popularity_score,
+    p.required_skills,
+    p.preferred_skills,
+    COUNT(smc.student_id) as potential_matches,
+    AVG(smc.matching_score) as avg_matching_score
+FROM projects p
+LEFT JOIN companies c ON p.company_id = c.id
+LEFT JOIN skill_matching_cache smc ON p.id = smc.project_id AND smc.is_valid = true
+WHERE p.status = 'Active'
+GROUP BY p.id, p.title, p.company_id, c.name, p.difficulty_level, p.max_students, p.current_students, p.popularity_score, p.required_skills, p.preferred_skills
+ORDER BY p.popularity_score DESC, avg_matching_score DESC;
+
+-- Cache invalidation trigger on the application's student key (students.user_id)
+CREATE OR REPLACE FUNCTION invalidate_skill_cache()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_TABLE_NAME = 'students' AND OLD.skills IS DISTINCT FROM NEW.skills THEN
+        UPDATE skill_matching_cache
+        SET is_valid = false
+        WHERE student_id = NEW.user_id;
+    END IF;
+
+    IF TG_TABLE_NAME = 'projects' AND (
+        OLD.required_skills IS DISTINCT FROM NEW.required_skills OR
+        OLD.preferred_skills IS DISTINCT FROM NEW.preferred_skills
+    ) THEN
+        UPDATE skill_matching_cache
+        SET is_valid = false
+        WHERE project_id = NEW.id;
+    END IF;
+
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Success message
+DO $$
+BEGIN
+    RAISE NOTICE 'Project skills and skill matching cache migration completed successfully!';
+END $$;
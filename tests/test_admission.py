@@ -0,0 +1,113 @@
+"""
+Tests for provider admission control
+Concurrency limits, priority ordering, queue timeouts and token buckets
+"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from backend.ai_adapters import admission
+from backend.ai_adapters.admission import (
+    AdmissionController,
+    AdmissionTimeout,
+    TokenBucket,
+    request_priority
+)
+from backend.ai_adapters.base import AIRequest, AITask
+
+
+def test_request_priority_uses_task_default_and_metadata_override():
+    assert request_priority(AIRequest(task=AITask.PROJECT_MATCHING, prompt="")) == 0
+    assert request_priority(AIRequest(task=AITask.REPORT_GENERATION, prompt="")) == 4
+    assert request_priority(AIRequest(task=AITask.REPORT_GENERATION, prompt="", metadata={"priority": 0})) == 0
+
+
+def test_concurrency_limit_and_priority_order():
+    async def scenario():
+        controller = AdmissionController("test", max_concurrency=1, queue_timeout=5)
+        granted = []
+        await controller.acquire(2, 10)
+
+        async def wait(priority, label):
+            await controller.acquire(priority, 10)
+            granted.append(label)
+
+        tasks = [
+            asyncio.create_task(wait(3, "batch")),
+            asyncio.create_task(wait(0, "interactive")),
+            asyncio.create_task(wait(3, "batch-later"))
+        ]
+        await asyncio.sleep(0)
+        assert controller.queue_depth == 3
+        assert controller.get_metrics()["in_flight"] == 1
+
+        for _ in tasks:
+            controller.release(10, 10)
+            await asyncio.sleep(0)
+        await asyncio.gather(*tasks)
+        return granted, controller
+
+    granted, controller = asyncio.run(scenario())
+    # Highest priority first, then first come first served
+    assert granted == ["interactive", "batch", "batch-later"]
+    assert controller.admitted == 4
+
+
+def test_queue_timeout_raises_and_frees_the_place():
+    async def scenario():
+        controller = AdmissionController("test", max_concurrency=1, queue_timeout=0.05)
+        await controller.acquire(0, 10)
+        with pytest.raises(AdmissionTimeout):
+            await controller.acquire(0, 10)
+        return controller
+
+    controller = asyncio.run(scenario())
+    assert controller.timed_out == 1
+    assert controller.queue_depth == 0
+
+
+def test_slot_releases_on_error():
+    async def scenario():
+        controller = AdmissionController("test", max_concurrency=1, queue_timeout=1)
+        request = AIRequest(task=AITask.TEXT_ANALYSIS, prompt="hi")
+        with pytest.raises(RuntimeError):
+            async with controller.slot(request, 10):
+                raise RuntimeError("provider failed")
+        async with controller.slot(request, 10):
+            pass
+        return controller
+
+    assert asyncio.run(scenario()).get_metrics()["in_flight"] == 0
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_token_bucket_refills_at_the_per_minute_rate(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(admission, "time", SimpleNamespace(monotonic=clock))
+    bucket = TokenBucket(rate_per_minute=60)
+    bucket.consume(60)
+    assert bucket.delay(30) == pytest.approx(30.0)
+    clock.now = 10.0
+    assert bucket.delay(30) == pytest.approx(20.0)
+    # Requests larger than the bucket wait only for a full bucket
+    clock.now = 60.0
+    assert bucket.delay(1000) == 0.0
+
+
+def test_token_bucket_reconciles_actual_usage(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(admission, "time", SimpleNamespace(monotonic=clock))
+    bucket = TokenBucket(rate_per_minute=1000)
+    bucket.consume(800)
+    bucket.adjust(-500)   # Used 300 instead of the 800 estimated
+    assert bucket.tokens == pytest.approx(700)
+    bucket.adjust(-5000)
+    assert bucket.tokens == pytest.approx(1000)
@@ -0,0 +1,85 @@
+"""
+Tests for the student-project assignment auction
+Solver totals checked against exhaustive search on small instances
+"""
+import itertools
+
+import numpy as np
+import pytest
+
+from backend.flows.assignment import AssignmentSolver
+
+EPSILON = 0.01
+
+
+def _best_total(scores, capacities, feasible):
+    """Optimal total by trying every assignment (each student to a project or none)"""
+    n, m = scores.shape
+    best = 0.0
+    for choice in itertools.product(range(-1, m), repeat=n):
+        counts = np.bincount([column for column in choice if column >= 0], minlength=m)
+        if (counts > capacities).any():
+            continue
+        if any(column >= 0 and not feasible[row, column] for row, column in enumerate(choice)):
+            continue
+        best = max(best, sum(scores[row, column] for row, column in enumerate(choice) if column >= 0))
+    return best
+
+
+def _check(result, scores, capacities, feasible):
+    assignments = result["assignments"]
+    counts = np.bincount(list(assignments.values()), minlength=len(capacities))
+    assert (counts <= capacities).all()
+    for row, column in assignments.items():
+        assert feasible[row, column]
+    total = sum(scores[row, column] for row, column in assignments.items())
+    assert total == pytest.approx(result["total_score"], abs=0.01 * len(assignments) + 1e-9)
+    assert total >= _best_total(scores, capacities, feasible) - scores.shape[0] * EPSILON - 1e-9
+    assert sorted([*assignments, *result["unassigned"]]) == list(range(scores.shape[0]))
+
+
+@pytest.mark.parametrize("seed", range(25))
+def test_matches_exhaustive_search(seed):
+    rng = np.random.default_rng(seed)
+    n, m = int(rng.integers(1, 7)), int(rng.integers(1, 4))
+    scores = np.round(rng.uniform(0, 100, size=(n, m)), 1)
+    capacities = rng.integers(0, 3, size=m)
+    feasible = rng.uniform(size=(n, m)) > 0.2
+
+    result = AssignmentSolver(epsilon=EPSILON).solve(range(n), range(m), scores, capacities, feasible, warm_start=False)
+    _check(result, scores, capacities, feasible)
+
+
+def test_ties_and_contention():
+    # Everyone prefers project 0 by the same margin; only capacity decides
+    scores = np.array([[90.0, 10.0], [90.0, 10.0], [90.0, 10.0]])
+    capacities = np.array([1, 1])
+    feasible = np.ones_like(scores, dtype=bool)
+    result = AssignmentSolver(epsilon=EPSILON).solve(range(3), range(2), scores, capacities, feasible, warm_start=False)
+    _check(result, scores, capacities, feasible)
+    assert sorted(result["assignments"].values()) == [0, 1]
+    assert len(result["unassigned"]) == 1
+
+
+def test_warm_start_after_edit_stays_optimal():
+    rng = np.random.default_rng(7)
+    scores = np.round(rng.uniform(0, 100, size=(6, 3)), 1)
+    capacities = np.array([2, 2, 1])
+    feasible = np.ones_like(scores, dtype=bool)
+    solver = AssignmentSolver(epsilon=EPSILON)
+    solver.solve(range(6), range(3), scores, capacities, feasible)
+
+    scores[2] = [5.0, 99.0, 40.0]
+    capacities[0] = 1
+    result = solver.solve(range(6), range(3), scores, capacities, feasible)
+    assert result["warm_started"]
+    _check(result, scores, capacities, feasible)
+
+
+def test_infeasible_and_empty_projects_get_no_students():
+    scores = np.array([[80.0, 70.0], [60.0, 95.0]])
+    capacities = np.array([0, 2])
+    feasible = np.array([[True, False], [True, True]])
+    result = AssignmentSolver(epsilon=EPSILON).solve([101, 102], [7, 8], scores, capacities, feasible, warm_start=False)
+    assert result["assignments"] == {102: 8}
+    assert result["unassigned"] == [101]
@@ -0,0 +1,118 @@
+"""
+Tests for micro-batching of local model calls
+Batch size and wait limits, per-key batches, one batch at a time and error propagation
+"""
+import asyncio
+import threading
+
+import pytest
+
+from backend.ai_adapters.batching import MicroBatcher
+
+
+class Recorder:
+    """process_batch that doubles each item and records the batches it saw"""
+
+    def __init__(self, release=None):
+        self.batches = []
+        self.release = release
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, key, items):
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        if self.release is not None:
+            self.release.wait(timeout=5)
+        self.batches.append((key, list(items)))
+        with self._lock:
+            self.active -= 1
+        return [item * 2 for item in items]
+
+
+def test_concurrent_items_share_one_batch():
+    recorder = Recorder()
+
+    async def scenario():
+        batcher = MicroBatcher(recorder, max_batch_size=8, max_wait=0.02)
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(5)))
+        return results, batcher
+
+    results, batcher = asyncio.run(scenario())
+    assert results == [0, 2, 4, 6, 8]
+    assert recorder.batches == [(None, [0, 1, 2, 3, 4])]
+    assert batcher.get_metrics()["avg_batch_size"] == 5
+
+
+def test_full_batch_is_flushed_before_the_wait_expires():
+    recorder = Recorder()
+
+    async def scenario():
+        batcher = MicroBatcher(recorder, max_batch_size=3, max_wait=10.0)
+        return await asyncio.wait_for(asyncio.gather(*(batcher.submit(i) for i in range(3))), timeout=2)
+
+    assert asyncio.run(scenario()) == [0, 2, 4]
+    assert len(recorder.batches) == 1
+
+
+def test_keys_are_batched_separately():
+    recorder = Recorder()
+
+    async def scenario():
+        batcher = MicroBatcher(recorder, max_batch_size=8, max_wait=0.01)
+        return await asyncio.gather(
+            batcher.submit(1, key="a"), batcher.submit(2, key="b"), batcher.submit(3, key="a")
+        )
+
+    assert asyncio.run(scenario()) == [2, 4, 6]
+    assert sorted(recorder.batches) == [("a", [1, 3]), ("b", [2])]
+
+
+def test_one_batch_runs_at_a_time_and_backlog_goes_out_together():
+    release = threading.Event()
+    recorder = Recorder(release)
+
+    async def scenario():
+        batcher = MicroBatcher(recorder, max_batch_size=2, max_wait=0.001)
+        first = [asyncio.create_task(batcher.submit(i)) for i in range(2)]
+        await asyncio.sleep(0.05)
+        # Queued while the first batch holds the model
+        later = [asyncio.create_task(batcher.submit(i)) for i in range(2, 6)]
+        await asyncio.sleep(0.05)
+        release.set()
+        return await asyncio.gather(*first, *later)
+
+    assert asyncio.run(scenario()) == [0, 2, 4, 6, 8, 10]
+    assert recorder.max_active == 1
+    assert [items for _, items in recorder.batches] == [[0, 1], [2, 3], [4, 5]]
+
+
+def test_batch_failure_reaches_every_caller():
+    def fail(key, items):
+        raise RuntimeError("model crashed")
+
+    async def scenario():
+        batcher = MicroBatcher(fail, max_wait=0.001)
+        return await asyncio.gather(batcher.submit(1), batcher.submit(2), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+def test_cancelled_item_is_left_out_of_the_batch():
+    recorder = Recorder()
+
+    async def scenario():
+        batcher = MicroBatcher(recorder, max_batch_size=8, max_wait=0.02)
+        kept = asyncio.create_task(batcher.submit(1))
+        dropped = asyncio.create_task(batcher.submit(2))
+        await asyncio.sleep(0)
+        dropped.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await dropped
+        return await kept
+
+    assert asyncio.run(scenario()) == 2
+    assert recorder.batches == [(None, [1])]
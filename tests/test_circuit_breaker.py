@@ -0,0 +1,106 @@
+"""
+Tests for the provider circuit breaker
+Opening on the failure rate, half-open trials and recovery
+"""
+from types import SimpleNamespace
+
+import pytest
+
+from backend.ai_adapters import circuit_breaker
+from backend.ai_adapters.circuit_breaker import CircuitBreaker, CircuitState
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(circuit_breaker, "time", SimpleNamespace(monotonic=clock))
+    return clock
+
+
+def _breaker(**overrides):
+    options = {"failure_rate_threshold": 0.5, "window_size": 10, "min_calls": 4, "open_duration": 30.0}
+    options.update(overrides)
+    return CircuitBreaker("test", **options)
+
+
+def test_stays_closed_below_min_calls():
+    breaker = _breaker()
+    for _ in range(3):
+        breaker.record_failure()
+    assert breaker.state == CircuitState.CLOSED
+    assert breaker.allow_request()
+
+
+def test_opens_at_failure_rate_threshold(clock):
+    breaker = _breaker()
+    breaker.record_success()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CircuitState.CLOSED
+    breaker.record_failure()
+    assert breaker.failure_rate == 0.5
+    assert breaker.state == CircuitState.OPEN
+    assert not breaker.allow_request()
+
+
+def test_old_outcomes_leave_the_window(clock):
+    breaker = _breaker(window_size=4)
+    for _ in range(3):
+        breaker.record_failure()
+    for _ in range(4):
+        breaker.record_success()
+    breaker.record_failure()
+    assert breaker.failure_rate == 0.25
+    assert breaker.state == CircuitState.CLOSED
+
+
+def _opened(clock):
+    breaker = _breaker()
+    for _ in range(4):
+        breaker.record_failure()
+    assert breaker.state == CircuitState.OPEN
+    clock.now += 30.0
+    return breaker
+
+
+def test_half_open_allows_one_trial_after_cool_down(clock):
+    breaker = _opened(clock)
+    assert breaker.allow_request()
+    assert breaker.state == CircuitState.HALF_OPEN
+    assert not breaker.allow_request()
+
+
+def test_successful_trial_closes_with_a_fresh_window(clock):
+    breaker = _opened(clock)
+    breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == CircuitState.CLOSED
+    assert breaker.get_status()["recent_calls"] == 1
+    assert breaker.failure_rate == 0.0
+
+
+def test_failed_trial_reopens_for_another_cool_down(clock):
+    breaker = _opened(clock)
+    breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == CircuitState.OPEN
+    clock.now += 29.0
+    assert not breaker.allow_request()
+    clock.now += 1.0
+    assert breaker.allow_request()
+
+
+def test_ignored_trial_frees_the_slot(clock):
+    breaker = _opened(clock)
+    assert breaker.allow_request()
+    breaker.record_ignored()
+    assert breaker.state == CircuitState.HALF_OPEN
+    assert breaker.allow_request()
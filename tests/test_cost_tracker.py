@@ -0,0 +1,132 @@
+"""
+Tests for AI cost tracking
+Running aggregates, batched flushes, retry on write failure and the shared daily total
+"""
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from backend.ai_adapters.base import AITask
+from backend.ai_adapters.cost_tracker import CostTracker
+from backend.core.config import settings
+
+TODAY = datetime.now().date().isoformat()
+
+
+class FakeStore:
+    """Stands in for ai_cost_tracking: a list of written batches and a summed daily total"""
+
+    def __init__(self, other_workers=0.0):
+        self.batches = []
+        self.other_workers = other_workers
+        self.fail_write = False
+        self.fail_read = False
+        self.during_write = None
+
+    def write(self, batch):
+        if self.during_write is not None:
+            self.during_write()
+        if self.fail_write:
+            raise RuntimeError("database unavailable")
+        self.batches.append(dict(batch))
+
+    def read(self):
+        if self.fail_read:
+            raise RuntimeError("database unavailable")
+        written = sum(aggregate.cost for batch in self.batches for key, aggregate in batch.items() if key[0] == TODAY)
+        return TODAY, self.other_workers + written
+
+
+@pytest.fixture
+def store():
+    return FakeStore(other_workers=2.0)
+
+
+@pytest.fixture
+def tracker(store):
+    tracker = CostTracker(history_size=3)
+    tracker._write_batch = store.write
+    tracker._read_daily_total = store.read
+    return tracker
+
+
+def test_usage_is_aggregated_per_day_provider_model_and_task(tracker):
+    for _ in range(3):
+        tracker.add_cost("openai", 0.01, AITask.STUDENT_RANKING, tokens_used=100, processing_time=0.5, model="gpt-4o")
+    tracker.add_cost("openai", 0.02, AITask.STUDENT_RANKING, tokens_used=50, processing_time=1.5, success=False, model="gpt-4o")
+    tracker.add_cost("google", 0.0, AITask.SKILL_EXTRACTION)
+
+    assert tracker.get_metrics()["pending_rows"] == 2
+    aggregate = tracker._pending[(TODAY, "openai", "gpt-4o", "student_ranking")]
+    assert aggregate.request_count == 4
+    assert aggregate.tokens_used == 350
+    assert aggregate.cost == pytest.approx(0.05)
+    assert aggregate.successes == 3
+    # History is bounded
+    assert len(tracker.request_costs) == 3
+
+
+def test_own_spend_is_used_until_the_database_is_read(tracker):
+    tracker.add_cost("openai", 0.25, AITask.STUDENT_RANKING)
+    assert tracker.get_daily_cost() == pytest.approx(0.25)
+
+
+def test_flush_writes_one_batch_and_loads_the_shared_total(tracker, store):
+    tracker.add_cost("openai", 0.25, AITask.STUDENT_RANKING)
+    tracker.add_cost("google", 0.05, AITask.SKILL_EXTRACTION)
+    asyncio.run(tracker.flush())
+
+    assert len(store.batches) == 1 and len(store.batches[0]) == 2
+    assert tracker.get_metrics()["pending_rows"] == 0
+    assert tracker.get_daily_cost() == pytest.approx(2.30)
+
+    # Unflushed usage counts on top of the shared total
+    tracker.add_cost("openai", 0.10, AITask.STUDENT_RANKING)
+    assert tracker.get_daily_cost() == pytest.approx(2.40)
+
+    asyncio.run(tracker.flush())
+    assert tracker.get_daily_cost() == pytest.approx(2.40)
+
+
+def test_failed_write_keeps_usage_for_the_next_flush(tracker, store):
+    tracker.add_cost("openai", 0.25, AITask.STUDENT_RANKING, tokens_used=100)
+    store.fail_write = True
+    # Usage recorded while the batch is being written lands in a fresh pending row
+    store.during_write = lambda: tracker.add_cost("openai", 0.05, AITask.STUDENT_RANKING, tokens_used=20)
+    asyncio.run(tracker.flush())
+
+    aggregate = tracker._pending[(TODAY, "openai", "openai", "student_ranking")]
+    assert aggregate.cost == pytest.approx(0.30)
+    assert aggregate.request_count == 2
+    assert aggregate.tokens_used == 120
+    assert tracker.get_daily_cost() == pytest.approx(2.30)
+
+    store.fail_write = False
+    store.during_write = None
+    asyncio.run(tracker.flush())
+    assert len(store.batches) == 1
+    assert tracker.get_daily_cost() == pytest.approx(2.30)
+
+
+def test_failed_read_after_a_write_still_counts_the_batch(tracker, store):
+    asyncio.run(tracker.flush())
+    assert tracker.get_daily_cost() == pytest.approx(2.0)
+
+    tracker.add_cost("openai", 0.40, AITask.STUDENT_RANKING)
+    store.fail_read = True
+    asyncio.run(tracker.flush())
+
+    assert len(store.batches) == 1
+    assert tracker.get_metrics()["pending_rows"] == 0
+    assert tracker.get_daily_cost() == pytest.approx(2.40)
+
+
+def test_daily_limit_uses_the_shared_total(tracker, monkeypatch):
+    monkeypatch.setattr(settings, "daily_cost_limit", 2.5)
+    tracker.add_cost("openai", 0.40, AITask.STUDENT_RANKING)
+    assert tracker.is_under_daily_limit()   # Only this worker's 0.40 is known
+    asyncio.run(tracker.flush())
+    assert tracker.is_under_daily_limit()   # 2.40 across workers
+    tracker.add_cost("openai", 0.10, AITask.STUDENT_RANKING)
+    assert not tracker.is_under_daily_limit()
@@ -0,0 +1,254 @@
+"""
+Tests for the AI job queue
+Claiming a job exactly once across processes, retries with backoff and giving up
+"""
+import asyncio
+import threading
+import uuid
+from datetime import timedelta
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from backend.core.config import settings
+from backend.flows import job_queue
+from backend.flows.job_queue import AIJobQueue, JobQueueFull, _now
+
+
+class JobStore:
+    """ai_jobs in memory, with the conditional claim the queue relies on"""
+
+    def __init__(self):
+        self.jobs = {}
+        self._lock = threading.Lock()
+
+    def insert(self, job_type, payload, created_by):
+        job_id = uuid.uuid4()
+        self.jobs[job_id] = {
+            "job_type": job_type, "payload": payload, "status": "queued", "attempts": 0,
+            "next_attempt_at": None, "result": None, "error": None
+        }
+        return job_id
+
+    def claim(self, job_id):
+        with self._lock:
+            job = self.jobs.get(job_id)
+            due = job is not None and (job["next_attempt_at"] is None or job["next_attempt_at"] <= _now())
+            if not due or job["status"] != "queued":
+                return None
+            job["status"] = "running"
+            job["attempts"] += 1
+            return job["job_type"], job["payload"], job["attempts"]
+
+    def update(self, job_id, **values):
+        with self._lock:
+            self.jobs[job_id].update(values)
+
+    def due(self):
+        return [
+            job_id for job_id, job in self.jobs.items()
+            if job["status"] == "queued" and (job["next_attempt_at"] is None or job["next_attempt_at"] <= _now())
+        ]
+
+
+class StoreQueue(AIJobQueue):
+    """AIJobQueue with its database operations served by a JobStore"""
+
+    def __init__(self, store, **options):
+        super().__init__(**options)
+        self.store = store
+
+    def _insert(self, job_type, payload, created_by):
+        return self.store.insert(job_type, payload, created_by)
+
+    def _claim(self, job_id):
+        return self.store.claim(job_id)
+
+    def _release(self, job_id, error, delay, refund=False):
+        job = self.store.jobs[job_id]
+        values = {"status": "queued", "next_attempt_at": _now() + timedelta(seconds=delay)}
+        if error is not None:
+            values["error"] = error
+        if refund:
+            values["attempts"] = job["attempts"] - 1
+        self.store.update(job_id, **values)
+
+    def _finish(self, job_id, status, result, error):
+        self.store.update(job_id, status=status, result=result, error=error)
+
+    def _sweep_db(self):
+        return 0, self.store.due()
+
+
+@pytest.fixture(autouse=True)
+def fast_retries(monkeypatch):
+    monkeypatch.setattr(settings, "ai_job_retry_delay", 0.01)
+    monkeypatch.setattr(settings, "ai_job_max_attempts", 3)
+    monkeypatch.setattr(settings, "ai_job_timeout", 5.0)
+
+
+async def _wait_for(store, job_id, statuses=("succeeded", "failed"), timeout=3.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while store.jobs[job_id]["status"] not in statuses:
+        assert asyncio.get_running_loop().time() < deadline, store.jobs[job_id]
+        await asyncio.sleep(0.005)
+    return store.jobs[job_id]
+
+
+def test_job_queued_in_two_processes_runs_once():
+    store = JobStore()
+    calls = []
+
+    async def handler(payload):
+        calls.append(payload["n"])
+        await asyncio.sleep(0.02)
+        return {"doubled": payload["n"] * 2}
+
+    async def scenario():
+        queues = [StoreQueue(store, workers=2, max_queued=10) for _ in range(2)]
+        for queue in queues:
+            queue.register("double", handler)
+            await queue.start()
+        job_id = await queues[0].submit("double", {"n": 21})
+        queues[1]._enqueue(job_id)   # Found by the other process's sweep
+        job = await _wait_for(store, job_id)
+        await asyncio.sleep(0.05)
+        for queue in queues:
+            await queue.stop()
+        return job, queues
+
+    job, queues = asyncio.run(scenario())
+    assert calls == [21]
+    assert job["status"] == "succeeded"
+    assert job["attempts"] == 1
+    assert job["result"] == {"doubled": 42}
+    assert sum(queue.completed for queue in queues) == 1
+
+
+def test_failed_attempts_are_retried_until_success():
+    store = JobStore()
+    attempts = []
+
+    async def flaky(payload):
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise RuntimeError("provider timeout")
+        return {"ok": True}
+
+    async def scenario():
+        queue = StoreQueue(store, workers=1, max_queued=10)
+        queue.register("flaky", flaky)
+        await queue.start()
+        job_id = await queue.submit("flaky", {})
+        job = await _wait_for(store, job_id)
+        await queue.stop()
+        return job, queue
+
+    job, queue = asyncio.run(scenario())
+    assert job["status"] == "succeeded"
+    assert job["attempts"] == 3
+    assert queue.retried == 2
+
+
+def test_job_fails_after_max_attempts():
+    store = JobStore()
+
+    async def broken(payload):
+        raise ValueError("bad payload")
+
+    async def scenario():
+        queue = StoreQueue(store, workers=1, max_queued=10)
+        queue.register("broken", broken)
+        await queue.start()
+        job_id = await queue.submit("broken", {})
+        job = await _wait_for(store, job_id)
+        await queue.stop()
+        return job, queue
+
+    job, queue = asyncio.run(scenario())
+    assert job["status"] == "failed"
+    assert job["attempts"] == 3
+    assert job["error"] == "bad payload"
+    assert queue.failed == 1
+
+
+def test_stop_hands_running_job_back_without_using_an_attempt():
+    store = JobStore()
+
+    async def scenario():
+        running = asyncio.Event()
+
+        async def slow(payload):
+            running.set()
+            await asyncio.sleep(10)
+
+        queue = StoreQueue(store, workers=1, max_queued=10)
+        queue.register("slow", slow)
+        await queue.start()
+        job_id = await queue.submit("slow", {})
+        await running.wait()
+        await queue.stop()
+        return store.jobs[job_id]
+
+    job = asyncio.run(scenario())
+    assert job["status"] == "queued"
+    assert job["attempts"] == 0
+
+
+def test_submit_rejects_when_the_queue_is_full():
+    store = JobStore()
+    gate = threading.Event()
+
+    async def scenario():
+        queue = StoreQueue(store, workers=1, max_queued=1)
+
+        async def wait(payload):
+            await asyncio.to_thread(gate.wait, 5)
+            return {}
+
+        queue.register("wait", wait)
+        await queue.start()
+        await queue.submit("wait", {})
+        await asyncio.sleep(0.02)   # The worker takes the first job off the queue
+        await queue.submit("wait", {})
+        with pytest.raises(JobQueueFull):
+            await queue.submit("wait", {})
+        gate.set()
+        await queue.stop()
+
+    asyncio.run(scenario())
+
+
+class RecordingSession:
+    def __init__(self):
+        self.statements = []
+
+    def execute(self, statement):
+        self.statements.append(statement)
+        return self
+
+    def first(self):
+        return None
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def test_claim_is_a_conditional_update(monkeypatch):
+    session = RecordingSession()
+    monkeypatch.setattr(job_queue, "SessionLocal", lambda: session)
+
+    assert AIJobQueue()._claim(uuid.uuid4()) is None
+    sql = str(session.statements[0].compile(dialect=postgresql.dialect()))
+    assert sql.startswith("UPDATE")
+    where = sql.split("WHERE", 1)[1]
+    assert "status = " in where
+    assert "next_attempt_at IS NULL OR" in where
+    assert "ai_jobs.attempts + " in sql
+    assert "RETURNING" in sql
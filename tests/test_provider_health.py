@@ -0,0 +1,81 @@
+"""
+Tests for provider health reporting
+Unreachable providers are marked unavailable on the request path and skipped until a probe clears them
+"""
+import asyncio
+from collections import deque
+
+import httpx
+import pytest
+
+from backend.ai_adapters.base import AIRequest, AIResponse, AITask
+from backend.ai_adapters.circuit_breaker import CircuitBreaker
+from backend.ai_adapters.health import ProviderHealthProber
+from backend.ai_adapters.manager import AIManager
+from backend.ai_adapters.ollama_adapter import OllamaAdapter
+
+
+class Backup:
+    """Always answers"""
+
+    max_tokens = 1000
+    config = {}
+
+    def __init__(self):
+        self.calls = 0
+
+    def is_available(self):
+        return True
+
+    async def generate_response(self, request):
+        self.calls += 1
+        return AIResponse(
+            content="ok", provider="backup", task=request.task,
+            cost=0.0, tokens_used=10, processing_time=0.01
+        )
+
+
+def _refused(request):
+    raise httpx.ConnectError("Connection refused", request=request)
+
+
+@pytest.fixture
+def manager():
+    ollama = OllamaAdapter({"base_url": "http://ollama.test", "max_tokens": 1000})
+    ollama._available = True
+    ollama._client = httpx.AsyncClient(base_url=ollama.base_url, transport=httpx.MockTransport(_refused))
+
+    manager = AIManager()
+    manager.adapters = {"ollama": ollama, "backup": Backup()}
+    manager.health_prober = ProviderHealthProber(manager.adapters)
+    manager.admission = {name: manager._create_admission_controller(name, adapter) for name, adapter in manager.adapters.items()}
+    manager.circuit_breakers = {name: CircuitBreaker(name) for name in manager.adapters}
+    manager.latencies = {name: deque(maxlen=100) for name in manager.adapters}
+    return manager
+
+
+def _request():
+    return AIRequest(task=AITask.SURVEY_ANALYSIS, prompt="Summarize the survey")
+
+
+def test_refused_connection_marks_provider_unavailable(manager):
+    response = asyncio.run(manager.generate_response(_request()))
+
+    assert response.provider == "backup"
+    assert manager.health_prober.is_available("ollama") is False
+    assert "Cannot connect" in manager.health_prober.status["ollama"]["error"]
+
+    # Skipped on the next request instead of being retried first
+    asyncio.run(manager.generate_response(_request()))
+    assert manager.adapters["backup"].calls == 2
+
+
+def test_probe_clears_the_mark(manager):
+    manager.health_prober.mark_unavailable("ollama", "connection refused")
+
+    async def up():
+        return True
+
+    manager.adapters["ollama"].check_availability = up
+    assert asyncio.run(manager.health_prober.probe("ollama", manager.adapters["ollama"])) is True
+    assert manager.health_prober.is_available("ollama") is True
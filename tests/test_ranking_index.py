@@ -0,0 +1,51 @@
+"""
+Tests for the sorted ranking index
+Rank and percentile math checked against brute force
+"""
+import numpy as np
+import pytest
+
+from backend.flows.ranking_index import SortedScoreIndex
+
+
+def _brute_rank(scores, student_id):
+    return sorted(scores, key=lambda other: (-scores[other], other)).index(student_id) + 1
+
+
+def _brute_percentile(scores, student_id):
+    if len(scores) == 1:
+        return 100.0
+    lower = sum(1 for score in scores.values() if score < scores[student_id])
+    return 100.0 * lower / (len(scores) - 1)
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_rank_and_percentile_match_brute_force(seed):
+    rng = np.random.default_rng(seed)
+    # Coarse scores so ties are common
+    scores = {int(student_id): float(rng.integers(0, 20)) * 5 for student_id in rng.choice(1000, size=60, replace=False)}
+    index = SortedScoreIndex(scores.items())
+    for student_id in scores:
+        assert index.rank_of(student_id) == _brute_rank(scores, student_id)
+        assert index.percentile(student_id) == pytest.approx(_brute_percentile(scores, student_id))
+
+
+def test_upsert_and_remove_keep_order():
+    index = SortedScoreIndex([(1, 50.0), (2, 70.0), (3, 60.0)])
+    index.upsert(1, 80.0)
+    index.upsert(4, 60.0)
+    index.remove(2)
+    index.remove(99)
+    assert index.top(10) == [(1, 80.0), (3, 60.0), (4, 60.0)]
+    assert index.top(2, offset=1) == [(3, 60.0), (4, 60.0)]
+    assert [index.rank_of(student_id) for student_id in (1, 3, 4)] == [1, 2, 3]
+    assert index.rank_of(2) is None and index.percentile(2) is None
+    assert len(index) == 3 and 2 not in index
+
+
+def test_single_student_and_ties():
+    assert SortedScoreIndex([(7, 10.0)]).percentile(7) == 100.0
+    index = SortedScoreIndex([(1, 50.0), (2, 50.0), (3, 50.0)])
+    # Ties share the percentile; ranks are broken by student id
+    assert [index.percentile(student_id) for student_id in (1, 2, 3)] == [0.0, 0.0, 0.0]
+    assert [index.rank_of(student_id) for student_id in (1, 2, 3)] == [1, 2, 3]
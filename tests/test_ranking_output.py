@@ -0,0 +1,93 @@
+"""
+Tests for tolerant ranking output parsing
+Complete, wrapped, truncated and malformed model responses
+"""
+import json
+
+from backend.ai_adapters.structured_output import parse_json_tolerant
+from backend.flows.ranking_output import parse_ranking
+from backend.flows.sharded_ranking import extract_ranked_ids
+
+CANDIDATES = [11, 12, 13, 14]
+
+
+def _entry(rank, student_id, score=80):
+    return {"rank": rank, "student_id": student_id, "score": score, "reasoning": f"Student {student_id}"}
+
+
+def _ids(result):
+    return [entry["student_id"] for entry in result["rankings"]]
+
+
+def test_complete_response():
+    content = json.dumps({"rankings": [_entry(1, 13), _entry(2, 11)], "methodology": "skills first"})
+    result = parse_ranking(content, CANDIDATES)
+    assert _ids(result) == [13, 11]
+    assert result["methodology"] == "skills first"
+    assert result["structured"] is True
+    assert result["rejected"] == 0
+
+
+def test_prose_and_code_fence_around_json():
+    content = "Here is the ranking:\n```json\n" + json.dumps({"rankings": [_entry(1, 12)]}) + "\n```\nHope this helps."
+    assert _ids(parse_ranking(content, CANDIDATES)) == [12]
+
+
+def test_trailing_commas():
+    content = '{"rankings": [{"rank": 1, "student_id": 14, "score": 90, "reasoning": "ok",},],}'
+    assert _ids(parse_ranking(content, CANDIDATES)) == [14]
+
+
+def test_truncated_inside_string_keeps_complete_entries():
+    full = json.dumps({"rankings": [_entry(1, 11), _entry(2, 12), _entry(3, 13)]})
+    content = full[:full.index('"Student 13"') + 5]
+    result = parse_ranking(content, CANDIDATES)
+    assert result["structured"] is True
+    assert _ids(result)[:2] == [11, 12]
+
+
+def test_truncated_between_entries():
+    full = json.dumps({"rankings": [_entry(1, 11), _entry(2, 12), _entry(3, 13)]})
+    content = full[:full.index('{"rank": 3') + 3]
+    assert _ids(parse_ranking(content, CANDIDATES)) == [11, 12]
+
+
+def test_unknown_and_repeated_ids_are_rejected():
+    content = json.dumps({"rankings": [_entry(1, 11), _entry(2, 99), _entry(3, 11), _entry(4, "x"), _entry(5, 12)]})
+    result = parse_ranking(content, CANDIDATES)
+    assert _ids(result) == [11, 12]
+    assert [entry["rank"] for entry in result["rankings"]] == [1, 2]
+    assert result["rejected"] == 3
+
+
+def test_scores_are_clamped_and_limit_applied():
+    content = json.dumps({"rankings": [_entry(1, 11, 140), _entry(2, 12, -5), _entry(3, 13, "n/a")]})
+    result = parse_ranking(content, CANDIDATES, limit=2)
+    assert [entry["score"] for entry in result["rankings"]] == [100.0, 0.0]
+
+
+def test_bare_list_response():
+    content = json.dumps([_entry(1, 14), _entry(2, 13)])
+    assert _ids(parse_ranking(content, CANDIDATES)) == [14, 13]
+
+
+def test_no_json_at_all():
+    result = parse_ranking("I cannot rank these students.", CANDIDATES)
+    assert result == {"rankings": [], "methodology": None, "rejected": 0, "structured": False}
+
+
+def test_unrecoverable_json():
+    content = '{"rankings": [{"student_id": 11 "score": 5}]}'
+    assert parse_json_tolerant(content) is None
+    assert parse_ranking(content, CANDIDATES)["structured"] is False
+
+
+def test_extract_ranked_ids_from_prose():
+    content = "1. Student ID: 13 - strong\n2. ID #11 - good\n3. Student ID 13 again\n4. ID: 99 (unknown)\n5. id 12"
+    assert extract_ranked_ids(content, CANDIDATES) == [13, 11, 12]
+
+
+def test_extract_ranked_ids_from_truncated_json():
+    content = '{"rankings": [{"rank": 1, "student_id": 12, "reasoning": "ID 14 is close behind'
+    # No "ID" label before 12, so only the id mentioned in the reasoning is found
+    assert extract_ranked_ids(content, CANDIDATES) == [14]
@@ -0,0 +1,85 @@
+"""
+Tests for AI provider readiness
+Only a running warm-up holds an available adapter out of readiness
+"""
+import asyncio
+
+import pytest
+
+from backend.ai_adapters.health import ProviderHealthProber
+from backend.ai_adapters.manager import AIManager
+from backend.core.config import settings
+
+
+class LazyAdapter:
+    """Available at once; loads its model on warm-up or first call"""
+
+    def __init__(self, fail: bool = False):
+        self.loaded = False
+        self.fail = fail
+        self.release = asyncio.Event()
+
+    def is_available(self):
+        return True
+
+    def is_ready(self):
+        return self.loaded
+
+    async def warm_up(self):
+        await self.release.wait()
+        if self.fail:
+            raise RuntimeError("model load failed")
+        self.loaded = True
+
+
+@pytest.fixture
+def manager():
+    manager = AIManager()
+    manager.adapters = {"huggingface_local": LazyAdapter()}
+    manager.health_prober = ProviderHealthProber(manager.adapters)
+    return manager
+
+
+def test_lazy_adapter_without_warm_up_is_not_warming_up(manager):
+    state = manager.get_readiness()["huggingface_local"]
+    assert state == {"available": True, "ready": False, "warming_up": False}
+
+
+def test_warming_up_only_while_warm_up_runs(manager):
+    async def scenario():
+        adapter = manager.adapters["huggingface_local"]
+        task = asyncio.create_task(manager._warm_up_adapters())
+        await asyncio.sleep(0)
+        assert manager.get_readiness()["huggingface_local"]["warming_up"]
+        adapter.release.set()
+        await task
+        return manager.get_readiness()["huggingface_local"]
+
+    assert asyncio.run(scenario()) == {"available": True, "ready": True, "warming_up": False}
+
+
+def test_failed_warm_up_stops_warming_up(manager):
+    manager.adapters["huggingface_local"] = LazyAdapter(fail=True)
+
+    async def scenario():
+        task = asyncio.create_task(manager._warm_up_adapters())
+        await asyncio.sleep(0)
+        manager.adapters["huggingface_local"].release.set()
+        await task
+        return manager.get_readiness()["huggingface_local"]
+
+    assert asyncio.run(scenario()) == {"available": True, "ready": False, "warming_up": False}
+
+
+def test_stalled_warm_up_times_out(manager, monkeypatch):
+    monkeypatch.setattr(settings, "ai_warmup_timeout", 0.0)
+
+    async def scenario():
+        task = asyncio.create_task(manager._warm_up_adapters())
+        await asyncio.sleep(0)
+        state = manager.get_readiness()["huggingface_local"]
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        return state
+
+    assert asyncio.run(scenario())["warming_up"] is False
@@ -0,0 +1,108 @@
+"""
+Tests for adaptive provider routing
+Objectives, eligibility, unmeasured providers, sample expiry and exploration
+"""
+from types import SimpleNamespace
+
+import pytest
+
+from backend.ai_adapters import routing
+from backend.ai_adapters.base import AITask
+from backend.ai_adapters.routing import RoutingEngine
+
+TASK = AITask.PROJECT_MATCHING   # 5 second SLO
+ORDER = ["google", "openai", "ollama", "local"]
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(routing, "time", SimpleNamespace(monotonic=clock))
+    return clock
+
+
+def _engine(objective, **options):
+    return RoutingEngine(objective=objective, exploration_rate=0.0, min_samples=3, window_size=50, sample_ttl=600, **options)
+
+
+def _measure(engine, provider, latency, cost=0.0, failures=0, calls=10):
+    for i in range(calls):
+        engine.record(provider, TASK, latency, i >= failures, cost)
+
+
+def test_static_keeps_the_configured_order(clock):
+    engine = _engine("static")
+    _measure(engine, "ollama", 0.1)
+    assert engine.rank(TASK, ORDER, ORDER) == ORDER
+
+
+def test_fastest_orders_by_p50_inflated_by_errors(clock):
+    engine = _engine("fastest")
+    _measure(engine, "google", 2.0)
+    _measure(engine, "openai", 1.0, failures=6)   # 1.0 / 0.4 = 2.5
+    _measure(engine, "ollama", 1.5)
+    assert engine.rank(TASK, ORDER, ORDER)[:3] == ["ollama", "google", "openai"]
+
+
+def test_cheapest_under_slo_prefers_cheap_providers_meeting_the_slo(clock):
+    engine = _engine("cheapest_under_slo")
+    _measure(engine, "google", 1.0, cost=0.002)
+    _measure(engine, "openai", 1.0, cost=0.010)
+    _measure(engine, "ollama", 8.0, cost=0.0)     # Free but misses the 5s SLO
+    _measure(engine, "local", 0.5, cost=0.0, failures=5)   # Free but too unreliable
+    assert engine.rank(TASK, ORDER, ORDER) == ["google", "openai", "local", "ollama"]
+
+
+def test_weighted_blends_latency_cost_and_errors(clock):
+    engine = _engine("weighted")
+    _measure(engine, "google", 4.0, cost=0.0)
+    _measure(engine, "openai", 1.0, cost=0.01)
+    _measure(engine, "ollama", 1.0, cost=0.0, failures=5)
+    assert engine.rank(TASK, ORDER[:3], ORDER[:3]) == ["openai", "google", "ollama"]
+
+
+def test_ineligible_providers_stay_last_in_static_order(clock):
+    engine = _engine("fastest")
+    _measure(engine, "local", 0.01)
+    _measure(engine, "openai", 0.5)
+    _measure(engine, "google", 1.0)
+    assert engine.rank(TASK, ORDER, ["google", "openai"]) == ["openai", "google", "ollama", "local"]
+
+
+def test_unmeasured_providers_follow_measured_ones(clock):
+    engine = _engine("fastest")
+    _measure(engine, "openai", 1.0)
+    _measure(engine, "google", 0.1, calls=2)   # Below min_samples
+    assert engine.rank(TASK, ORDER, ORDER) == ["openai", "google", "ollama", "local"]
+
+
+def test_expired_samples_stop_counting(clock):
+    engine = _engine("fastest")
+    _measure(engine, "google", 0.5, failures=10)
+    _measure(engine, "openai", 2.0)
+    assert engine.rank(TASK, ORDER[:2], ORDER[:2])[0] == "openai"
+    clock.now += 601
+    _measure(engine, "google", 0.5)
+    _measure(engine, "openai", 2.0)
+    assert engine.summary("google", TASK)["error_rate"] == 0.0
+    assert engine.rank(TASK, ORDER[:2], ORDER[:2])[0] == "google"
+
+
+def test_exploration_moves_the_stalest_provider_first(clock, monkeypatch):
+    engine = RoutingEngine(objective="fastest", exploration_rate=1.0, min_samples=3, window_size=50, sample_ttl=600)
+    _measure(engine, "google", 0.5)
+    _measure(engine, "openai", 1.0)
+    monkeypatch.setattr(routing.random, "random", lambda: 0.0)
+    assert engine.rank(TASK, ORDER[:3], ORDER[:3])[0] == "ollama"
+    assert engine.explorations == 1
+    # The routing table never explores
+    table = engine.get_table([TASK], lambda task: (ORDER[:3], ORDER[:3]))
+    assert table["tasks"][TASK.value]["order"] == ["google", "openai", "ollama"]
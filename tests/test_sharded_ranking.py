@@ -0,0 +1,98 @@
+"""
+Tests for sharded student ranking
+Tournament rounds, finalist selection and validating streamed rankings against the finalists
+"""
+import asyncio
+import json
+
+from backend.ai_adapters.base import AIResponse
+from backend.flows.rank_students_flow import RankingCriteria, StudentProfile, StudentRankingFlow
+from backend.flows.ranking_output import RankingStreamParser
+from backend.flows.sharded_ranking import ShardedRanker
+
+
+class ReverseRanker:
+    """Ranks every prompt's students by descending id, so the highest ids should win"""
+
+    def __init__(self):
+        self.shard_sizes = []
+
+    def prompt_budget_for(self, task, max_tokens=None):
+        return None
+
+    async def generate_response(self, request):
+        students = next(section for section in request.sections if section.name == "students")
+        self.shard_sizes.append(len(students.item_ids))
+        ranked = sorted(students.item_ids, reverse=True)[:request.context["limit"]]
+        rankings = [
+            {"rank": rank, "student_id": student_id, "score": 100 - rank, "reasoning": "higher id"}
+            for rank, student_id in enumerate(ranked, start=1)
+        ]
+        return AIResponse(
+            content=json.dumps({"rankings": rankings}),
+            provider="fake",
+            task=request.task,
+            cost=0.01,
+            tokens_used=0,
+            processing_time=0.0
+        )
+
+
+def _profiles(count):
+    return [
+        StudentProfile(
+            id=i, name=f"Student {i}", email=f"s{i}@example.edu", gpa=3.0, program="CS",
+            skills={"python": "advanced"}, resume_text=None, student_id_number=None
+        )
+        for i in range(1, count + 1)
+    ]
+
+
+def _flow(shard_size=10):
+    flow = StudentRankingFlow()
+    flow.ai_manager = ReverseRanker()
+    flow.sharded_ranker = ShardedRanker(flow, shard_size=shard_size, max_parallel_shards=4)
+    return flow
+
+
+def test_pool_within_shard_size_is_not_sharded():
+    flow = _flow()
+    finalists, sharding = asyncio.run(flow.select_ranking_candidates(_profiles(8), limit=5))
+    assert sharding is None
+    assert len(finalists) == 8
+    assert flow.ai_manager.shard_sizes == []
+
+
+def test_finalists_fit_one_shard_and_keep_the_winners():
+    flow = _flow()
+    finalists, sharding = asyncio.run(flow.select_ranking_candidates(_profiles(95), None, RankingCriteria(), limit=5))
+    assert len(finalists) <= 10
+    # Each shard advances its best students
+    assert {student.id for student in finalists} >= {90, 94, 95}
+    assert sharding["candidates"] == 95
+    assert sharding["finalists"] == len(finalists)
+    assert sharding["cost"] > 0
+    assert max(flow.ai_manager.shard_sizes) <= 10
+
+
+def test_every_round_shrinks_the_pool():
+    # Shards of 5 with limit 5: rounding quotas up alone would stall at 6 students
+    flow = _flow(shard_size=5)
+    finalists, _ = asyncio.run(flow.select_ranking_candidates(_profiles(6), limit=5))
+    assert len(finalists) == 5
+    assert 1 not in {student.id for student in finalists}
+
+
+def test_stream_parser_rejects_students_outside_the_finalists():
+    flow = _flow()
+    finalists, _ = asyncio.run(flow.select_ranking_candidates(_profiles(40), limit=3))
+    finalist_ids = [student.id for student in finalists]
+    eliminated = next(i for i in range(1, 41) if i not in finalist_ids)
+
+    parser = RankingStreamParser(finalist_ids, 3)
+    content = json.dumps({"rankings": [
+        {"rank": 1, "student_id": eliminated, "score": 99, "reasoning": "eliminated in a shard"},
+        {"rank": 2, "student_id": finalist_ids[0], "score": 90, "reasoning": "finalist"}
+    ]})
+    accepted = [entry["student_id"] for entry in parser.feed(content)]
+    assert accepted == [finalist_ids[0]]
@@ -0,0 +1,71 @@
+"""
+Tests for the skill dictionary
+Exact and alias canonicalization, and fuzzy matches kept to suggestions
+"""
+import pytest
+
+from backend.core.skill_dictionary import SkillDictionary, skill_key, skill_dictionary
+
+# Similar spellings of different skills: fuzzy matching once merged each pair
+DISTINCT_SKILLS = [
+    ("Web Development", "Game Development"),
+    ("Product Management", "Project Management"),
+    ("Sparkle", "Apache Spark"),
+    ("Scalar", "Scala"),
+    ("Tensorflow.js", "TensorFlow"),
+    ("Java EE", "Java"),
+    ("Shell", "Bash"),
+]
+
+
+@pytest.mark.parametrize("name, canonical", [
+    ("JS", "JavaScript"),
+    ("javascript ", "JavaScript"),
+    ("React.js", "React"),
+    ("react js", "React"),
+    ("Postgres", "PostgreSQL"),
+    ("K8s", "Kubernetes"),
+    ("Bash Scripting", "Bash"),
+])
+def test_exact_and_alias_matches(name, canonical):
+    assert skill_dictionary.lookup(name) == canonical
+    assert skill_dictionary.canonical(name) == canonical
+
+
+@pytest.mark.parametrize("name, other", DISTINCT_SKILLS)
+def test_similar_skills_are_not_merged(name, other):
+    assert skill_dictionary.lookup(name) is None
+    assert skill_dictionary.canonical(name) == name
+    assert skill_dictionary.canonical_key(name) != skill_key(other)
+
+
+def test_normalize_skills_keeps_distinct_skills():
+    skills = {name: 3 for name, _ in DISTINCT_SKILLS}
+    skills.update({other: 4 for _, other in DISTINCT_SKILLS})
+    assert skill_dictionary.normalize_skills(skills) == skills
+    names = [name for pair in DISTINCT_SKILLS for name in pair]
+    assert skill_dictionary.normalize_skills(names) == names
+
+
+def test_normalize_skills_merges_aliases():
+    assert skill_dictionary.normalize_skills({"JS": 2, "JavaScript": 4, "  Rust  ": 3}) == {"JavaScript": 4, "Rust": 3}
+    assert skill_dictionary.normalize_skills(["React.js", "ReactJS", "Unknown  Tool"]) == ["React", "Unknown Tool"]
+
+
+def test_fuzzy_matches_are_suggestions_only():
+    assert skill_dictionary.suggest("Javascrpt") == "JavaScript"
+    assert skill_dictionary.lookup("Javascrpt") is None
+    assert skill_dictionary.canonical("Javascrpt") == "Javascrpt"
+    assert skill_dictionary.suggest("JS") == "JavaScript"
+    # Short names only match exactly
+    assert skill_dictionary.suggest("Gx") is None
+
+
+def test_suggestions_off_when_merging_is_disabled():
+    config = {
+        "processing_options": {"merge_similar_skills": False},
+        "categories": {"languages": {"skills": ["JavaScript", "Python"]}}
+    }
+    dictionary = SkillDictionary(config, {"JavaScript": ["JS"]})
+    assert dictionary.suggest("Javascrpt") is None
+    assert dictionary.lookup("js") == "JavaScript"
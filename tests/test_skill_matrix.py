@@ -0,0 +1,128 @@
+"""
+Tests for the sparse student skill matrix
+Cosine similarity against a dense reference, incremental updates, compaction and expiry
+"""
+import random
+
+import numpy as np
+import pytest
+
+from backend.core.config import settings
+from backend.flows import skill_matrix as skill_matrix_module
+from backend.flows.ranking_engine import normalize_skill, skill_levels
+from backend.flows.skill_matrix import StudentSkillMatrix
+
+SKILLS = ["Python", "SQL", "Java", "React", "Docker", "AWS", "Pandas", "Go", "Rust", "Excel"]
+
+
+def _random_students(seed, count):
+    rng = random.Random(seed)
+    return [
+        (student_id, {skill: rng.randint(1, 5) for skill in rng.sample(SKILLS, rng.randint(1, 5))})
+        for student_id in range(1, count + 1)
+    ]
+
+
+def _dense_similarity(matrix, students, required, weights=None):
+    """Reference cosine similarity computed densely, student by student"""
+    weights = {normalize_skill(skill): weight for skill, weight in (weights or {}).items()}
+    required = {normalize_skill(skill) for skill in required}
+    query = {skill: weights.get(skill, 1.0) for skill in required}
+    query_norm = np.sqrt(sum(weight * weight for weight in query.values()))
+    scores = {}
+    for student_id, skills in students.items():
+        levels = skill_levels(skills, matrix.level_names)
+        norm = np.sqrt(sum(level * level for level in levels.values()))
+        if not levels or norm == 0:
+            continue
+        dot = sum(level * query.get(skill, 0.0) for skill, level in levels.items())
+        scores[student_id] = dot / (norm * query_norm) if query_norm else 0.0
+    return scores
+
+
+def _similarity(matrix, required, weights=None):
+    student_ids, scores = matrix.similarity(required, weights)
+    return dict(zip(student_ids.tolist(), scores.tolist()))
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_similarity_matches_dense_reference(seed):
+    students = dict(_random_students(seed, 60))
+    matrix = StudentSkillMatrix()
+    matrix.build(students.items())
+    required = ["Python", "SQL", "Kubernetes"]   # Nobody lists Kubernetes, yet it lowers every score
+    weights = {"Python": 2.0}
+    expected = _dense_similarity(matrix, students, required, weights)
+    assert _similarity(matrix, required, weights) == pytest.approx(expected)
+
+
+def test_top_matches_order_and_skill_lists():
+    matrix = StudentSkillMatrix()
+    matrix.build([
+        (1, {"Python": 5, "SQL": 5}),
+        (2, {"Python": 5}),
+        (3, {"Excel": 3}),
+        (4, {"python": 5, "sql": 5})
+    ])
+    matches = matrix.top_matches(["Python", "SQL"], limit=3)
+    # Ties are broken by student id
+    assert [match["student_id"] for match in matches] == [1, 4, 2]
+    assert matches[0]["score"] == 100.0
+    assert matches[2]["matched_skills"] == ["Python"]
+    assert matches[2]["missing_skills"] == ["SQL"]
+
+
+def test_incremental_updates_match_a_rebuild():
+    students = dict(_random_students(7, 40))
+    matrix = StudentSkillMatrix()
+    matrix.build(students.items())
+
+    rng = random.Random(11)
+    for student_id in rng.sample(sorted(students), 15):
+        students[student_id] = {skill: rng.randint(1, 5) for skill in rng.sample(SKILLS, 3)}
+        matrix.upsert(student_id, students[student_id])
+    for student_id in rng.sample(sorted(students), 10):
+        del students[student_id]
+        matrix.remove(student_id)
+    matrix.sync_student(99, {"Rust": 4}, approved=True)
+    students[99] = {"Rust": 4}
+    # A saved student without skills leaves the matrix
+    emptied = next(iter(students))
+    matrix.sync_student(emptied, None, approved=True)
+    del students[emptied]
+
+    rebuilt = StudentSkillMatrix()
+    rebuilt.build(students.items())
+    required = ["Python", "Rust", "AWS"]
+    assert matrix.size == rebuilt.size == len(students)
+    assert _similarity(matrix, required) == pytest.approx(_similarity(rebuilt, required))
+
+
+def test_compaction_drops_retired_rows(monkeypatch):
+    monkeypatch.setattr(skill_matrix_module, "COMPACT_MIN_ROWS", 10)
+    students = dict(_random_students(3, 20))
+    matrix = StudentSkillMatrix()
+    matrix.build(students.items())
+    for student_id in range(1, 9):
+        matrix.upsert(student_id, {"Go": 5})
+        students[student_id] = {"Go": 5}
+    matrix.similarity(["Go"])   # Flushes the staged rows, compacting once enough are retired
+
+    assert matrix.get_status()["retired_rows"] == 0
+    assert len(matrix._row_ids) == 20
+    assert _similarity(matrix, ["Go"]) == pytest.approx(_dense_similarity(matrix, students, ["Go"]))
+
+
+def test_unbuilt_matrix_ignores_syncs_and_is_expired():
+    matrix = StudentSkillMatrix()
+    matrix.sync_student(1, {"Python": 5}, approved=True)
+    assert matrix.size == 0
+    assert matrix.expired
+
+
+def test_matrix_expires_after_ttl(monkeypatch):
+    matrix = StudentSkillMatrix()
+    matrix.build([(1, {"Python": 5})])
+    assert not matrix.expired
+    monkeypatch.setattr(settings, "skill_matrix_ttl", -1.0)
+    assert matrix.expired
@@ -0,0 +1,82 @@
+"""
+Tests for bulk skill normalization
+Paging, per-page syncing before each commit, and dry runs
+"""
+from types import SimpleNamespace
+
+from backend.flows import skill_normalization
+from backend.flows.skill_normalization import _normalize_table
+from backend.models.mentor import Mentor
+
+
+class PagedSession:
+    """Serves keyset pages of rows and records commits and session clears"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.events = []
+
+    def query(self, model):
+        self.after = None
+        return self
+
+    def options(self, *options):
+        return self
+
+    def order_by(self, key):
+        return self
+
+    def filter(self, criterion):
+        self.after = criterion.right.value
+        return self
+
+    def limit(self, count):
+        self.count = count
+        return self
+
+    def all(self):
+        rows = [row for row in self.rows if self.after is None or row.user_id > self.after]
+        return rows[:self.count]
+
+    def commit(self):
+        self.events.append("commit")
+
+    def expunge_all(self):
+        self.events.append("expunge")
+
+
+def _mentors(count):
+    # Every third mentor has a skill list that needs rewriting
+    return [
+        SimpleNamespace(user_id=i, skills=["js", "Python"] if i % 3 == 0 else ["JavaScript", "Python"])
+        for i in range(1, count + 1)
+    ]
+
+
+def test_pages_are_synced_before_each_commit(monkeypatch):
+    monkeypatch.setattr(skill_normalization, "PAGE_SIZE", 4)
+    db = PagedSession(_mentors(10))
+    synced = []
+
+    def sync(session, rows):
+        synced.append([row.user_id for row in rows])
+        session.events.append("sync")
+
+    changed = _normalize_table(db, Mentor, Mentor.user_id, ("skills",), dry_run=False, sync=sync)
+
+    assert changed == 3
+    assert synced == [[3], [6], [9]]
+    assert all(row.skills == ["JavaScript", "Python"] for row in db.rows)
+    # Three pages of rows, then the empty page that ends the loop
+    assert db.events == ["sync", "commit", "expunge"] * 3
+
+
+def test_dry_run_counts_without_writing(monkeypatch):
+    monkeypatch.setattr(skill_normalization, "PAGE_SIZE", 4)
+    db = PagedSession(_mentors(10))
+
+    changed = _normalize_table(db, Mentor, Mentor.user_id, ("skills",), dry_run=True, sync=lambda session, rows: 1 / 0)
+
+    assert changed == 3
+    assert "commit" not in db.events
+    assert db.rows[2].skills == ["js", "Python"]
@@ -0,0 +1,161 @@
+"""
+Tests for percentile and tier standings
+Engine percentiles and tiers, and per-cohort standings of the ranking index
+"""
+from datetime import date
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import backend.main  # noqa: F401 - registers every model, so the Student query's mappers resolve
+from backend.core.config import settings
+from backend.flows.ranking_engine import ranking_engine, StudentRankingEngine
+from backend.flows.ranking_index import (
+    RankingIndexService,
+    SortedScoreIndex,
+    GLOBAL_CONTEXT,
+    program_context,
+    semester_context,
+    semester_of
+)
+
+
+def _student(user_id, gpa, program, registered, skills, status="Approved"):
+    return SimpleNamespace(
+        user_id=user_id,
+        status=status,
+        gpa=gpa,
+        program=program,
+        registration_date=registered,
+        skills=skills,
+        resume_text=None,
+        student_id_number=str(user_id),
+        user=SimpleNamespace(full_name=f"Student {user_id}", email=f"s{user_id}@example.edu")
+    )
+
+
+class StudentTable:
+    """Answers the index's approved-students query; rows may change as if saved by another worker"""
+
+    def __init__(self, students):
+        self.students = list(students)
+
+    def query(self, *entities):
+        return self
+
+    def options(self, *options):
+        return self
+
+    def filter(self, *criteria):
+        return self
+
+    def all(self):
+        return [student for student in self.students if student.status == "Approved"]
+
+
+@pytest.fixture
+def service():
+    service = RankingIndexService()
+    # A loaded (empty) global context, so updates are applied instead of waiting for a build
+    service.contexts[GLOBAL_CONTEXT] = SortedScoreIndex()
+    service.update_student(_student(1, 3.9, "Computer Science", date(2024, 9, 2), {"Python": 5, "SQL": 4, "Docker": 4}))
+    service.update_student(_student(2, 2.8, "Computer Science", date(2024, 9, 2), {"Excel": 2}))
+    service.update_student(_student(3, 3.4, "Data Science", date(2025, 1, 15), {"Python": 4, "Pandas": 4, "SQL": 3}))
+    return service
+
+
+def test_percentile_agrees_with_engine_percentiles():
+    scores = {1: 40.0, 2: 75.5, 3: 75.5, 4: 90.0, 5: 12.0}
+    index = SortedScoreIndex(scores.items())
+    values = np.array(list(scores.values()))
+    expected = StudentRankingEngine.percentiles(values, values)
+    assert [index.percentile(student_id) for student_id in scores] == pytest.approx(expected.tolist())
+
+
+def test_engine_percentiles():
+    cohort = np.array([30.0, 10.0, 50.0, 20.0, 40.0])
+    result = StudentRankingEngine.percentiles(cohort, cohort)
+    assert result.tolist() == pytest.approx([50.0, 0.0, 100.0, 25.0, 75.0])
+    assert StudentRankingEngine.percentiles(np.array([42.0]), np.array([42.0])).tolist() == [100.0]
+
+
+@pytest.mark.parametrize("score, tier", [
+    (100.0, "exceptional"),
+    (90.0, "exceptional"),
+    (89.99, "proficient"),
+    (75.0, "proficient"),
+    (74.5, "developing"),
+    (60.0, "developing"),
+    (59.9, "emerging"),
+    (40.0, "emerging"),
+    (39.99, "needs_support"),
+    (0.0, "needs_support"),
+    (-3.0, "needs_support"),
+])
+def test_tier_boundaries(score, tier):
+    assert ranking_engine.tiers(np.array([score])) == [tier]
+
+
+def test_semester_of():
+    assert [semester_of(date(2024, month, 1)) for month in (1, 5, 6, 7, 8, 12)] == [
+        "Spring 2024", "Spring 2024", "Summer 2024", "Summer 2024", "Fall 2024", "Fall 2024"
+    ]
+
+
+def test_students_are_ranked_in_their_cohorts(service):
+    assert sorted(service.cohorts_of(1)) == sorted([program_context("Computer Science"), semester_context("Fall 2024")])
+    assert len(service.contexts[program_context("computer science")]) == 2
+    assert len(service.contexts[semester_context("Spring 2025")]) == 1
+
+
+def test_standings_match_index_and_tiers(service):
+    standings = service.standings(GLOBAL_CONTEXT, [3, 1, 2, 42])
+    assert set(standings) == {1, 2, 3}
+    index = service.contexts[GLOBAL_CONTEXT]
+    for student_id, standing in standings.items():
+        assert standing["rank"] == index.rank_of(student_id)
+        assert standing["total"] == 3
+        assert standing["percentile"] == pytest.approx(index.percentile(student_id), abs=0.01)
+        assert standing["tier"] == ranking_engine.tiers(np.array([index.scores[student_id]]))[0]
+    assert sorted(standing["percentile"] for standing in standings.values()) == [0.0, 50.0, 100.0]
+
+
+def test_cohort_standing_is_relative_to_the_cohort(service):
+    context = program_context("Computer Science")
+    best, other = sorted((1, 2), key=lambda student_id: service.standing(context, student_id)["rank"])
+    assert service.standing(context, best)["percentile"] == 100.0
+    assert service.standing(context, other)["percentile"] == 0.0
+    assert service.standing(context, 3) is None
+
+
+def test_unapproving_and_removing_leave_the_cohorts(service):
+    service.update_student(_student(3, 3.4, "Data Science", date(2025, 1, 15), {"Python": 4}, status="Pending"))
+    assert 3 not in service.contexts[GLOBAL_CONTEXT]
+    # Empty cohort contexts are dropped
+    assert program_context("Data Science") not in service.contexts
+    service.remove_student(2)
+    assert service.cohorts_of(2) == []
+    assert service.standing(GLOBAL_CONTEXT, 1)["total"] == 1
+
+
+def test_expired_index_is_rebuilt_from_the_database(monkeypatch):
+    table = StudentTable([
+        _student(1, 3.9, "Computer Science", date(2024, 9, 2), {"Python": 5}),
+        _student(2, 3.1, "Biology", date(2024, 9, 2), {"R": 3})
+    ])
+    service = RankingIndexService()
+    service.ensure_global(table)
+    assert len(service.contexts[GLOBAL_CONTEXT]) == 2
+
+    # Saved by another worker: not visible while the index is fresh
+    table.students = [table.students[0], _student(3, 3.5, "Data Science", date(2025, 1, 15), {"SQL": 4})]
+    service.ensure_global(table)
+    assert 3 not in service.contexts[GLOBAL_CONTEXT]
+
+    monkeypatch.setattr(settings, "ranking_index_ttl", -1.0)
+    service.ensure_global(table)
+    assert set(service.contexts[GLOBAL_CONTEXT].scores) == {1, 3}
+    assert program_context("Data Science") in service.contexts
+    # Cohorts emptied by the other worker do not linger
+    assert program_context("Biology") not in service.contexts
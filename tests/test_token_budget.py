@@ -0,0 +1,188 @@
+"""
+Tests for prompt token budgeting
+Section trimming order, dropped item ids, and ranking pools larger than one prompt
+"""
+import asyncio
+import json
+
+from backend.ai_adapters.base import AIResponse
+from backend.ai_adapters.token_budget import (
+    PromptSection,
+    approximate_tokens,
+    fit_sections,
+    prompt_budget,
+    render_sections,
+    truncate_to_tokens
+)
+from backend.flows.rank_students_flow import RankingCriteria, StudentProfile, StudentRankingFlow
+
+
+def _students_section(count, priority=2):
+    return PromptSection(
+        "students",
+        "STUDENTS:",
+        priority=priority,
+        items=[f"ID: {i} | Skills: python, sql, statistics" for i in range(count)],
+        item_ids=list(range(count))
+    )
+
+
+def test_prompt_within_budget_is_untouched():
+    sections = [PromptSection("task", "Rank them."), _students_section(3)]
+    fitted = fit_sections(sections, 10_000)
+    assert fitted.prompt == render_sections(sections)
+    assert not fitted.was_trimmed
+    assert fitted.dropped_ids == {}
+
+
+def test_highest_priority_number_is_trimmed_first():
+    sections = [
+        PromptSection("task", "Rank the students below."),
+        _students_section(20, priority=2),
+        PromptSection("resumes", "RESUMES:", priority=3, items=["long resume text " * 20] * 5, shrink_items=True)
+    ]
+    students_only = fit_sections(sections[:2], 10_000).tokens
+    fitted = fit_sections(sections, students_only)
+    assert "resumes" in fitted.trimmed
+    assert "students" not in fitted.dropped_items
+    assert fitted.tokens <= students_only
+
+
+def test_priority_zero_is_never_trimmed():
+    task = PromptSection("task", "word " * 200)
+    fitted = fit_sections([task, _students_section(10)], 50)
+    assert task.text in fitted.prompt
+    assert fitted.dropped_ids["students"] == list(range(10))
+
+
+def test_dropped_ids_are_the_trimmed_tail():
+    sections = [PromptSection("task", "Rank them."), _students_section(30)]
+    budget = fit_sections([sections[0], _students_section(12)], 10_000).tokens
+    fitted = fit_sections(sections, budget)
+    dropped = fitted.dropped_ids["students"]
+    assert fitted.dropped_items["students"] == len(dropped)
+    assert dropped == list(range(30 - len(dropped), 30))
+    kept = [i for i in range(30) if i not in dropped]
+    assert all(f"ID: {i} |" in fitted.prompt for i in kept)
+    assert not any(f"ID: {i} |" in fitted.prompt for i in dropped)
+    assert fitted.tokens <= budget
+
+
+def test_callers_sections_are_not_modified():
+    section = _students_section(30)
+    fit_sections([section], 20)
+    assert len(section.items) == 30
+    assert section.item_ids == list(range(30))
+
+
+def test_truncate_to_tokens():
+    text = "alpha beta gamma delta " * 50
+    cut = truncate_to_tokens(text, 20)
+    assert approximate_tokens(cut) <= 20
+    assert cut.endswith("...")
+    assert truncate_to_tokens("short", 20) == "short"
+    assert truncate_to_tokens(text, 0) == ""
+
+
+def test_prompt_budget_reserves_output_and_overhead():
+    assert prompt_budget(8192, 1000) == 8192 - 1000 - 128
+    # Output reservation is capped at half the window
+    assert prompt_budget(2048, 3000) == 2048 - 1024 - 128
+    assert prompt_budget(100, 3000) == 0
+
+
+class BudgetedManager:
+    """Fits each request to a fixed budget like AIManager and ranks what the model saw"""
+
+    def __init__(self, budget):
+        self.budget = budget
+        self.seen = set()
+        self.calls = 0
+
+    def prompt_budget_for(self, task, max_tokens=None):
+        return self.budget
+
+    async def generate_response(self, request):
+        self.calls += 1
+        fitted = fit_sections(request.sections, self.budget)
+        students = next(section for section in request.sections if section.name == "students")
+        dropped = set(fitted.dropped_ids.get("students", []))
+        shown = [student_id for student_id in students.item_ids if student_id not in dropped]
+        self.seen.update(shown)
+        rankings = [
+            {"rank": rank, "student_id": student_id, "score": 90 - rank, "reasoning": "fit"}
+            for rank, student_id in enumerate(shown[:request.context["limit"]], start=1)
+        ]
+        metadata = None
+        if fitted.was_trimmed:
+            metadata = {"prompt_budget": {"dropped_ids": fitted.dropped_ids}}
+        return AIResponse(
+            content=json.dumps({"rankings": rankings}),
+            provider="fake",
+            task=request.task,
+            cost=0.0,
+            tokens_used=fitted.tokens,
+            processing_time=0.0,
+            metadata=metadata
+        )
+
+
+def _profiles(count):
+    return [
+        StudentProfile(
+            id=i, name=f"Student {i}", email=f"s{i}@example.edu", gpa=3.5, program="CS",
+            skills={"python": "advanced", "sql": "intermediate"}, resume_text=None, student_id_number=None
+        )
+        for i in range(1, count + 1)
+    ]
+
+
+def _flow(budget):
+    flow = StudentRankingFlow()
+    flow.ai_manager = BudgetedManager(budget)
+    return flow
+
+
+def _budget_for(flow, students):
+    """A budget that holds exactly ``len(students)`` of the test profiles"""
+    return fit_sections(flow._build_ranking_sections(students, None, RankingCriteria(), 5), 10_000).tokens
+
+
+def test_overflow_is_sharded_instead_of_trimmed():
+    students = _profiles(40)
+    flow = _flow(0)
+    flow.ai_manager.budget = _budget_for(flow, students[:8])
+
+    result = asyncio.run(flow.rank_students_for_project(students, None, RankingCriteria(), limit=5))
+
+    assert result["success"], result.get("error")
+    assert flow.ai_manager.seen == {student.id for student in students}
+    assert result["unranked_student_ids"] == []
+    assert result["ai_metadata"]["sharding"]["shard_size"] <= 8
+    assert len(result["ranked_students"]) == 5
+
+
+def test_pool_that_fits_is_ranked_in_one_call():
+    students = _profiles(6)
+    flow = _flow(0)
+    flow.ai_manager.budget = _budget_for(flow, students)
+
+    result = asyncio.run(flow.rank_students_for_project(students, None, RankingCriteria(), limit=5))
+
+    assert flow.ai_manager.calls == 1
+    assert result["ai_metadata"]["sharding"] is None
+    assert result["unranked_student_ids"] == []
+
+
+def test_skill_ranking_overflow_is_sharded():
+    students = _profiles(30)
+    flow = _flow(0)
+    flow.ai_manager.budget = fit_sections(
+        flow._build_skill_ranking_sections(students[:6], ["python"], None, 5), 10_000
+    ).tokens
+
+    result = asyncio.run(flow.rank_students_by_skills(students, ["python"], limit=5))
+
+    assert result["success"], result.get("error")
+    assert flow.ai_manager.seen == {student.id for student in students}
+    assert result["unranked_student_ids"] == []